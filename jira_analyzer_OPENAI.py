@@ -6,18 +6,2751 @@ This script provides a GUI to analyze JIRA bugs and get AI-powered bug fix sugge
 All configurations are hardcoded - no external config files needed!
 """
 
+import time
+_STARTUP_STARTED = time.perf_counter()  # Reference point for the startup timing report
+
+import importlib.util
+import types
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-import requests
-from requests.auth import HTTPBasicAuth
 from pathlib import Path
-import webbrowser
 from io import BytesIO
-from PIL import Image, ImageTk
 import os
+import sys
 import json
+import argparse
+import hashlib
+import math
+import random
+import re
+import struct
+import threading
+import queue
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from stat import S_ISREG
+
+
+class _LazyModule(types.ModuleType):
+    """Module stand-in that imports the real module on first attribute access"""
+
+    def __getattr__(self, attr):
+        # import_module holds the module's import lock, so threads racing on the
+        # first access all get the fully initialized module
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(vars(module))  # Later lookups no longer come through here
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    """Return a module that is only really imported on first attribute access
+    
+    Keeps heavy dependencies (requests and everything it pulls in) off the
+    start-up path; the GUI only needs them once the first call is made. Unlike
+    importlib.util.LazyLoader, safe to use from several threads at once.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name) is None:
+        raise ImportError(f"No module named '{name}'")
+    return _LazyModule(name)
+
+
+requests = lazy_import('requests')
+asyncio = lazy_import('asyncio')
+subprocess = lazy_import('subprocess')
+
+
+class WorkspaceIndex:
+    """Persistent on-disk index of scanned workspace files keyed by path, mtime and size"""
+
+    INDEX_VERSION = 4
+
+    def __init__(self, workspace_path, cache_dir):
+        self.workspace_path = str(Path(workspace_path).resolve())
+        digest = hashlib.sha1(self.workspace_path.encode('utf-8')).hexdigest()[:16]
+        self.index_file = Path(cache_dir) / f"workspace_index_{digest}.json"
+        self.entries = {}
+        self.paths = []  # Every source file in the workspace, scanned or not (for SourceLocator)
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        self.generation = 0  # Bumped on every change so derived indexes know when to rebuild
+        self.load()
+
+    def load(self):
+        """Load the index from disk, starting empty if it is missing or incompatible"""
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.INDEX_VERSION and data.get('workspace') == self.workspace_path:
+                self.entries = data.get('entries', {})
+                self.paths = data.get('paths', [])
+        except (OSError, ValueError):
+            self.entries = {}
+            self.paths = []
+
+    def save(self):
+        """Write the index to disk atomically (only when something changed)"""
+        if not self.dirty:
+            return
+        try:
+            self.index_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.index_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': self.INDEX_VERSION,
+                    'workspace': self.workspace_path,
+                    'entries': self.entries,
+                    'paths': self.paths
+                }, f)
+            os.replace(tmp_file, self.index_file)
+            self.dirty = False
+        except OSError as e:
+            print(f"Could not save workspace index: {e}")
+
+    def lookup(self, rel_path, mtime_ns=None, size=None):
+        """Return the cached entry for a file if its mtime and size are unchanged
+        
+        Without mtime_ns the entry is returned as is: the caller knows it is
+        current (the workspace watcher keeps it up to date).
+        """
+        entry = self.entries.get(rel_path)
+        if entry and (mtime_ns is None or (entry.get('mtime_ns') == mtime_ns and entry.get('size') == size)):
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, rel_path, mtime_ns, size, content, lines, terms=None, skipped=False, symbols=None):
+        """Record freshly read file content in the index
+        
+        Binary or minified files are stored with skipped=True so they are not
+        re-read on the next scan either. symbols holds the line ranges of the
+        file's functions and classes (see chunk_source).
+        """
+        entry = {
+            'mtime_ns': mtime_ns,
+            'size': size,
+            'content': content,
+            'lines': lines,
+            'terms': terms or {},
+            'symbols': symbols or []
+        }
+        if skipped:
+            entry['skipped'] = True
+        self.entries[rel_path] = entry
+        self.dirty = True
+        self.generation += 1
+        return entry
+
+    def set_paths(self, paths):
+        """Record the relative paths of all source files found by the last walk"""
+        if paths != self.paths:
+            self.paths = paths
+            self.dirty = True
+            self.generation += 1
+
+    def remove(self, rel_paths):
+        """Drop the entries of deleted files"""
+        removed = [path for path in rel_paths if self.entries.pop(path, None) is not None]
+        if removed:
+            self.dirty = True
+            self.generation += 1
+    
+    def prune(self, seen_paths):
+        """Drop entries for files that were not seen during the last scan"""
+        stale = [path for path in self.entries if path not in seen_paths]
+        for path in stale:
+            del self.entries[path]
+        if stale:
+            self.dirty = True
+            self.generation += 1
+
+    def invalidate(self):
+        """Forget every cached entry and delete the index file"""
+        self.entries = {}
+        self.paths = []
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        self.generation += 1
+        try:
+            self.index_file.unlink()
+        except FileNotFoundError:
+            pass
+
+    def stats(self):
+        """Return hit/miss counters and index size"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self.entries),
+            'index_file': str(self.index_file)
+        }
+
+
+class ShardedWorkspaceIndex:
+    """Workspace index split into shards, one WorkspaceIndex (and index file) per shard
+
+    A shard covers one workspace root, or one top-level directory of a large
+    root (a monorepo), and keys its entries relative to its own directory.
+    Callers use workspace paths: relative to the root when there is a single
+    root, prefixed with the root's name when there are several. Each path is
+    routed to the shard with the longest matching prefix, so a change in one
+    service only rewrites that service's index file.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.shards = {}  # Path prefix ('' or 'name/' or 'name/top/') -> WorkspaceIndex
+        self.loaded = {}  # Shard directory -> WorkspaceIndex, kept when the layout changes
+        self.layout_generation = 0
+        self._paths = ((), [])
+
+    def set_layout(self, layout):
+        """Use the shards given as {path prefix: directory}, loading new ones from disk"""
+        shards = {}
+        for prefix, directory in layout.items():
+            directory = str(Path(directory).resolve())
+            if directory not in self.loaded:
+                self.loaded[directory] = WorkspaceIndex(directory, self.cache_dir)
+            shards[prefix] = self.loaded[directory]
+        if shards != self.shards:
+            self.shards = shards
+            self.layout_generation += 1
+
+    def shard_for(self, path):
+        """Return (prefix, shard) for a workspace path, or (None, None) outside every shard"""
+        first = path.find(os.sep) + 1
+        second = path.find(os.sep, first) + 1 or first  # Ends of the first two directory levels
+        for end in (second, first, 0):
+            shard = self.shards.get(path[:end])
+            if shard is not None:
+                return path[:end], shard
+        return None, None
+
+    def _group(self, paths):
+        """Split workspace paths into {prefix: [shard-relative path, ...]} for every shard"""
+        groups = {prefix: [] for prefix in self.shards}
+        for path in paths:
+            prefix, shard = self.shard_for(path)
+            if shard is not None:
+                groups[prefix].append(path[len(prefix):])
+        return groups
+
+    @property
+    def generation(self):
+        """Changes whenever the layout or any shard changes (for derived indexes)"""
+        return (self.layout_generation,) + tuple(shard.generation for shard in self.shards.values())
+
+    @property
+    def paths(self):
+        """Every source file of all shards as workspace paths"""
+        generation, paths = self._paths
+        if generation != self.generation:
+            paths = [prefix + path for prefix, shard in self.shards.items() for path in shard.paths]
+            self._paths = (self.generation, paths)
+        return paths
+
+    def get(self, path):
+        """Return the cached entry for a workspace path (whatever its mtime)"""
+        prefix, shard = self.shard_for(path)
+        return shard.entries.get(path[len(prefix):]) if shard is not None else None
+
+    def lookup(self, path, mtime_ns=None, size=None):
+        """Return the cached entry for a file if its mtime and size are unchanged (or unchecked)"""
+        prefix, shard = self.shard_for(path)
+        return shard.lookup(path[len(prefix):], mtime_ns, size) if shard is not None else None
+
+    def store(self, path, mtime_ns, size, content, lines, terms=None, skipped=False, symbols=None):
+        """Record freshly read file content in the file's shard"""
+        prefix, shard = self.shard_for(path)
+        return shard.store(path[len(prefix):], mtime_ns, size, content, lines, terms, skipped, symbols)
+
+    def set_paths(self, paths):
+        """Record the workspace paths of all source files found by the last listing"""
+        for prefix, shard_paths in self._group(paths).items():
+            self.shards[prefix].set_paths(shard_paths)
+
+    def remove(self, paths):
+        """Drop the entries of deleted files"""
+        for prefix, shard_paths in self._group(paths).items():
+            self.shards[prefix].remove(shard_paths)
+
+    def prune(self, seen_paths):
+        """Drop entries for files that were not seen during the last scan"""
+        for prefix, shard_paths in self._group(seen_paths).items():
+            self.shards[prefix].prune(set(shard_paths))
+
+    def save(self):
+        """Write every changed shard to disk"""
+        for shard in self.shards.values():
+            shard.save()
+
+    def invalidate(self):
+        """Forget every cached entry of every shard and delete their index files"""
+        for shard in self.loaded.values():
+            shard.invalidate()
+        self.layout_generation += 1
+
+    def stats(self):
+        """Return hit/miss counters and index size summed over the shards"""
+        shards = list(self.shards.values())
+        return {
+            'hits': sum(shard.hits for shard in shards),
+            'misses': sum(shard.misses for shard in shards),
+            'entries': sum(len(shard.entries) for shard in shards),
+            'shards': len(shards),
+            'index_files': [str(shard.index_file) for shard in shards]
+        }
+
+
+def parse_duration(value):
+    """Seconds in an OpenAI reset duration such as '1s', '6m0s', '20ms' or '1h2m3.5s'"""
+    total = 0.0
+    for amount, unit in re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', value or ''):
+        total += float(amount) * {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}[unit]
+    return total
+
+
+class RateLimiter:
+    """Token-bucket limiter on requests and tokens per minute for one API
+    
+    Callers block in acquire() until both buckets have room, so queued work runs at
+    a steady rate under the quota instead of bursting into 429s. Each request is
+    charged its full estimated token cost (the token bucket always holds at least
+    the largest request seen) and record_usage() refunds what it did not use, or
+    charges the excess, once the real usage is known. The buckets adapt
+    to the server's view through update_from_headers() (OpenAI x-ratelimit-* and
+    JIRA X-RateLimit-* headers) and pause after a 429 via penalize().
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute=None, burst_seconds=10.0):
+        self.burst_seconds = burst_seconds
+        self.condition = threading.Condition()
+        self.blocked_until = 0.0
+        self.last_refill = time.monotonic()
+        self.largest_request = 0  # Token cost of the largest request so far (minimum token bucket size)
+        self._configure(requests_per_minute, tokens_per_minute)
+        self.request_level = self.request_capacity
+        self.token_level = self.token_capacity
+
+    def _configure(self, requests_per_minute, tokens_per_minute):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.request_rate = requests_per_minute / 60.0
+        self.request_capacity = max(1.0, self.request_rate * self.burst_seconds)
+        if tokens_per_minute:
+            self.token_rate = tokens_per_minute / 60.0
+            self.token_capacity = max(1.0, self.token_rate * self.burst_seconds, self.largest_request)
+        else:
+            self.token_rate = None
+            self.token_capacity = float('inf')
+
+    def _refill(self, now):
+        elapsed = now - self.last_refill
+        self.last_refill = now
+        self.request_level = min(self.request_capacity, self.request_level + elapsed * self.request_rate)
+        if self.token_rate:
+            self.token_level = min(self.token_capacity, self.token_level + elapsed * self.token_rate)
+
+    def acquire(self, tokens=0):
+        """Block until one request (and `tokens` tokens) may be sent; returns seconds waited"""
+        started = time.monotonic()
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self.token_rate and tokens > self.token_capacity:
+                    # Grow the bucket to hold this request; a full bucket stays full
+                    self.largest_request = tokens
+                    self.token_level += tokens - self.token_capacity
+                    self.token_capacity = tokens
+                
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    request_wait = (1.0 - self.request_level) / self.request_rate if self.request_level < 1.0 else 0.0
+                    token_wait = 0.0
+                    if self.token_rate and self.token_level < tokens:
+                        token_wait = (tokens - self.token_level) / self.token_rate
+                    wait = max(request_wait, token_wait)
+                
+                if wait <= 0:
+                    self.request_level -= 1.0
+                    if self.token_rate:
+                        self.token_level -= tokens
+                    return now - started
+                self.condition.wait(wait)
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        """Correct the token bucket once the real token usage of a request is known
+        
+        The level may go negative when a request used more than its estimate;
+        later requests then wait until the excess has been paid back.
+        """
+        if not self.token_rate or actual_tokens is None:
+            return
+        with self.condition:
+            self.token_level = min(self.token_capacity,
+                                   self.token_level + estimated_tokens - actual_tokens)
+            self.condition.notify_all()
+
+    def penalize(self, seconds):
+        """Stop sending for `seconds` (after a 429)"""
+        with self.condition:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.request_level = min(self.request_level, 0.0)
+
+    def update_from_headers(self, headers):
+        """Learn limits and remaining quota from rate-limit response headers"""
+        with self.condition:
+            now = time.monotonic()
+            self._refill(now)
+            
+            # OpenAI: per-minute request and token limits
+            request_limit = headers.get('x-ratelimit-limit-requests')
+            token_limit = headers.get('x-ratelimit-limit-tokens')
+            if request_limit or token_limit:
+                try:
+                    self._configure(float(request_limit or self.requests_per_minute),
+                                    float(token_limit) if token_limit else self.tokens_per_minute)
+                except ValueError:
+                    pass
+                for kind in ('requests', 'tokens'):
+                    remaining = headers.get(f'x-ratelimit-remaining-{kind}')
+                    if remaining is None:
+                        continue
+                    try:
+                        remaining = float(remaining)
+                    except ValueError:
+                        continue
+                    if kind == 'requests':
+                        self.request_level = min(self.request_level, remaining)
+                    else:
+                        self.token_level = min(self.token_level, remaining)
+                    if remaining <= 0:
+                        reset = parse_duration(headers.get(f'x-ratelimit-reset-{kind}'))
+                        self.blocked_until = max(self.blocked_until, now + reset)
+            
+            # JIRA Cloud: X-RateLimit-FillRate tokens every X-RateLimit-Interval-Seconds
+            fill_rate = headers.get('X-RateLimit-FillRate')
+            interval = headers.get('X-RateLimit-Interval-Seconds')
+            if fill_rate and interval:
+                try:
+                    self._configure(float(fill_rate) * 60.0 / float(interval), self.tokens_per_minute)
+                except (ValueError, ZeroDivisionError):
+                    pass
+            remaining = headers.get('X-RateLimit-Remaining')
+            if remaining is not None:
+                try:
+                    self.request_level = min(self.request_level, float(remaining))
+                except ValueError:
+                    pass
+            
+            self.condition.notify_all()
+
+    def stats(self):
+        """Current limits and bucket levels"""
+        with self.condition:
+            self._refill(time.monotonic())
+            return {
+                'requests_per_minute': self.requests_per_minute,
+                'tokens_per_minute': self.tokens_per_minute,
+                'request_level': round(self.request_level, 2),
+                'token_level': None if not self.token_rate else round(self.token_level)
+            }
+
+
+_http_call_state = threading.local()  # The HttpCallScope of the call running on this thread
+
+
+class HttpCallScope:
+    """Connections used by one cancellable call, so cancelling can cut them off mid-request
+
+    abort() shuts down the sockets of requests still waiting for their response,
+    and of streamed responses whose body is being read (see reading()): the
+    blocked call fails at once instead of running (and, for OpenAI, being
+    billed) to the end, and HttpClient neither retries it nor sends new
+    requests in the scope.
+    """
+
+    def __init__(self):
+        self.connections = set()
+        self.aborted = False
+        self._lock = threading.Lock()
+
+    def add(self, connection):
+        with self._lock:
+            self.connections.add(connection)
+            aborted = self.aborted
+        if aborted:
+            self._shutdown(connection)
+
+    def discard(self, connection):
+        with self._lock:
+            self.connections.discard(connection)
+
+    @staticmethod
+    @contextmanager
+    def reading(response):
+        """Register a streamed response's connection with the thread's scope while its body is read"""
+        scope = getattr(_http_call_state, 'scope', None)
+        connection = getattr(getattr(response, 'raw', None), 'connection', None)
+        if scope is None or connection is None:
+            yield
+            return
+        scope.add(connection)
+        try:
+            yield
+        finally:
+            scope.discard(connection)
+
+    def abort(self):
+        with self._lock:
+            self.aborted = True
+            connections = list(self.connections)
+        for connection in connections:
+            self._shutdown(connection)
+
+    @staticmethod
+    def _shutdown(connection):
+        import socket
+        sock = getattr(connection, 'sock', None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def _tracked_pool_classes():
+    """urllib3 pool classes whose connections join the HttpCallScope of the calling thread"""
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class TrackedConnection:
+        def getresponse(self, *args, **kwargs):
+            """Wait for the response while registered with the thread's HttpCallScope"""
+            scope = getattr(_http_call_state, 'scope', None)
+            if scope is None:
+                return super().getresponse(*args, **kwargs)
+            scope.add(self)
+            try:
+                return super().getresponse(*args, **kwargs)
+            finally:
+                scope.discard(self)
+
+    class TrackedHTTPConnection(TrackedConnection, HTTPConnection):
+        pass
+
+    class TrackedHTTPSConnection(TrackedConnection, HTTPSConnection):
+        pass
+
+    class TrackedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = TrackedHTTPConnection
+
+    class TrackedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = TrackedHTTPSConnection
+
+    return {'http': TrackedHTTPConnectionPool, 'https': TrackedHTTPSConnectionPool}
+
+
+class HttpClient:
+    """Shared HTTP layer for JIRA, OpenAI and asset downloads
+    
+    One requests.Session keeps keep-alive connection pools per host, so repeated
+    calls skip the TCP/TLS handshake. 5xx responses and connection errors are
+    retried with jittered exponential backoff; 429 responses honour Retry-After.
+    Timeouts are configured per endpoint name ('jira', 'openai', ...), and an
+    endpoint can have a RateLimiter that every attempt must pass first.
+    """
+
+    RETRY_STATUSES = {500, 502, 503, 504}
+
+    def __init__(self, timeouts, max_retries=3, backoff_base=0.5, backoff_max=30.0,
+                 retry_after_max=60.0, pool_size=10, limiters=None):
+        self.timeouts = timeouts
+        self.limiters = limiters or {}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The pooled requests.Session, created on first use"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                    adapter.poolmanager.pool_classes_by_scheme = _tracked_pool_classes()
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+
+    def backoff_delay(self, attempt):
+        """Full-jitter exponential backoff for the given retry attempt (0-based)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def retry_after(response):
+        """Seconds from a Retry-After header (delta-seconds or HTTP date), or None"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+        try:
+            from email.utils import parsedate_to_datetime
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def is_quota_exhausted(response):
+        """True for OpenAI 429s caused by an exhausted quota (retrying cannot help)"""
+        try:
+            return response.json().get('error', {}).get('code') == 'insufficient_quota'
+        except ValueError:
+            return False
+
+    def request(self, method, url, endpoint='default', rate_tokens=0, **kwargs):
+        """Send a request with the endpoint's timeout, retrying transient failures
+        
+        rate_tokens is the estimated token cost charged to the endpoint's rate limiter.
+        """
+        kwargs.setdefault('timeout', self.timeouts.get(endpoint, self.timeouts.get('default', 30)))
+        limiter = self.limiters.get(endpoint)
+        scope = getattr(_http_call_state, 'scope', None)
+        
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            if limiter:
+                limiter.acquire(rate_tokens)
+            if scope is not None and scope.aborted:
+                raise requests.exceptions.ConnectionError(f"{method} {url} cancelled")
+            try:
+                response = self.session.request(method, url, **kwargs)
+                if limiter:
+                    limiter.update_from_headers(response.headers)
+            except requests.exceptions.ConnectionError:
+                # Connection refused/reset or connect timeout (or cut off by HttpCallScope.abort)
+                if last_attempt or (scope is not None and scope.aborted):
+                    raise
+                delay = self.backoff_delay(attempt)
+            else:
+                if last_attempt:
+                    return response
+                if response.status_code == 429:
+                    if self.is_quota_exhausted(response):
+                        return response
+                    delay = self.retry_after(response)
+                    if delay is None:
+                        delay = self.backoff_delay(attempt)
+                    elif delay > self.retry_after_max:
+                        return response
+                    if limiter:
+                        limiter.penalize(delay)
+                elif response.status_code in self.RETRY_STATUSES:
+                    delay = self.retry_after(response)
+                    if delay is None or delay > self.retry_after_max:
+                        delay = self.backoff_delay(attempt)
+                else:
+                    return response
+                response.close()
+            
+            if scope is not None and scope.aborted:
+                raise requests.exceptions.ConnectionError(f"{method} {url} cancelled")
+            print(f"Retrying {method} {url} in {delay:.1f}s (attempt {attempt + 2}/{self.max_retries + 1})")
+            time.sleep(delay)
+
+    def get(self, url, endpoint='default', **kwargs):
+        return self.request('GET', url, endpoint, **kwargs)
+
+    def post(self, url, endpoint='default', **kwargs):
+        return self.request('POST', url, endpoint, **kwargs)
+
+    def limiter_stats(self):
+        """Rate limiter state per endpoint"""
+        return {endpoint: limiter.stats() for endpoint, limiter in self.limiters.items()}
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+
+class IssueCache:
+    """Local cache of JIRA issue payloads, revalidated by ETag or `updated` timestamp"""
+
+    def __init__(self, cache_dir, ttl_seconds):
+        self.cache_dir = Path(cache_dir) / "issues"
+        self.ttl_seconds = ttl_seconds
+        self.records = {}
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.lock = threading.Lock()
+
+    def _record_file(self, key):
+        safe_key = re.sub(r'[^A-Za-z0-9_.-]', '_', key)
+        return self.cache_dir / f"{safe_key}.json"
+
+    def get(self, key, fields=None):
+        """Return the cached record for an issue ({'payload', 'updated', 'etag', 'fetched_at', 'fields'}) or None
+        
+        A record downloaded with a different field list (`fields=` parameter) counts as missing.
+        """
+        with self.lock:
+            record = self.records.get(key)
+        if record is None:
+            try:
+                with open(self._record_file(key), 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+            except (OSError, ValueError):
+                return None
+            with self.lock:
+                self.records[key] = record
+        return record if record.get('fields') == fields else None
+
+    def is_fresh(self, record):
+        """True while a record is inside the freshness window and can be served without asking JIRA"""
+        return time.time() - record.get('fetched_at', 0) < self.ttl_seconds
+
+    def put(self, key, payload, etag=None, fields=None):
+        """Store a freshly downloaded issue payload (fields: the field list it was requested with)"""
+        record = {
+            'payload': payload,
+            'updated': payload.get('fields', {}).get('updated'),
+            'etag': etag,
+            'fetched_at': time.time(),
+            'fields': fields
+        }
+        self._write(key, record)
+        return record
+
+    def touch(self, key, record):
+        """Mark a record as just revalidated"""
+        record = dict(record, fetched_at=time.time())
+        self._write(key, record)
+        return record
+
+    def _write(self, key, record):
+        with self.lock:
+            self.records[key] = record
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            record_file = self._record_file(key)
+            tmp_file = record_file.with_suffix(f'.{threading.get_ident()}.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(record, f)
+            os.replace(tmp_file, record_file)
+        except OSError as e:
+            print(f"Could not save JIRA issue cache: {e}")
+
+    def count(self, hit, revalidated=False):
+        """Update the hit/miss counters"""
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            if revalidated:
+                self.revalidations += 1
+
+    def invalidate(self, key=None):
+        """Drop one issue (or every issue) from the cache"""
+        with self.lock:
+            keys = [key] if key else list(self.records)
+            for k in keys:
+                self.records.pop(k, None)
+        files = [self._record_file(key)] if key else list(self.cache_dir.glob('*.json'))
+        for record_file in files:
+            try:
+                record_file.unlink()
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        """Return hit/miss/revalidation counters"""
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'revalidations': self.revalidations,
+                'cached_issues': len(self.records)
+            }
+
+
+class ResponseCache:
+    """Disk-backed LLM response cache keyed by a hash of the full request payload
+    
+    Entries are evicted least-recently-used first once the cache exceeds max_bytes,
+    and entries older than max_age_seconds are discarded. A file's mtime records
+    its last use.
+    """
+
+    def __init__(self, cache_dir, max_bytes, max_age_seconds):
+        self.cache_dir = Path(cache_dir) / "llm"
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key_for(api_url, payload):
+        """Content address of a request: sha256 of the endpoint and canonical JSON payload"""
+        canonical = json.dumps({'url': api_url, 'payload': payload}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached entry for a key, or None (expired entries count as misses)"""
+        entry_file = self.cache_dir / f"{key}.json"
+        try:
+            with open(entry_file, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if time.time() - entry.get('created', 0) > self.max_age_seconds:
+                entry_file.unlink()
+                entry = None
+            else:
+                os.utime(entry_file)  # Mark as recently used
+        except (OSError, ValueError):
+            entry = None
+        
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def put(self, key, content, usage=None):
+        """Store a response and evict old entries if the cache grew too large"""
+        entry = {'created': time.time(), 'content': content, 'usage': usage or {}}
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            entry_file = self.cache_dir / f"{key}.json"
+            tmp_file = entry_file.with_suffix(f'.{threading.get_ident()}.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_file, entry_file)
+            self.evict()
+        except OSError as e:
+            print(f"Could not save LLM response cache: {e}")
+
+    def evict(self):
+        """Remove expired entries, then least recently used ones until under max_bytes"""
+        with self.lock:
+            entries = []
+            now = time.time()
+            for entry_file in self.cache_dir.glob('*.json'):
+                try:
+                    stat = entry_file.stat()
+                except OSError:
+                    continue
+                if now - stat.st_mtime > self.max_age_seconds:
+                    entry_file.unlink(missing_ok=True)
+                else:
+                    entries.append((stat.st_mtime, stat.st_size, entry_file))
+            
+            total_bytes = sum(size for _, size, _ in entries)
+            for _, size, entry_file in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                entry_file.unlink(missing_ok=True)
+                total_bytes -= size
+
+    def clear(self):
+        """Delete every cached response"""
+        with self.lock:
+            for entry_file in self.cache_dir.glob('*.json'):
+                entry_file.unlink(missing_ok=True)
+
+    def stats(self):
+        """Return hit/miss counters"""
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+class Telemetry:
+    """Per-analysis timing spans, exported as JSONL and a Prometheus text file
+    
+    An analysis opens a trace on its worker thread; span() blocks on that thread
+    add their duration to it (spans may nest, e.g. adf inside fetch). Finished
+    traces are appended to telemetry/spans.jsonl, and telemetry/metrics.prom is
+    rewritten with p50/p95 per stage over the last `window` analyses, ready for
+    a textfile collector. Without an open trace span() only runs the block.
+    """
+
+    QUANTILES = (0.5, 0.95)
+    TAIL_BYTES = 4 * 1024 * 1024  # Read at most this much of spans.jsonl to seed the window
+
+    def __init__(self, cache_dir, enabled=True, window=1000, max_bytes=10 * 1024 * 1024):
+        self.directory = Path(cache_dir) / "telemetry"
+        self.spans_file = self.directory / "spans.jsonl"
+        self.metrics_file = self.directory / "metrics.prom"
+        self.enabled = enabled
+        self.window = window
+        self.max_bytes = max_bytes
+        self.history = None  # Recent finished traces, loaded from spans_file on first use
+        self.lock = threading.Lock()
+        self._local = threading.local()
+
+    def start(self, issue_key):
+        """Open a trace for one analysis on the calling thread and return it (None if disabled)"""
+        if not self.enabled:
+            return None
+        trace = {'id': os.urandom(8).hex(), 'issue': issue_key, 'started': round(time.time(), 3),
+                 'spans': [], '_t0': time.perf_counter()}
+        self._local.trace = trace
+        return trace
+
+    def current(self):
+        """The trace open on the calling thread, if any"""
+        return getattr(self._local, 'trace', None)
+
+    @contextmanager
+    def span(self, stage, trace=None, **attrs):
+        """Time the with-block as a span of `stage`; attributes can be added to the yielded dict"""
+        started = time.perf_counter()
+        try:
+            yield attrs
+        except BaseException as e:
+            attrs.setdefault('error', type(e).__name__)
+            raise
+        finally:
+            self.add_span(stage, started, trace, **attrs)
+
+    def add_span(self, stage, started, trace=None, **attrs):
+        """Record a span of `stage` that began at perf_counter() value `started` and ends now"""
+        trace = trace or self.current()
+        if trace is None:
+            return
+        record = {'stage': stage, 'offset': round(started - trace['_t0'], 4),
+                  'seconds': round(time.perf_counter() - started, 4)}
+        record.update(attrs)
+        with self.lock:
+            trace['spans'].append(record)
+
+    def finish(self, trace, status='ok'):
+        """Close a trace, append it to the JSONL log and rewrite the Prometheus file"""
+        if trace is None:
+            return None
+        if self.current() is trace:
+            self._local.trace = None
+        with self.lock:
+            record = {key: value for key, value in trace.items() if key != '_t0'}
+            record['seconds'] = round(time.perf_counter() - trace['_t0'], 4)
+            record['status'] = status
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._load_history()
+                if self.spans_file.exists() and self.spans_file.stat().st_size > self.max_bytes:
+                    os.replace(self.spans_file, self.spans_file.with_suffix('.jsonl.1'))
+                with open(self.spans_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self.history.append(record)
+                self._write_metrics()
+            except OSError as e:
+                print(f"Could not write telemetry: {e}")
+        return record
+
+    def _load_history(self):
+        """Seed the window from the tail of spans.jsonl so quantiles survive restarts"""
+        if self.history is not None:
+            return
+        self.history = deque(maxlen=self.window)
+        try:
+            with open(self.spans_file, 'rb') as f:
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(0, size - self.TAIL_BYTES))
+                lines = f.read().splitlines()
+        except OSError:
+            return
+        if size > self.TAIL_BYTES:
+            lines = lines[1:]  # Starts mid-record
+        for line in lines[-self.window:]:
+            try:
+                self.history.append(json.loads(line))
+            except ValueError:
+                continue
+
+    @staticmethod
+    def quantile(values, q):
+        """Nearest-rank quantile of a non-empty list"""
+        ordered = sorted(values)
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+    def summary(self):
+        """Per-stage count, sum, p50 and p95 plus LLM token and cache counts over the window"""
+        with self.lock:
+            self._load_history()
+            return self._summarize(list(self.history))
+
+    def _summarize(self, records):
+        stage_seconds = {}
+        tokens = Counter()
+        llm_calls = Counter()
+        analyses = Counter()
+        for record in records:
+            analyses[record.get('status', 'ok')] += 1
+            totals = Counter({'total': record.get('seconds', 0)})
+            for span in record.get('spans', []):
+                totals[span['stage']] += span['seconds']
+                if span['stage'] == 'llm':
+                    llm_calls[span.get('cache', 'miss')] += 1
+                    if span.get('cache') != 'hit':  # Cache hits cost no tokens
+                        usage = span.get('usage') or {}
+                        tokens['prompt'] += usage.get('prompt_tokens') or 0
+                        tokens['completion'] += usage.get('completion_tokens') or 0
+            for stage, seconds in totals.items():
+                stage_seconds.setdefault(stage, []).append(round(seconds, 4))
+        
+        stages = {}
+        for stage, values in stage_seconds.items():
+            stages[stage] = {'count': len(values), 'sum': round(sum(values), 4)}
+            for q in self.QUANTILES:
+                stages[stage][f"p{round(q * 100)}"] = self.quantile(values, q)
+        return {'analyses': dict(analyses), 'stages': stages,
+                'llm_calls': dict(llm_calls), 'llm_tokens': dict(tokens)}
+
+    def _write_metrics(self):
+        """Rewrite metrics.prom (Prometheus text format) from the current window"""
+        summary = self._summarize(list(self.history))
+        lines = [
+            f"# HELP jira_analyzer_stage_seconds Seconds per analysis stage over the last {self.window} analyses",
+            "# TYPE jira_analyzer_stage_seconds summary"
+        ]
+        for stage, stats in sorted(summary['stages'].items()):
+            for q in self.QUANTILES:
+                lines.append(f'jira_analyzer_stage_seconds{{stage="{stage}",quantile="{q}"}} '
+                             f'{stats[f"p{round(q * 100)}"]}')
+            lines.append(f'jira_analyzer_stage_seconds_sum{{stage="{stage}"}} {stats["sum"]}')
+            lines.append(f'jira_analyzer_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        for name, label, help_text, values in (
+                ('analyses', 'status', "Analyses in the window by outcome", summary['analyses']),
+                ('llm_calls', 'cache', "LLM calls in the window by response cache status", summary['llm_calls']),
+                ('llm_tokens', 'type', "Billed LLM tokens in the window (cache hits excluded)",
+                 summary['llm_tokens'])):
+            lines.append(f"# HELP jira_analyzer_{name} {help_text}")
+            lines.append(f"# TYPE jira_analyzer_{name} gauge")
+            for value_label, value in sorted(values.items()):
+                lines.append(f'jira_analyzer_{name}{{{label}="{value_label}"}} {value}')
+        
+        tmp_file = self.metrics_file.with_suffix(f'.{threading.get_ident()}.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_file, self.metrics_file)
+
+
+def walk_workspace(root, extensions, ignore_dirs):
+    """Walk the workspace once and group source files by extension
+    
+    Uses an explicit os.scandir stack so ignored directories (node_modules, .git,
+    build output, ...) are pruned before they are entered. Returns a dict mapping
+    each extension to a list of (path, os.stat_result) tuples in a stable order.
+    """
+    extensions = tuple(extensions)
+    ignore_dirs = set(ignore_dirs)
+    files_by_ext = {ext: [] for ext in extensions}
+    stack = [str(root)]
+    
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in ignore_dirs:
+                        subdirs.append(entry.path)
+                    continue
+                ext = os.path.splitext(entry.name)[1]
+                if ext in files_by_ext and entry.is_file():
+                    files_by_ext[ext].append((entry.path, entry.stat()))
+            except OSError:
+                continue
+        
+        # Push in reverse so directories are visited in sorted order
+        stack.extend(reversed(subdirs))
+    
+    return files_by_ext
+
+
+GIT_EMPTY_TREE = '4b825dc642cb6eb9a060e54bf8d69288fbee4904'  # Diff base covering every file
+
+
+def run_git(root, *args, timeout=30):
+    """Run a git command in root and return its stdout bytes (None if git fails or is missing)"""
+    try:
+        completed = subprocess.run(['git', '-C', str(root), *args], capture_output=True, timeout=timeout)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return completed.stdout if completed.returncode == 0 else None
+
+
+def git_source_files(root, extensions, ignore_dirs, untracked=True):
+    """List source files from the git index instead of walking the tree
+    
+    Returns the same {extension: [(path, stat), ...]} shape as walk_workspace(),
+    except that stat is None (files are stat'ed only when a scan reaches them).
+    Extensions are filtered by git pathspecs. Untracked files honor .gitignore,
+    .git/info/exclude and the global excludes file; listing them makes git check
+    the directories for new files, while the tracked list alone is read straight
+    from the index. Returns None when root is not inside a git work tree.
+    """
+    others = ('--others', '--exclude-standard') if untracked else ()
+    output = run_git(root, 'ls-files', '-z', '--cached', *others, '--', *(f"*{ext}" for ext in extensions))
+    if output is None:
+        return None
+    
+    listing = os.fsdecode(output)
+    ignore_dirs = set(ignore_dirs)
+    # Ignored directories are rare among tracked files (committed build output, vendored
+    # node_modules, ...): only check each path when one shows up in the listing at all
+    check_ignored = any(f"{name}/" in listing for name in ignore_dirs)
+    
+    files_by_ext = {ext: [] for ext in extensions}
+    prefix = os.path.join(str(root), '')
+    for rel_path in sorted(dict.fromkeys(listing.split('\0'))):
+        bucket = files_by_ext.get(rel_path[rel_path.rfind('.'):])
+        if bucket is None:
+            continue
+        # git always lists paths with '/'
+        if check_ignored and not ignore_dirs.isdisjoint(rel_path.split('/')[:-1]):
+            continue
+        bucket.append((prefix + rel_path.replace('/', os.sep), None))
+    return files_by_ext
+
+
+def git_changed_files(root, since=None, recent_commits=0):
+    """Paths (relative to root) changed since a ref or in the last N commits, plus untracked files
+    
+    Uncommitted changes count as changed. Returns None if the ref cannot be resolved.
+    """
+    if recent_commits:
+        since = f"HEAD~{recent_commits}"
+        if run_git(root, 'rev-parse', '--verify', '-q', f"{since}^{{commit}}") is None:
+            since = GIT_EMPTY_TREE  # Fewer commits than requested: the whole history counts
+    changed = run_git(root, 'diff', '--name-only', '-z', '--relative', '--no-renames', since, '--')
+    untracked = run_git(root, 'ls-files', '-z', '--others', '--exclude-standard')
+    if changed is None or untracked is None:
+        return None
+    return set(path for path in os.fsdecode(changed + b'\0' + untracked).split('\0') if path)
+
+
+class WorkspaceWatcher:
+    """Watch workspace roots with inotify (Linux) and report debounced source file changes
+
+    A daemon thread adds a watch to every directory under the roots (pruning
+    ignore_dirs), then collects create, modify, delete and rename events for
+    files with one of the extensions. Once no event has arrived for `debounce`
+    seconds (or a burst such as a branch switch has gone on for 10x that), it
+    calls on_changes(changed, removed, rescan): changed and removed are sets of
+    absolute paths, removed directories end with os.sep. rescan means events
+    were lost (kernel queue overflow, a directory that could not be watched),
+    so nothing the caller keeps in memory can be trusted any more.
+    """
+
+    IN_MODIFY = 0x2
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ONLYDIR = 0x1000000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_ONLYDIR
+    EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len (then len bytes of NUL-padded name)
+
+    def __init__(self, roots, extensions, ignore_dirs, on_changes, debounce=0.5):
+        self.roots = [str(root) for root in roots]
+        self.extensions = tuple(extensions)
+        self.ignore_dirs = set(ignore_dirs)
+        self.on_changes = on_changes
+        self.debounce = debounce
+        self.ready = threading.Event()  # Set once every directory is watched
+        self.error = None
+        self._stop = threading.Event()
+        self._fd = None
+        self._libc = None
+        self._watches = {}  # Watch descriptor -> directory
+        self._thread = None
+
+    @property
+    def running(self):
+        """True while the watcher thread is up and has not failed"""
+        return self._thread is not None and self._thread.is_alive() and self.error is None
+
+    def start(self):
+        """Start watching on a background thread; returns False where inotify is unavailable"""
+        if not sys.platform.startswith('linux'):
+            self.error = "inotify is only available on Linux"
+            return False
+        import ctypes
+        import ctypes.util
+        try:
+            self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        except (OSError, AttributeError) as e:
+            self.error = f"inotify unavailable: {e}"
+            return False
+        if fd < 0:
+            self.error = f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}"
+            return False
+        self._fd = fd
+        self._thread = threading.Thread(target=self._run, name='workspace-watcher', daemon=True)
+        self._thread.start()
+        return True
+
+    def wait_ready(self, timeout=None):
+        """Wait until every directory is watched; False if the watcher failed or timed out first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.ready.wait(0.1):
+            if not self.running or (deadline is not None and time.monotonic() >= deadline):
+                return False
+        return True
+
+    def stop(self):
+        """Stop the watcher thread and wait for it to close the inotify descriptor"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def _add_tree(self, directory, found=None):
+        """Watch directory and every directory below it; new source files go into found"""
+        import ctypes
+        stack = [directory]
+        while stack and not self._stop.is_set():
+            current = stack.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(current), self.WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                if errno == 28:  # ENOSPC: fs.inotify.max_user_watches reached
+                    raise OSError(errno, "inotify watch limit reached (raise fs.inotify.max_user_watches)")
+                continue  # Vanished or unreadable directory
+            self._watches[wd] = current
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in self.ignore_dirs:
+                                stack.append(entry.path)
+                        elif found is not None and entry.name.endswith(self.extensions):
+                            found.add(entry.path)
+            except OSError:
+                continue
+
+    def _run(self):
+        import select
+        changed, removed = set(), set()
+        rescan = False
+        first_event = last_event = None
+        try:
+            for root in self.roots:
+                self._add_tree(root)
+            if not self._stop.is_set():
+                self.ready.set()
+            while not self._stop.is_set():
+                readable, _, _ = select.select([self._fd], [], [], min(self.debounce, 0.5))
+                now = time.monotonic()
+                if readable:
+                    rescan |= self._read_events(changed, removed)
+                    first_event = first_event or now
+                    last_event = now
+                if first_event is not None and (now - last_event >= self.debounce
+                                                or now - first_event >= self.debounce * 10):
+                    try:
+                        self.on_changes(changed, removed, rescan)
+                    except Exception as e:
+                        print(f"Applying workspace changes failed: {e}")
+                    changed, removed = set(), set()
+                    rescan = False
+                    first_event = last_event = None
+        except OSError as e:
+            self.error = str(e)
+            print(f"Workspace watcher stopped: {e}")
+            try:
+                self.on_changes(set(), set(), True)
+            except Exception:
+                pass
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def _read_events(self, changed, removed):
+        """Drain pending events into changed/removed; returns True if events were lost"""
+        lost = False
+        try:
+            data = os.read(self._fd, 256 * 1024)
+        except BlockingIOError:
+            return False
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = self.EVENT_HEADER.unpack_from(data, offset)
+            offset += self.EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                lost = True
+                continue
+            if mask & self.IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & self.IN_ISDIR:
+                if name in self.ignore_dirs:
+                    continue
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    # Files may land in a new directory before its watch exists: list them now
+                    found = set()
+                    self._add_tree(path, found)
+                    changed |= found
+                    removed -= found
+                elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                    removed.add(os.path.join(path, ''))
+            elif name.endswith(self.extensions):
+                if mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                    removed.add(path)
+                    changed.discard(path)
+                else:
+                    changed.add(path)
+                    removed.discard(path)
+        return lost
+
+
+STACK_FRAME_PATTERNS = (
+    # Java:   at com.example.OrderService.computeTotal(OrderService.java:42)
+    re.compile(r'\bat\s+(?P<symbol>[\w$.<>]+)\((?P<file>[\w$-]+\.java):(?P<line>\d+)\)'),
+    # Python: File "/srv/app/orders/service.py", line 42, in compute_total
+    re.compile(r'File "(?P<file>[^"]+)", line (?P<line>\d+)(?:, in (?P<symbol>[\w<>.]+))?'),
+    # C/C++, JS/TS and plain references: src/engine/parser.cpp:123, parser.cpp:123:7 or C:\src\parser.cpp:123.
+    # A path starts at the beginning of a line or after whitespace/punctuation (a drive letter only
+    # there), so URLs such as http://host:8080/static/app.js:10 yield no frame.
+    re.compile(r'(?<![\w.:/\\-])(?P<file>(?:[A-Za-z]:[\\/])?[\w./\\-]*?[\w-]+\.'
+               r'(?:c|cc|cpp|cxx|h|hh|hpp|js|jsx|ts|tsx|mjs|py|java)):(?P<line>\d+)\b'),
+)
+
+
+def parse_stack_frames(text, limit=None):
+    """Extract (file, line) references from stack traces and log excerpts in text
+    
+    Returns [{'file', 'line', 'symbol'}, ...] in order of appearance, one per
+    distinct file name and line. For Java frames 'file' is the package path
+    derived from the class (com/example/OrderService.java), which narrows the
+    lookup when several files share a name.
+    """
+    matches = []
+    for pattern in STACK_FRAME_PATTERNS:
+        for match in pattern.finditer(text or ''):
+            groups = match.groupdict()
+            file_hint = groups['file'].replace('\\', '/')
+            symbol = groups.get('symbol')
+            if pattern is STACK_FRAME_PATTERNS[0] and symbol and '.' in symbol:
+                class_name = symbol.rsplit('.', 1)[0].split('$')[0]
+                if '.' in class_name:
+                    file_hint = f"{class_name.rsplit('.', 1)[0].replace('.', '/')}/{file_hint}"
+            matches.append((match.start(), file_hint, int(groups['line']), symbol))
+    matches.sort(key=lambda item: item[0])
+    
+    frames = []
+    seen = set()
+    for _, file_hint, line, symbol in matches:
+        key = (os.path.basename(file_hint).lower(), line)
+        if key in seen or line <= 0:
+            continue
+        seen.add(key)
+        frames.append({'file': file_hint, 'line': line, 'symbol': symbol})
+        if limit is not None and len(frames) >= limit:
+            break
+    return frames
+
+
+class SourceLocator:
+    """Maps file names from stack traces to workspace paths with one dict lookup"""
+
+    def __init__(self, paths):
+        self.by_name = {}
+        for path in paths:
+            self.by_name.setdefault(os.path.basename(path).lower(), []).append(path)
+
+    def resolve(self, file_hint):
+        """Return the workspace-relative path best matching file_hint, or None
+        
+        Among files with the same name, the one sharing the longest trailing run
+        of directories with the hint wins (shortest path on a tie), so absolute
+        paths from another machine still resolve.
+        """
+        parts = [part for part in re.split(r'[\\/]+', file_hint) if part and part != '.']
+        if not parts:
+            return None
+        candidates = self.by_name.get(parts[-1].lower())
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+        
+        def shared_suffix(path):
+            shared = 0
+            for candidate_part, hint_part in zip(reversed(re.split(r'[\\/]+', path)), reversed(parts)):
+                if candidate_part != hint_part:
+                    break
+                shared += 1
+            return shared
+        return max(candidates, key=lambda path: (shared_suffix(path), -len(path)))
+
+
+def read_source_file(file_path, max_lines, max_bytes, max_line_length=5000):
+    """Read at most max_lines / max_bytes of a source file
+    
+    Only the first max_bytes are ever read, so a huge generated file costs no more
+    memory than a small one. Returns (content, line_count), or None for files that
+    look binary (NUL bytes) or minified (very long lines).
+    """
+    if file_path.endswith(('.min.js', '.min.ts', '.bundle.js')):
+        return None
+    
+    with open(file_path, 'rb') as f:
+        data = f.read(max_bytes + 1)
+    
+    if b'\0' in data[:8192]:
+        return None
+    
+    truncated = len(data) > max_bytes
+    if truncated:
+        # Cut back to the last complete line
+        data = data[:max_bytes]
+        cut = data.rfind(b'\n')
+        data = data[:cut + 1] if cut >= 0 else data
+    
+    lines = data.decode('utf-8', errors='ignore').splitlines(keepends=True)[:max_lines]
+    if any(len(line) > max_line_length for line in lines):
+        return None
+    
+    return ''.join(lines), len(lines)
+
+
+class AnalysisCancelled(Exception):
+    """Raised inside the analysis worker when the user cancels the running analysis"""
+
+
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z][A-Za-z0-9_]+')
+SUBWORD_PATTERN = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+')
+STOP_TOKENS = frozenset("""
+    a an and are as at be but by for from has have if in into is it its not of on or so
+    that the then this to was were when which while will with after before should does
+    def self cls return import include from class public private protected static final
+    void int long char bool boolean const let var new function true false null none std
+    string else elif for while try catch except finally throw throws raise package
+""".split())
+
+
+def tokenize_identifiers(text):
+    """Split text into lowercase identifier tokens plus their camelCase/snake_case parts"""
+    tokens = []
+    for identifier in IDENTIFIER_PATTERN.findall(text):
+        lower = identifier.lower()
+        if lower not in STOP_TOKENS:
+            tokens.append(lower)
+        parts = SUBWORD_PATTERN.findall(identifier)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts
+                          if len(part) > 1 and part.lower() not in STOP_TOKENS)
+    return tokens
+
+
+def file_terms(rel_path, content, path_weight=3):
+    """Term frequencies for a workspace file; path tokens count path_weight times"""
+    terms = {}
+    for token in tokenize_identifiers(content):
+        terms[token] = terms.get(token, 0) + 1
+    for token in tokenize_identifiers(rel_path.replace(os.sep, ' ').replace('.', ' ')):
+        terms[token] = terms.get(token, 0) + path_weight
+    return terms
+
+
+SYMBOL_LANGUAGES = {
+    '.py': 'python',
+    '.java': 'brace', '.c': 'cpp', '.cc': 'cpp', '.cpp': 'cpp', '.h': 'cpp',
+    '.js': 'brace', '.jsx': 'brace', '.ts': 'brace', '.tsx': 'brace'
+}
+MAX_SYMBOLS_PER_FILE = 500
+PY_SYMBOL_PATTERN = re.compile(r'^([ \t]*)(?:async[ \t]+)?(def|class)[ \t]+([A-Za-z_]\w*)')
+PY_TRIPLE_QUOTE = re.compile(r'"{3}|\'{3}')
+CLASS_HEADER_PATTERN = re.compile(r'\b(?:class|interface|enum(?:\s+class)?|struct|record)\s+([A-Za-z_$][\w$]*)')
+FUNCTION_HEADER_PATTERN = re.compile(
+    r'^(?P<prefix>.*?)(?P<name>[A-Za-z_$~][\w$:~]*)\s*\((?P<params>[^()]*(?:\([^()]*\)[^()]*)*)\)'
+    r'\s*[\w\s,.<>\[\]&*]*$', re.S)
+ARROW_HEADER_PATTERN = re.compile(
+    r'([A-Za-z_$][\w$]*)\s*[:=]\s*(?:async\s*)?(?:\([^()]*\)|[A-Za-z_$][\w$]*)\s*(?::[^=]*)?=>\s*$', re.S)
+# Text before a '{' that is a brace initializer inside a C++ constructor initializer list: ") : a_(a), b_{"
+INITIALIZER_BRACE_PATTERN = re.compile(r'\)\s*:(?!:)[^;]*[\w>]\s*$', re.S)
+ACCESS_LABEL_PATTERN = re.compile(r'^\s*(?:public|private|protected)(?:\s+(?:slots|signals))?\s*$')
+CONTROL_KEYWORDS = frozenset(
+    'if for while switch catch with return sizeof synchronized foreach using lock do else try async await'.split())
+
+
+def _python_symbols(lines):
+    """Functions and classes of Python source, using indentation for their extent"""
+    # Continuation lines of triple-quoted strings can neither start nor end a block
+    string_lines = set()
+    in_string = None
+    for number, line in enumerate(lines):
+        if in_string:
+            string_lines.add(number)
+        position = 0
+        while True:
+            if in_string:
+                found = line.find(in_string, position)
+                if found < 0:
+                    break
+                in_string = None
+                position = found + 3
+            else:
+                match = PY_TRIPLE_QUOTE.search(line, position)
+                if not match:
+                    break
+                in_string = match.group()
+                position = match.end()
+    
+    symbols = []
+    for number, line in enumerate(lines):
+        if number in string_lines:
+            continue
+        match = PY_SYMBOL_PATTERN.match(line)
+        if not match:
+            continue
+        indent = len(match.group(1).expandtabs())
+        
+        # The signature may span lines; the body starts once the brackets close
+        depth = 0
+        body_start = number
+        for body_start in range(number, len(lines)):
+            depth += sum(lines[body_start].count(c) for c in '([{') - sum(lines[body_start].count(c) for c in ')]}')
+            if depth <= 0:
+                break
+        
+        end = body_start
+        for candidate in range(body_start + 1, len(lines)):
+            text = lines[candidate]
+            stripped = text.strip()
+            if not stripped:
+                continue
+            if candidate not in string_lines and len(text.expandtabs()) - len(text.expandtabs().lstrip()) <= indent:
+                if not stripped.startswith('#'):
+                    break
+                continue
+            end = candidate
+        
+        start = number
+        while start > 0 and lines[start - 1].strip().startswith('@'):
+            start -= 1
+        symbols.append({
+            'name': match.group(3),
+            'kind': 'class' if match.group(2) == 'class' else 'function',
+            'start': start + 1,
+            'end': end + 1
+        })
+    return symbols
+
+
+def _classify_brace_header(header):
+    """Return (name, kind) when the text before a '{' declares a class or function"""
+    header = re.sub(r'\btemplate\s*<[^{;]*?>', ' ', header).strip()
+    if not header:
+        return None
+    
+    match = CLASS_HEADER_PATTERN.search(header)
+    if match and header[:match.start()].count('(') == header[:match.start()].count(')'):
+        return match.group(1), 'class'
+    
+    # Before the function pattern, which would take 'async' in "f = async (x): T => {" for the name
+    match = ARROW_HEADER_PATTERN.search(header)
+    if match and match.group(1) not in CONTROL_KEYWORDS:
+        return match.group(1), 'function'
+    
+    # Drop C++ constructor initializer lists and TS return type annotations
+    signature = re.sub(r'\)\s*:(?!:).*$', ')', header, flags=re.S)
+    match = FUNCTION_HEADER_PATTERN.match(signature)
+    if match:
+        prefix = match.group('prefix')
+        name = match.group('name')
+        if prefix.count('(') != prefix.count(')') or re.search(r'\bnew\s*$', prefix):
+            return None  # A call taking a callback or an anonymous class
+        if name == 'function':
+            assigned = re.search(r'([A-Za-z_$][\w$]*)\s*[:=]\s*(?:async\s+)?$', prefix)
+            if not assigned:
+                return None
+            name = assigned.group(1)
+        if name.split('::')[-1] in CONTROL_KEYWORDS or name in CONTROL_KEYWORDS:
+            return None
+        return name, 'function'
+    return None
+
+
+def _brace_symbols(lines, initializer_lists=False):
+    """Functions and classes of C-family/JS source, using brace matching for their extent
+    
+    Comments, string literals and preprocessor lines are skipped so braces inside
+    them do not count; with initializer_lists (C/C++) neither do the braces of
+    member initializers such as "b_{0}" before a constructor body. Each symbol
+    also gets the (line, column) of its braces as 'open' and 'close'.
+    """
+    symbols = []
+    stack = []  # One entry per open brace: the symbol it opened, or None for plain blocks
+    header = []
+    header_line = None
+    in_comment = False
+    initializer_depth = 0  # Open braces of a member initializer, kept in the header
+    
+    for number, line in enumerate(lines, 1):
+        if not in_comment and line.lstrip().startswith('#'):
+            continue
+        position = 0
+        length = len(line)
+        while position < length:
+            char = line[position]
+            if in_comment:
+                end = line.find('*/', position)
+                if end < 0:
+                    break
+                in_comment = False
+                position = end + 2
+                continue
+            if char == '/' and line.startswith('//', position):
+                break
+            if char == '/' and line.startswith('/*', position):
+                in_comment = True
+                position += 2
+                continue
+            if char in '"\'`':
+                # Skip the literal (a string left open runs to the end of the line)
+                position += 1
+                while position < length and line[position] != char:
+                    position += 2 if line[position] == '\\' else 1
+                position += 1
+                header.append(' "" ')
+                continue
+            if char == '{' and initializer_lists and (
+                    initializer_depth or INITIALIZER_BRACE_PATTERN.search(''.join(header))):
+                initializer_depth += 1
+                header.append(char)
+            elif char == '}' and initializer_depth:
+                initializer_depth -= 1
+                header.append(char)
+            elif char == '{':
+                text = ''.join(header)
+                declared = _classify_brace_header(text)
+                if declared:
+                    symbol = {'name': declared[0], 'kind': declared[1],
+                              'start': header_line or number, 'end': number, 'open': (number, position)}
+                    stack.append(symbol)
+                else:
+                    stack.append(None)
+                header = []
+                header_line = None
+            elif char == '}':
+                if stack:
+                    symbol = stack.pop()
+                    if symbol is not None:
+                        symbol['end'] = number
+                        symbol['close'] = (number, position)
+                        symbols.append(symbol)
+                header = []
+                header_line = None
+            elif char == ';':
+                header = []
+                header_line = None
+            else:
+                if header_line is None and not char.isspace():
+                    header_line = number
+                header.append(char)
+                if char == ':' and ACCESS_LABEL_PATTERN.match(''.join(header[:-1])):
+                    header = []
+                    header_line = None
+            position += 1
+        if header:
+            header.append('\n')
+    
+    # Declarations still open where the (possibly truncated) content ends
+    for symbol in stack:
+        if symbol is not None:
+            symbol['end'] = len(lines)
+            symbol['close'] = (len(lines) + 1, 0)
+            symbols.append(symbol)
+    
+    # Attach the doc comment directly above each declaration
+    for symbol in symbols:
+        start = symbol['start']
+        while start > 1 and start > symbol['start'] - 30 and \
+                lines[start - 2].strip().startswith(('//', '/*', '*')):
+            start -= 1
+        symbol['start'] = start
+    return symbols
+
+
+def chunk_source(rel_path, content):
+    """Split source code into functions, classes and methods
+    
+    Returns [{'name', 'kind', 'start', 'end'}, ...] sorted by position, with 1-based
+    inclusive line ranges; nested symbols get dotted names ('Class.method').
+    Unsupported languages return an empty list.
+    """
+    language = SYMBOL_LANGUAGES.get(os.path.splitext(rel_path)[1].lower())
+    if language is None or not content:
+        return []
+    lines = content.splitlines()
+    if language == 'python':
+        symbols = _python_symbols(lines)
+    else:
+        symbols = _brace_symbols(lines, initializer_lists=language == 'cpp')
+    
+    # Nesting by position of the opening and closing braces (lines for Python), so
+    # symbols that open on the same line still nest in the right order
+    for symbol in symbols:
+        symbol['open'] = symbol.get('open', (symbol['start'], 0))
+        symbol['close'] = symbol.get('close', (symbol['end'], 0))
+    symbols.sort(key=lambda s: (s['open'], -s['close'][0], -s['close'][1]))
+    parents = []
+    for symbol in symbols:
+        while parents and parents[-1]['close'] < symbol['open']:
+            parents.pop()
+        if parents and symbol['close'] <= parents[-1]['close']:
+            symbol['name'] = f"{parents[-1]['name']}.{symbol['name']}"
+        parents.append(symbol)
+    for symbol in symbols:
+        del symbol['open'], symbol['close']
+    return symbols[:MAX_SYMBOLS_PER_FILE]
+
+
+def index_source_file(task):
+    """Read, tokenize and chunk one file for the workspace index
+
+    task is (file_path, rel_path, max_lines, max_bytes). Returns (loaded, error)
+    where loaded is (content, line_count, terms, symbols) or None for binary or
+    minified files. Module-level so cold scans can run it in worker processes.
+    """
+    file_path, rel_path, max_lines, max_bytes = task
+    try:
+        loaded = read_source_file(file_path, max_lines, max_bytes)
+        if loaded is None:
+            return None, None
+        content, line_count = loaded
+        return (content, line_count, file_terms(rel_path, content), chunk_source(rel_path, content)), None
+    except Exception as e:
+        return None, str(e)
+
+
+_index_pool = None
+_index_pool_lock = threading.Lock()
+
+
+def get_index_pool(workers):
+    """Return the process pool shared by all cold scans, started on first use
+
+    Workers are spawned rather than forked: the parent runs HTTP and Tk threads
+    that must not be copied mid-operation into a child.
+    """
+    global _index_pool
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+    with _index_pool_lock:
+        if _index_pool is None or _index_pool[0] != workers:
+            if _index_pool is not None:
+                _index_pool[1].shutdown(wait=False, cancel_futures=True)
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _index_pool = (workers, pool)
+        return _index_pool[1]
+
+
+def reset_index_pool():
+    """Drop the shared process pool (after it broke); the next cold scan starts a new one"""
+    global _index_pool
+    with _index_pool_lock:
+        if _index_pool is not None:
+            _index_pool[1].shutdown(wait=False, cancel_futures=True)
+        _index_pool = None
+
+
+def select_symbol_chunks(content, symbols, query_tokens, max_tokens, counter, idf=None):
+    """Pick the functions/methods of a file that best match the query, whole
+    
+    Innermost symbols are scored by the IDF-weighted frequency of query tokens
+    in their body (name matches count double) and taken best-first while they
+    fit in max_tokens; if even the best one is too big, its head is used.
+    Returns the chunks in source order as [(symbol, text), ...].
+    """
+    if not symbols or not query_tokens:
+        return []
+    idf = idf or (lambda term: 1.0)
+    lines = content.splitlines(keepends=True)
+    ordered = sorted(symbols, key=lambda s: (s['start'], -s['end']))
+    leaves = [symbol for symbol, following in zip(ordered, ordered[1:] + [None])
+              if following is None or following['start'] > symbol['end']]
+    
+    scored = []
+    for symbol in leaves:
+        text = ''.join(lines[symbol['start'] - 1:symbol['end']])
+        frequencies = {}
+        for token in tokenize_identifiers(text):
+            frequencies[token] = frequencies.get(token, 0) + 1
+        name_tokens = set(tokenize_identifiers(symbol['name']))
+        score = 0.0
+        for token in query_tokens:
+            if token in frequencies:
+                score += idf(token) * (1 + math.log(frequencies[token]))
+            if token in name_tokens:
+                score += 2 * idf(token)
+        if score > 0:
+            scored.append((score, symbol, text))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    
+    chosen = []
+    used = 0
+    for score, symbol, text in scored:
+        if not text.endswith('\n'):
+            text += '\n'
+        marker = f"@@ lines {symbol['start']}-{symbol['end']}: {symbol['kind']} {symbol['name']} @@\n"
+        tokens = counter.count(marker) + counter.count(text)
+        if used + tokens <= max_tokens:
+            chosen.append((symbol, marker + text))
+            used += tokens
+        elif not chosen:
+            head, head_tokens, kept, _ = truncate_to_tokens(text, max_tokens - counter.count(marker) - 10,
+                                                                counter)
+            if kept:
+                marker = (f"@@ lines {symbol['start']}-{symbol['start'] + kept - 1} "
+                          f"(of {symbol['start']}-{symbol['end']}): {symbol['kind']} {symbol['name']} @@\n")
+                chosen.append((symbol, marker + head))
+                used += head_tokens + counter.count(marker)
+    chosen.sort(key=lambda item: item[0]['start'])
+    return chosen
+
+
+class SearchIndex:
+    """BM25 inverted index over workspace documents"""
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.doc_ids = []
+        self.doc_lengths = []
+        self.total_length = 0
+
+    def add_document(self, doc_id, terms):
+        """Add a document given as a {term: frequency} dict"""
+        doc_index = len(self.doc_ids)
+        self.doc_ids.append(doc_id)
+        length = sum(terms.values())
+        self.doc_lengths.append(length)
+        self.total_length += length
+        for term, tf in terms.items():
+            self.postings.setdefault(term, []).append((doc_index, tf))
+
+    def idf(self, term):
+        """BM25 inverse document frequency of a term (0.0 for unknown terms)"""
+        df = len(self.postings.get(term, ()))
+        if not df:
+            return 0.0
+        return math.log(1 + (len(self.doc_ids) - df + 0.5) / (df + 0.5))
+
+    def search(self, query_tokens, limit=None):
+        """Return [(doc_id, score), ...] for documents matching the query, best first"""
+        doc_count = len(self.doc_ids)
+        if not doc_count:
+            return []
+        avg_length = (self.total_length / doc_count) or 1
+        scores = {}
+        
+        for term in set(query_tokens):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc_index, tf in postings:
+                norm = tf + self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_index] / avg_length)
+                scores[doc_index] = scores.get(doc_index, 0.0) + idf * tf * (self.k1 + 1) / norm
+        
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(self.doc_ids[doc_index], score) for doc_index, score in ranked]
+
+
+class AnalysisHistory:
+    """Past analyses plus a TF-IDF index for spotting re-reported issues
+    
+    Records ({'key', 'summary', 'description', 'analysis', 'analyzed'}) are appended
+    to <cache_dir>/history/analyses.jsonl; a later record for a key replaces the
+    earlier one and the oldest issues are dropped beyond max_issues. similar() ranks
+    stored issues by cosine similarity of their tf-idf weighted summary (counted
+    twice) and description terms.
+    """
+
+    MAX_DESCRIPTION_CHARS = 20000  # Description text kept per issue
+
+    def __init__(self, cache_dir, max_issues):
+        self.history_file = Path(cache_dir) / "history" / "analyses.jsonl"
+        self.max_issues = max_issues
+        self.records = None  # key -> record, oldest first; loaded on first use
+        self.terms = {}  # key -> Counter of terms
+        self.postings = {}  # term -> set of keys
+        self.norms = None  # key -> vector length under the current idf, rebuilt after changes
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def issue_terms(summary, description):
+        """Term frequencies of an issue; the summary counts twice"""
+        return Counter(tokenize_identifiers(summary or '') * 2 + tokenize_identifiers(description or ''))
+
+    def _load(self):
+        if self.records is not None:
+            return
+        self.records = OrderedDict()
+        line_count = 0
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line_count += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.records.pop(record.get('key'), None)
+                    self.records[record.get('key')] = record
+        except OSError:
+            return
+        while len(self.records) > self.max_issues:
+            self.records.popitem(last=False)
+        for key, record in self.records.items():
+            self._index(key, record)
+        if line_count > 2 * len(self.records):
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the history file without replaced or dropped records"""
+        try:
+            tmp_file = self.history_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                for record in self.records.values():
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            os.replace(tmp_file, self.history_file)
+        except OSError as e:
+            print(f"Could not compact analysis history: {e}")
+
+    def _index(self, key, record):
+        terms = self.issue_terms(record.get('summary'), record.get('description'))
+        self.terms[key] = terms
+        for term in terms:
+            self.postings.setdefault(term, set()).add(key)
+        self.norms = None
+
+    def _unindex(self, key):
+        for term in self.terms.pop(key, ()):
+            keys = self.postings.get(term)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.postings[term]
+        self.norms = None
+
+    def _idf(self, term):
+        return math.log((len(self.terms) + 1) / (len(self.postings.get(term, ())) + 1)) + 1
+
+    def _weights(self, terms):
+        return {term: (1 + math.log(tf)) * self._idf(term) for term, tf in terms.items()}
+
+    def add(self, key, summary, description, analysis):
+        """Store (or replace) the analysis of an issue"""
+        record = {'key': key, 'summary': summary or '',
+                  'description': (description or '')[:self.MAX_DESCRIPTION_CHARS],
+                  'analysis': analysis, 'analyzed': time.strftime('%Y-%m-%d %H:%M')}
+        with self.lock:
+            self._load()
+            if key in self.records:
+                self._unindex(key)
+                del self.records[key]
+            self.records[key] = record
+            self._index(key, record)
+            while len(self.records) > self.max_issues:
+                old_key, _ = self.records.popitem(last=False)
+                self._unindex(old_key)
+            try:
+                self.history_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.history_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except OSError as e:
+                print(f"Could not save analysis history: {e}")
+
+    def similar(self, summary, description, exclude=None, limit=3):
+        """Return [(similarity, record), ...] of stored issues sharing terms with this one, best first"""
+        with self.lock:
+            self._load()
+            query_terms = self.issue_terms(summary, description)
+            idf = {term: self._idf(term) for term in query_terms}
+            query = {term: (1 + math.log(tf)) * idf[term] for term, tf in query_terms.items()}
+            query_norm = math.sqrt(sum(weight * weight for weight in query.values()))
+            if not query_norm:
+                return []
+            if self.norms is None:
+                self.norms = {key: math.sqrt(sum(weight * weight for weight in self._weights(terms).values()))
+                              for key, terms in self.terms.items()}
+            
+            candidates = set()
+            for term in query:
+                candidates.update(self.postings.get(term, ()))
+            candidates.discard(exclude)
+            
+            scored = []
+            for key in candidates:
+                terms = self.terms[key]
+                dot = sum(weight * (1 + math.log(terms[term])) * idf[term]
+                          for term, weight in query.items() if term in terms)
+                scored.append((dot / (query_norm * self.norms[key]), key))
+            scored.sort(reverse=True)
+            return [(round(score, 4), self.records[key]) for score, key in scored[:limit]]
+
+
+class TokenCounter:
+    """Counts prompt tokens offline: tiktoken when installed, otherwise a conservative estimate"""
+
+    def __init__(self, model):
+        self.encoding = None
+        try:
+            import tiktoken
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding('o200k_base')
+        except Exception:
+            # tiktoken missing (or its encoding files unavailable offline)
+            self.encoding = None
+
+    def count(self, text):
+        """Number of tokens in text"""
+        if not text:
+            return 0
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return (len(text) + 3) // 4  # ~4 characters per token for code and English
+
+
+_token_counters = {}
+
+
+def get_token_counter(model):
+    """Shared TokenCounter per model (loading an encoding is slow)"""
+    counter = _token_counters.get(model)
+    if counter is None:
+        counter = _token_counters[model] = TokenCounter(model)
+    return counter
+
+
+def truncate_to_tokens(text, max_tokens, counter):
+    """Cut text to at most max_tokens, at a line boundary
+    
+    When the text must be cut, the cut is moved back to the nearest function/block
+    boundary (after a blank line or a closing brace) as long as that keeps at least
+    half of the lines that fit. Returns (text, tokens, kept_lines, total_lines).
+    """
+    lines = text.splitlines(keepends=True)
+    used = 0
+    kept = 0
+    for line in lines:
+        line_tokens = counter.count(line)
+        if used + line_tokens > max_tokens:
+            break
+        used += line_tokens
+        kept += 1
+    
+    if kept == len(lines):
+        return text, used, kept, len(lines)
+    
+    for cut in range(kept, kept // 2, -1):
+        previous = lines[cut - 1].strip()
+        if previous == '' or previous in ('}', '};'):
+            kept = cut
+            break
+    
+    truncated = ''.join(lines[:kept])
+    return truncated, counter.count(truncated), kept, len(lines)
+
+
+class PromptPacker:
+    """Fills an input token budget with prompt sections and records the tokens each one used"""
+
+    def __init__(self, counter, budget):
+        self.counter = counter
+        self.budget = budget
+        self.used = 0
+        self.report = {}
+
+    @property
+    def remaining(self):
+        return max(self.budget - self.used, 0)
+
+    def reserve(self, section, text):
+        """Account for text that is always sent (it may exceed the budget)"""
+        tokens = self.counter.count(text)
+        self.used += tokens
+        self.report[section] = self.report.get(section, 0) + tokens
+        return tokens
+
+    def add(self, section, text, max_tokens=None):
+        """Add as much of text as fits; returns (packed_text, kept_lines, total_lines)"""
+        limit = self.remaining if max_tokens is None else min(max_tokens, self.remaining)
+        packed, tokens, kept, total = truncate_to_tokens(text, limit, self.counter)
+        self.used += tokens
+        self.report[section] = self.report.get(section, 0) + tokens
+        return packed, kept, total
+
+
+def iter_sse_events(response, cancel_check=None):
+    """Yield the JSON payload of each `data:` event of a server-sent events response
+    
+    Stops at the `[DONE]` sentinel. cancel_check is called between events so a
+    cancelled analysis stops reading the stream.
+    """
+    for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+        if cancel_check:
+            cancel_check()
+        if not line or not line.startswith('data:'):
+            continue
+        data = line[len('data:'):].strip()
+        if data == '[DONE]':
+            break
+        try:
+            yield json.loads(data)
+        except ValueError:
+            continue
+
+
+class _AdfWriter:
+    """Output buffer for render_adf: block spacing, line prefixes and table cells"""
+
+    def __init__(self):
+        self.parts = []
+        self.prefixes = []  # Indentation / quote markers applied at the start of each line
+        self.at_line_start = True
+        self.trailing_newlines = 0
+        self.pending_newlines = 0
+        self.list_depth = 0
+        self.cell_depth = 0
+        self.fresh_item = False  # Just wrote a list marker: the item's first block stays on its line
+
+    def newline(self):
+        self.parts.append('\n')
+        self.at_line_start = True
+        self.trailing_newlines += 1
+
+    def block_break(self):
+        """Request a break before the next content (a blank line between top-level blocks)"""
+        if self.cell_depth:
+            self.pending_newlines = max(self.pending_newlines, -1)  # -1: a space inside table cells
+        elif not self.fresh_item:
+            self.pending_newlines = max(self.pending_newlines, 1 if self.list_depth else 2)
+
+    def line_break(self):
+        """Request that the next content starts on a new line"""
+        if self.cell_depth:
+            self.pending_newlines = max(self.pending_newlines, -1)
+        elif not self.fresh_item:
+            self.pending_newlines = max(self.pending_newlines, 1)
+
+    def write(self, text):
+        for number, line in enumerate(text.split('\n')):
+            if number:
+                self.newline()
+            if not line:
+                continue
+            if self.parts:
+                if self.pending_newlines < 0 and not self.at_line_start:
+                    self.parts.append(' ')
+                while self.trailing_newlines < self.pending_newlines:
+                    self.newline()
+            self.pending_newlines = 0
+            if self.at_line_start and self.prefixes:
+                self.parts.append(''.join(self.prefixes))
+            self.parts.append(line)
+            self.at_line_start = False
+            self.trailing_newlines = 0
+            self.fresh_item = False
+
+    def text(self):
+        return ''.join(self.parts)
+
+
+def _adf_inline_text(node):
+    """Text of an inline ADF node (text with marks, mention, emoji, card, date, status, ...)"""
+    node_type = node.get('type')
+    attrs = node.get('attrs') or {}
+    if node_type == 'text':
+        text = node.get('text', '')
+        for mark in node.get('marks') or ():
+            mark_type = mark.get('type')
+            if mark_type == 'code':
+                text = f"`{text}`"
+            elif mark_type == 'link':
+                href = (mark.get('attrs') or {}).get('href')
+                if href and href != text:
+                    text = f"{text} ({href})"
+        return text
+    if node_type == 'mention':
+        text = attrs.get('text') or attrs.get('id', '')
+        return text if text.startswith('@') else f"@{text}"
+    if node_type == 'emoji':
+        return attrs.get('text') or attrs.get('shortName', '')
+    if node_type in ('inlineCard', 'blockCard', 'embedCard'):
+        return attrs.get('url') or str((attrs.get('data') or {}).get('url', ''))
+    if node_type == 'date':
+        try:
+            return time.strftime('%Y-%m-%d', time.gmtime(int(attrs.get('timestamp', 0)) / 1000))
+        except (TypeError, ValueError):
+            return str(attrs.get('timestamp', ''))
+    if node_type == 'status':
+        return f"[{attrs.get('text', '').upper()}]"
+    if node_type == 'placeholder':
+        return attrs.get('text', '')
+    if node_type == 'media':
+        return f"[attachment: {attrs.get('alt') or attrs.get('id', 'file')}]"
+    if node_type == 'inlineExtension':
+        return f"[{attrs.get('extensionKey', 'extension')}]"
+    return None
+
+
+ADF_PANEL_LABELS = {'info': 'INFO', 'note': 'NOTE', 'warning': 'WARNING', 'error': 'ERROR',
+                    'success': 'SUCCESS', 'tip': 'TIP'}
+
+
+def render_adf(document):
+    """Render an Atlassian Document Format (ADF) document as plain text
+    
+    Walks the tree with an explicit stack, so arbitrarily deep nesting cannot hit
+    the recursion limit. Covers paragraphs, headings, (nested) bullet, ordered
+    and task lists, code blocks, block quotes, panels, tables, rules, expands,
+    media, mentions, emoji, smart links, dates and status lozenges; unknown
+    nodes contribute their children's text.
+    """
+    writer = _AdfWriter()
+    # Entries are ('node', node) to render or ('call', function, argument) to run on exit
+    stack = [('node', document)]
+    
+    while stack:
+        entry = stack.pop()
+        if entry[0] == 'call':
+            entry[1](entry[2])
+            continue
+        node = entry[1]
+        if isinstance(node, list):
+            stack.extend(('node', child) for child in reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+        
+        node_type = node.get('type', '')
+        attrs = node.get('attrs') or {}
+        children = node.get('content') or []
+        
+        inline = _adf_inline_text(node)
+        if inline is not None:
+            writer.write(inline)
+            continue
+        if node_type == 'hardBreak':
+            if writer.cell_depth:
+                writer.write(' ')
+            else:
+                writer.newline()
+            continue
+        if node_type == 'rule':
+            writer.block_break()
+            writer.write('---')
+            writer.block_break()
+            continue
+        if node_type == 'codeBlock':
+            writer.block_break()
+            code = ''.join(child.get('text', '') for child in children if isinstance(child, dict))
+            if writer.cell_depth:
+                writer.write(f"`{code}`")
+            else:
+                writer.write(f"```{attrs.get('language') or ''}\n{code}\n```")
+            writer.block_break()
+            continue
+        
+        exits = []
+        if node_type in ('paragraph', 'heading'):
+            writer.block_break()
+            if node_type == 'heading':
+                writer.write('#' * int(attrs.get('level', 1) or 1) + ' ')
+            exits.append((lambda _: writer.block_break(), None))
+        elif node_type in ('bulletList', 'orderedList', 'taskList', 'decisionList'):
+            if writer.list_depth:
+                writer.line_break()
+            else:
+                writer.block_break()
+            writer.list_depth += 1
+            
+            def end_list(_):
+                writer.list_depth -= 1
+                writer.block_break()
+            exits.append((end_list, None))
+            number = int(attrs.get('order', 1) or 1)
+            items = []
+            for child in children:
+                if not isinstance(child, dict):
+                    continue
+                if node_type == 'orderedList':
+                    marker = f"{number}. "
+                    number += 1
+                elif node_type == 'taskList':
+                    marker = '[x] ' if (child.get('attrs') or {}).get('state') == 'DONE' else '[ ] '
+                elif node_type == 'decisionList':
+                    marker = '◆ '
+                else:
+                    marker = '• '
+                items.append(('call', _start_list_item, (writer, marker)))
+                items.append(('node', dict(child, type='_listItemBody')))
+                items.append(('call', _end_list_item, writer))
+            stack.extend(('call', function, argument) for function, argument in reversed(exits))
+            stack.extend(reversed(items))
+            continue
+        elif node_type == '_listItemBody':
+            pass
+        elif node_type in ('blockquote', 'panel'):
+            writer.block_break()
+            if node_type == 'panel':
+                label = ADF_PANEL_LABELS.get(attrs.get('panelType'), 'NOTE')
+                writer.write(f"[{label}] ")
+                writer.fresh_item = True
+            else:
+                writer.prefixes.append('> ')
+                exits.append((lambda _: writer.prefixes.pop(), None))
+            exits.append((lambda _: writer.block_break(), None))
+        elif node_type in ('expand', 'nestedExpand'):
+            writer.block_break()
+            if attrs.get('title'):
+                writer.write(f"▸ {attrs['title']}")
+                writer.line_break()
+            exits.append((lambda _: writer.block_break(), None))
+        elif node_type == 'table':
+            writer.block_break()
+            exits.append((lambda _: writer.block_break(), None))
+        elif node_type == 'tableRow':
+            writer.line_break()
+            writer.write('|')
+        elif node_type in ('tableHeader', 'tableCell'):
+            writer.cell_depth += 1
+            writer.pending_newlines = -1
+            
+            def end_cell(_):
+                writer.cell_depth -= 1
+                writer.pending_newlines = 0
+                writer.write(' |')
+            exits.append((end_cell, None))
+        elif node_type in ('mediaSingle', 'mediaGroup', 'extension', 'bodiedExtension', 'layoutSection'):
+            writer.block_break()
+            if node_type in ('extension', 'bodiedExtension') and not children:
+                writer.write(f"[{attrs.get('extensionKey', 'extension')}]")
+            exits.append((lambda _: writer.block_break(), None))
+        
+        stack.extend(('call', function, argument) for function, argument in reversed(exits))
+        stack.extend(('node', child) for child in reversed(children))
+    
+    return writer.text().strip()
+
+
+def _start_list_item(arguments):
+    writer, marker = arguments
+    writer.line_break()
+    writer.write(marker)
+    writer.prefixes.append(' ' * len(marker))
+    writer.fresh_item = True
+
+
+def _end_list_item(writer):
+    writer.prefixes.pop()
+    writer.fresh_item = False
+    writer.line_break()
+
+
+def jira_value_text(value):
+    """Plain text of a non-rich-text JIRA field value (option, user, version, list, ...)"""
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return ', '.join(text for text in map(jira_value_text, value) if text)
+    if isinstance(value, dict):
+        for name in ('value', 'name', 'displayName', 'key'):
+            if value.get(name):
+                return str(value[name])
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+class IssueContextFetcher:
+    """asyncio engine that fetches an issue, then its linked issues and subtasks
+    
+    The follow-up calls fan out concurrently (at most `concurrency` at a time) under
+    one overall deadline, so the combined context arrives in about the latency of
+    the slowest call. Calls that miss the deadline are dropped and reported in
+    related['timed_out']. The blocking HTTP helpers run on a private thread pool
+    inside one HttpCallScope: on cancel or when the deadline passes, the requests
+    still in flight are cut off and none are retried or sent. Comments and the
+    changelog are fetched the same way by fetch_discussion(), once the analysis
+    knows it needs them.
+    """
+
+    def __init__(self, analyzer, concurrency, deadline_seconds, cancel_event=None):
+        self.analyzer = analyzer
+        self.concurrency = concurrency
+        self.deadline_seconds = deadline_seconds
+        self.cancel_event = cancel_event
+        self.scope = HttpCallScope()
+
+    def _call(self, func, key):
+        """func(key) on a pool thread, its HTTP requests tracked in this fetcher's scope"""
+        _http_call_state.scope = self.scope
+        try:
+            return func(key)
+        finally:
+            _http_call_state.scope = None
+
+    async def _wait(self, tasks, deadline):
+        """Wait for tasks until they finish, the deadline passes, or the analysis is cancelled"""
+        loop = asyncio.get_running_loop()
+        pending = set(tasks)
+        while pending:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            _, pending = await asyncio.wait(pending, timeout=min(remaining, 0.1))
+            if self.cancel_event is not None and self.cancel_event.is_set():
+                self.scope.abort()
+                for task in pending:
+                    task.cancel()
+                raise AnalysisCancelled()
+        if pending:
+            # Cut off the calls that missed the deadline so they stop using JIRA's rate limit
+            self.scope.abort()
+        for task in pending:
+            task.cancel()
+        return pending
+
+    async def fetch(self, bug_id):
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            return await self._fetch(bug_id, executor)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def fetch_discussion(self, bug_id):
+        """{'comments', 'changelog', 'timed_out', 'errors'} of an issue, both fetched concurrently"""
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            loop = asyncio.get_running_loop()
+            jobs = {}
+            if self.analyzer.config['comment_limit']:
+                jobs[('comments', bug_id)] = self.analyzer.fetch_issue_comments
+            if self.analyzer.config['changelog_limit']:
+                jobs[('changelog', bug_id)] = self.analyzer.fetch_issue_changelog
+            discussion = {'comments': [], 'changelog': [], 'timed_out': [], 'errors': []}
+            for (kind, key), outcome in (await self._run_jobs(jobs, executor, loop.time() + self.deadline_seconds)):
+                if outcome is TimeoutError:
+                    discussion['timed_out'].append(kind)
+                elif isinstance(outcome, Exception):
+                    discussion['errors'].append(f"{kind} {key}: {outcome}")
+                else:
+                    discussion[kind] = outcome
+            return discussion
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run_jobs(self, jobs, executor, deadline):
+        """Run {(kind, key): func(key)} concurrently until the deadline
+        
+        Returns [((kind, key), outcome), ...] where outcome is the result, the
+        exception raised, or TimeoutError for calls that missed the deadline.
+        """
+        loop = asyncio.get_running_loop()
+        tasks = {job: loop.run_in_executor(executor, self._call, func, job[1]) for job, func in jobs.items()}
+        await self._wait(tasks.values(), deadline)
+        outcomes = []
+        for job, task in tasks.items():
+            if not task.done() or task.cancelled():
+                outcomes.append((job, TimeoutError))
+            elif task.exception() is not None:
+                outcomes.append((job, task.exception()))
+            else:
+                outcomes.append((job, task.result()))
+        return outcomes
+
+    async def _fetch(self, bug_id, executor):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline_seconds
+        
+        issue_task = loop.run_in_executor(executor, self._call, self.analyzer.fetch_jira_bug, bug_id)
+        if await self._wait([issue_task], deadline):
+            raise Exception(f"Failed to fetch JIRA bug: no response within {self.deadline_seconds}s")
+        issue = issue_task.result()
+        fields = issue.get('fields', {})
+        
+        # Fan out to the linked issues and subtasks
+        jobs = {}
+        for link in fields.get('issuelinks', []):
+            linked = link.get('outwardIssue') or link.get('inwardIssue')
+            if linked and linked.get('key'):
+                jobs[('links', linked['key'])] = self.analyzer.fetch_related_issue
+        for subtask in fields.get('subtasks', []):
+            if subtask.get('key'):
+                jobs[('subtasks', subtask['key'])] = self.analyzer.fetch_related_issue
+        
+        outcomes = await self._run_jobs(jobs, executor, deadline)
+        
+        related = {'links': [], 'subtasks': [], 'timed_out': [], 'errors': []}
+        relations = {}
+        for link in fields.get('issuelinks', []):
+            linked = link.get('outwardIssue') or link.get('inwardIssue') or {}
+            direction = 'outward' if 'outwardIssue' in link else 'inward'
+            relations[linked.get('key')] = link.get('type', {}).get(direction, 'relates to')
+        
+        for (kind, key), outcome in outcomes:
+            if outcome is TimeoutError:
+                related['timed_out'].append(key)
+            elif isinstance(outcome, Exception):
+                related['errors'].append(f"{kind} {key}: {outcome}")
+            else:
+                if kind == 'links':
+                    outcome['relation'] = relations.get(key, 'relates to')
+                related[kind].append(outcome)
+        
+        issue = dict(issue)
+        issue['related'] = related
+        return issue
+
+
+def keyword_trie_pattern(keywords):
+    """Regex alternation for keywords, factored into a trie of shared prefixes
+    
+    ('time', 'timeout') becomes 'time(?:out)?', so the regex engine tries one
+    branch per character instead of every keyword at every position.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        optional = '' in node
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')' + ('?' if optional else '')
+    return build(trie)
+
+
+class RuleEngine:
+    """Matches keyword rules against text in one pass of a single compiled regex
+    
+    Keywords match whole words, case-insensitively; a trailing '*' also accepts
+    any word ending ('crash*' matches crashes, crashed). A rule's score is the
+    summed weight of its keyword hits, multi-word phrases weighing 2.
+    """
+
+    def __init__(self, rules):
+        self.exact = {}  # keyword -> [weight, rule ids]
+        self.stems = {}  # keyword without '*' -> [weight, rule ids]
+        for rule_id, keywords in rules:
+            for keyword in keywords:
+                keyword = keyword.lower()
+                table, word = (self.stems, keyword[:-1]) if keyword.endswith('*') else (self.exact, keyword)
+                entry = table.setdefault(word, [2.0 if ' ' in word else 1.0, []])
+                if rule_id not in entry[1]:
+                    entry[1].append(rule_id)
+        self.stem_lengths = sorted({len(stem) for stem in self.stems}, reverse=True)
+        words = list(self.exact) + list(self.stems)
+        self.pattern = re.compile(r'\b' + keyword_trie_pattern(words) + r'\w*') if words else None
+
+    def lookup(self, word):
+        """[(weight, rule ids), ...] for a matched word: its exact keyword and its longest stem"""
+        found = []
+        entry = self.exact.get(word)
+        if entry is not None:
+            found.append(entry)
+        for length in self.stem_lengths:
+            if length <= len(word):
+                entry = self.stems.get(word[:length])
+                if entry is not None:
+                    found.append(entry)
+                    break
+        return found
+
+    def match(self, text):
+        """Return {rule_id: (score, [matched words])} for the rules text triggers"""
+        results = {}
+        if self.pattern is None or not text:
+            return results
+        # findall/Counter stay in C; only distinct words are looked up in Python
+        for word, count in Counter(self.pattern.findall(text.lower())).items():
+            # Nothing found for a longer word that merely starts with a keyword ('rested' for 'rest')
+            for weight, rule_ids in self.lookup(word):
+                for rule_id in rule_ids:
+                    result = results.setdefault(rule_id, [0.0, []])
+                    result[0] += weight * count
+                    if word not in result[1]:
+                        result[1].append(word)
+        return {rule_id: (score, hits) for rule_id, (score, hits) in results.items()}
+
+
+# Pattern-based fallback analysis: issue categories, their trigger keywords and findings
+FALLBACK_RULES = (
+    {
+        'id': 'memory',
+        'keywords': ('memory', 'leak*', 'crash*', 'segfault*', 'segmentation fault', 'null pointer*',
+                     'nullptr', 'nullpointerexception', 'out of memory', 'outofmemoryerror'),
+        'findings': ("Potential memory management issue detected",
+                     "May involve improper pointer handling or resource cleanup",
+                     "Check for null pointer dereferences and memory leaks")
+    },
+    {
+        'id': 'performance',
+        'keywords': ('performance', 'slow*', 'timeout*', 'timed out', 'latency', 'hang*', 'freez*', 'frozen'),
+        'findings': ("Performance bottleneck identified",
+                     "May involve database queries, network calls, or inefficient algorithms",
+                     "Review transaction processing, caching, and optimization")
+    },
+    {
+        'id': 'database',
+        'keywords': ('database*', 'sql', 'query', 'queries', 'connection*', 'deadlock*', 'transaction*'),
+        'findings': ("Database connectivity or query issue",
+                     "May involve connection pool exhaustion or query optimization",
+                     "Review database transaction handling and indexing")
+    },
+    {
+        'id': 'auth',
+        'keywords': ('authenticat*', 'authoriz*', 'login*', 'logged in', 'auth', 'oauth', 'permission*',
+                     'access denied', 'unauthorized', 'forbidden', '401', '403'),
+        'findings': ("Authentication/Authorization issue detected",
+                     "May involve incorrect credentials, tokens, or permissions",
+                     "Review security configuration and access control logic")
+    },
+    {
+        'id': 'api',
+        'keywords': ('api', 'apis', 'rest', 'endpoint*', 'http*', '404', '500', '502', '503', 'response*',
+                     'request*'),
+        'findings': ("API/REST endpoint issue detected",
+                     "May involve incorrect routing, request/response handling",
+                     "Review API controllers, middleware, and error handling")
+    },
+    {
+        'id': 'frontend',
+        'keywords': ('frontend', 'front-end', 'ui', 'display*', 'render*', 'css', 'javascript', 'layout',
+                     'button*'),
+        'findings': ("Frontend/UI issue detected",
+                     "May involve rendering problems, styling, or client-side logic",
+                     "Review component logic, state management, and CSS")
+    },
+    {
+        'id': 'errors',
+        'keywords': ('error*', 'exception*', 'stack trace*', 'stacktrace*', 'traceback*', 'fail*'),
+        'findings': ("Exception/Error handling issue detected",
+                     "May involve unhandled exceptions or improper error propagation",
+                     "Review try-catch blocks and error handling middleware")
+    },
+)
+GENERIC_ISSUE_KEYWORDS = ('bug*', 'error*', 'issue*')  # Any of these triggers the technology notes
+
+# Technology notes, chosen by matching these keywords against PROJECT_TECHNOLOGIES (first row wins)
+TECHNOLOGY_ADVICE = (
+    (('python',), "Python: Check for proper exception handling, use type hints"),
+    (('java', 'spring', 'spring boot'), "Java: Review try-catch blocks, check for resource leaks"),
+    (('c++', 'cpp'), "C++: Verify memory management, use smart pointers"),
+    (('javascript', 'js', 'node', 'node.js', 'nodejs', 'typescript'),
+     "JavaScript/Node.js: Check async/await usage, handle promises"),
+    (('react',), "React: Review component lifecycle, state management"),
+    (('database', 'sql', 'mysql', 'postgresql', 'postgres', 'sqlite', 'oracle'),
+     "Database: Optimize queries, check indexes, review transactions"),
+    (('docker', 'kubernetes', 'k8s'), "Container/Orchestration: Review configurations, resource limits"),
+)
+TECHNOLOGY_ENGINE = RuleEngine([(row, keywords) for row, (keywords, advice) in enumerate(TECHNOLOGY_ADVICE)])
+
+# File roles suggested by the fallback when no file matches the bug text
+ROLE_FILE_PATTERN = re.compile(r'handler|manager|service|controller|processor|worker', re.IGNORECASE)
+
+
+PROMPT_TEMPLATE = """You are an expert software engineer analyzing a JIRA bug with access to the actual codebase.
+
+**JIRA BUG DETAILS:**
+Bug ID: {bug_id}
+Summary: {summary}
+Description: {description}
+{stack_context}{related_context}
+**PROJECT CONTEXT:**
+- Project: {project_name}
+- Technologies: {technologies}
+- Components: {components}
+- Workspace: {workspace}
+
+**WORKSPACE ANALYSIS:**
+Total Files Scanned: {total_files}
+
+Workspace Structure:
+{workspace_structure}
+
+Relevant Code Files:
+{workspace_files_summary}
+
+**CODE SAMPLES FROM WORKSPACE:**
+{code_samples}
+
+**TASK:**
+Analyze this bug in the context of the actual codebase above. Provide a comprehensive analysis with:
+
+1. **Root Cause Analysis**: Based on the code patterns observed, identify the likely root cause
+2. **Affected Files/Components**: List specific files from the workspace that might be affected
+3. **Detailed Fix Recommendations**: 
+   - Provide step-by-step fix recommendations
+   - Include code examples that match the project's technology stack
+   - Suggest specific changes to the files listed above
+4. **Testing Approach**: Recommend unit tests, integration tests specific to this codebase
+5. **Potential Side Effects**: Warn about potential impacts on related components
+6. **Implementation Steps**: Provide a clear action plan
+
+Focus on providing actionable, code-specific suggestions based on the actual project structure and code samples provided.
+"""
+
+SYSTEM_PROMPT = "You are an expert software engineer specializing in bug analysis and debugging. Provide detailed, actionable suggestions based on the codebase provided. Format your response clearly with sections and bullet points."
+
+
+class JiraAnalyzer:
+    """JIRA bug analysis pipeline: fetch, workspace scan and OpenAI analysis (no GUI)"""
 
-class JiraAnalyzerGUI:
     # ========== HARDCODED CONFIGURATION ==========
     # Configure your tokens and project details here
     JIRA_BASE_URL = "https://abc.atlassian.net/"  # Replace with your JIRA URL
@@ -25,6 +2758,68 @@ class JiraAnalyzerGUI:
     JIRA_API_TOKEN = ""  # Replace with your JIRA API token
     OPENAI_API_KEY = ""  # Your OpenAI API Key
     WORKSPACE_PATH = str(Path.cwd())  # Current directory
+    WORKSPACE_PATHS = []  # Several roots scanned as one workspace, e.g. ["~/src/api", "~/src/platform"]; empty = WORKSPACE_PATH
+    CACHE_DIR = str(Path.home() / ".jira_analyzer")  # Local caches (workspace index, ...)
+    CODE_EXTENSIONS = ['.java', '.cpp', '.h', '.py', '.js', '.ts', '.jsx', '.tsx', '.c', '.cc']
+    IGNORE_DIRS = [
+        'node_modules', '.git', '.svn', '.hg', 'build', 'dist', 'target', 'out',
+        '__pycache__', '.venv', 'venv', '.tox', '.gradle', '.idea'
+    ]  # Directories pruned from the workspace scan
+    USE_GIT_INDEX = True  # In a git repo, list files from the git index (honors .gitignore) instead of walking
+    SCAN_UNTRACKED_FILES = True  # With USE_GIT_INDEX also scan untracked, not ignored files (slower on huge trees)
+    SCAN_CHANGED_SINCE = None  # Git ref (e.g. "origin/main"): only scan files changed since it
+    SCAN_RECENT_COMMITS = 0  # Only scan files changed in the last N commits (0 = off)
+    MAX_SCAN_FILES = 100  # Most relevant source files used per analysis
+    MAX_LINES_PER_FILE = 1000  # Lines read per file at most
+    SCAN_WORKERS = 8  # Threads used to read files during a workspace scan
+    INDEX_PROCESSES = os.cpu_count() or 1  # Processes that read, tokenize and chunk files on a cold scan (1 = threads only)
+    PROCESS_POOL_MIN_FILES = 200  # Files to (re)index in one scan before the process pool is used
+    SHARD_SPLIT_FILES = 5000  # A root with more source files gets one index shard per top-level directory
+    WATCH_WORKSPACE = False  # While the GUI or a batch runs, keep the workspace index current with inotify (Linux)
+    WATCH_DEBOUNCE = 0.5  # Seconds without file events before a burst (e.g. a branch switch) is applied
+    MAX_FILE_BYTES = 256 * 1024  # Bytes read per file at most
+    BATCH_WORKERS = 4  # Issues analyzed concurrently in headless batch mode
+    HTTP_TIMEOUTS = {
+        "jira": 30, "openai": 90, "logo": 10, "default": 30
+    }  # Seconds per endpoint
+    HTTP_MAX_RETRIES = 3  # Retries on 5xx, 429 and connection errors
+    RATE_LIMITS = {
+        "openai": {"requests_per_minute": 500, "tokens_per_minute": 30000},
+        "jira": {"requests_per_minute": 300}
+    }  # Starting quotas; refined from x-ratelimit-* response headers
+    JIRA_CACHE_TTL = 300  # Seconds a cached JIRA issue is served without revalidation
+    FETCH_RELATED_CONTEXT = True  # Also fetch comments, linked issues and subtasks
+    RELATED_FETCH_CONCURRENCY = 6  # Concurrent JIRA calls for the related context
+    RELATED_FETCH_DEADLINE = 20  # Seconds for the issue plus all related calls
+    COMMENT_LIMIT = 20  # Most recent comments included
+    CHANGELOG_LIMIT = 20  # Most recent changelog entries (status, assignee, version changes) included; 0 = off
+    JIRA_PAGE_SIZE = 50  # Comments / changelog entries per JIRA request (pages are fetched only as needed)
+    JIRA_FIELDS = [
+        'summary', 'status', 'priority', 'reporter', 'assignee', 'created', 'updated', 'description',
+        'environment', 'components', 'labels', 'issuelinks', 'subtasks'
+    ]  # Issue fields requested from JIRA (fields=); the analysis reads nothing else
+    JIRA_EXTRA_FIELDS = {}  # Custom fields to fetch and include, e.g. {"customfield_10031": "Steps to Reproduce"}
+    LLM_CACHE_ENABLED = True  # Reuse earlier OpenAI responses for identical requests
+    LLM_CACHE_MAX_BYTES = 50 * 1024 * 1024  # LRU eviction above this size
+    LLM_CACHE_MAX_AGE = 7 * 24 * 3600  # Seconds before a cached response expires
+    DUPLICATE_DETECTION = True  # Reuse the analysis of a near-identical earlier issue instead of calling OpenAI
+    DUPLICATE_THRESHOLD = 0.8  # Cosine similarity (0-1) of summary + description above which an issue is a re-report
+    HISTORY_MAX_ISSUES = 5000  # Past analyses kept for duplicate detection
+    OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"  # OpenAI API endpoint
+    OPENAI_MODEL = "gpt-4o-2024-11-20"  # Using latest GPT-4o model (Nov 2024)
+    OPENAI_STREAM = True  # Stream the answer token by token (server-sent events)
+    MODEL_CONTEXT_WINDOW = 128000  # Tokens the model accepts (prompt + completion)
+    MAX_COMPLETION_TOKENS = 3000  # Tokens reserved for the model's answer
+    PROMPT_INPUT_BUDGET = 12000  # Prompt tokens to fill with bug details and code
+    PROMPT_MAX_TOKENS_PER_FILE = 1500  # Largest code snippet taken from one file
+    ADF_CACHE_SIZE = 512  # Rendered rich-text fields kept in memory (per issue, revision and field)
+    MAX_STACK_FRAMES = 12  # Stack trace / file:line references resolved per bug
+    STACK_CONTEXT_LINES = 6  # Lines shown before and after each referenced line
+    TELEMETRY_ENABLED = True  # Record per-stage timings to <CACHE_DIR>/telemetry (JSONL + metrics.prom)
+    TELEMETRY_WINDOW = 1000  # Recent analyses the p50/p95 in metrics.prom are computed over
+    TELEMETRY_MAX_BYTES = 10 * 1024 * 1024  # spans.jsonl is rotated to spans.jsonl.1 above this size
+    LOGO_URL = "https://blog.org.com/hubfs/logo.png"  # Logo shown at the top of the GUI
+    STARTUP_TARGET_MS = 500  # Time-to-window goal checked by the startup report
     
     # Project-specific configuration (customize for your project)
     PROJECT_NAME = "project name "  # Your project name
@@ -36,184 +2831,364 @@ class JiraAnalyzerGUI:
     ]  # List main components of your project like ["Frontend", "Backend", "Database", "API", "Authentication", "Cache", "Message Queue", "File Processing"]
     # =============================================
     
-    def __init__(self, root):
-        self.root = root
-        self.root.title("JIRA Bug Analyzer with Copilot")
-        self.root.geometry("900x700")
-        
+    def __init__(self, config=None):
         # Use hardcoded configuration
         self.config = {
             "jira_base_url": self.JIRA_BASE_URL,
             "jira_email": self.JIRA_EMAIL,
             "jira_api_token": self.JIRA_API_TOKEN,
             "openai_api_key": self.OPENAI_API_KEY,
-            "workspace_path": self.WORKSPACE_PATH
+            "workspace_path": self.WORKSPACE_PATH,
+            "workspace_paths": list(self.WORKSPACE_PATHS),
+            "cache_dir": self.CACHE_DIR,
+            "code_extensions": list(self.CODE_EXTENSIONS),
+            "ignore_dirs": list(self.IGNORE_DIRS),
+            "use_git_index": self.USE_GIT_INDEX,
+            "scan_untracked_files": self.SCAN_UNTRACKED_FILES,
+            "scan_changed_since": self.SCAN_CHANGED_SINCE,
+            "scan_recent_commits": self.SCAN_RECENT_COMMITS,
+            "max_scan_files": self.MAX_SCAN_FILES,
+            "max_lines_per_file": self.MAX_LINES_PER_FILE,
+            "scan_workers": self.SCAN_WORKERS,
+            "index_processes": self.INDEX_PROCESSES,
+            "process_pool_min_files": self.PROCESS_POOL_MIN_FILES,
+            "shard_split_files": self.SHARD_SPLIT_FILES,
+            "watch_workspace": self.WATCH_WORKSPACE,
+            "watch_debounce": self.WATCH_DEBOUNCE,
+            "max_file_bytes": self.MAX_FILE_BYTES,
+            "batch_workers": self.BATCH_WORKERS,
+            "http_timeouts": dict(self.HTTP_TIMEOUTS),
+            "http_max_retries": self.HTTP_MAX_RETRIES,
+            "rate_limits": {api: dict(limits) for api, limits in self.RATE_LIMITS.items()},
+            "jira_cache_ttl": self.JIRA_CACHE_TTL,
+            "fetch_related_context": self.FETCH_RELATED_CONTEXT,
+            "related_fetch_concurrency": self.RELATED_FETCH_CONCURRENCY,
+            "related_fetch_deadline": self.RELATED_FETCH_DEADLINE,
+            "comment_limit": self.COMMENT_LIMIT,
+            "changelog_limit": self.CHANGELOG_LIMIT,
+            "jira_page_size": self.JIRA_PAGE_SIZE,
+            "jira_fields": list(self.JIRA_FIELDS),
+            "jira_extra_fields": dict(self.JIRA_EXTRA_FIELDS),
+            "llm_cache_enabled": self.LLM_CACHE_ENABLED,
+            "llm_cache_max_bytes": self.LLM_CACHE_MAX_BYTES,
+            "llm_cache_max_age": self.LLM_CACHE_MAX_AGE,
+            "duplicate_detection": self.DUPLICATE_DETECTION,
+            "duplicate_threshold": self.DUPLICATE_THRESHOLD,
+            "history_max_issues": self.HISTORY_MAX_ISSUES,
+            "openai_api_url": self.OPENAI_API_URL,
+            "openai_model": self.OPENAI_MODEL,
+            "openai_stream": self.OPENAI_STREAM,
+            "model_context_window": self.MODEL_CONTEXT_WINDOW,
+            "max_completion_tokens": self.MAX_COMPLETION_TOKENS,
+            "prompt_input_budget": self.PROMPT_INPUT_BUDGET,
+            "prompt_max_tokens_per_file": self.PROMPT_MAX_TOKENS_PER_FILE,
+            "adf_cache_size": self.ADF_CACHE_SIZE,
+            "max_stack_frames": self.MAX_STACK_FRAMES,
+            "stack_context_lines": self.STACK_CONTEXT_LINES,
+            "telemetry_enabled": self.TELEMETRY_ENABLED,
+            "telemetry_window": self.TELEMETRY_WINDOW,
+            "telemetry_max_bytes": self.TELEMETRY_MAX_BYTES
         }
+        if config:
+            self.config.update(config)
+        self.workspace_index = None
+        self.workspace_watcher = None
+        self._workspace_listing = None  # Listing of the last full scan while the watcher keeps it current
+        self._workspace_lock = threading.RLock()  # Serializes scans and watcher updates of the index
+        self._workspace_roots_cache = (None, None)
+        self._search_index_cache = (None, None)
+        self._source_locator_cache = (None, None)
+        self._rule_engine_cache = (None, None, None)
+        self._adf_cache = OrderedDict()
+        self._adf_cache_lock = threading.Lock()
+        limiters = {api: RateLimiter(limits['requests_per_minute'], limits.get('tokens_per_minute'))
+                    for api, limits in self.config['rate_limits'].items()}
+        self.http = HttpClient(self.config['http_timeouts'], self.config['http_max_retries'],
+                               pool_size=max(10, self.config['batch_workers'] * 2),
+                               limiters=limiters)
+        self.issue_cache = IssueCache(self.config['cache_dir'], self.config['jira_cache_ttl'])
+        self.response_cache = ResponseCache(self.config['cache_dir'], self.config['llm_cache_max_bytes'],
+                                            self.config['llm_cache_max_age'])
+        self.analysis_history = AnalysisHistory(self.config['cache_dir'], self.config['history_max_issues'])
+        self.telemetry = Telemetry(self.config['cache_dir'], self.config['telemetry_enabled'],
+                                   self.config['telemetry_window'], self.config['telemetry_max_bytes'])
         
-        self.setup_ui()
-    
-    def setup_ui(self):
-        """Setup the GUI components"""
-        # Main Analysis Frame (no tabs needed)
-        analysis_frame = ttk.Frame(self.root)
-        analysis_frame.pack(fill='both', expand=True, padx=10, pady=10)
-        
-        # Add logo at the top
-        self.add_logo(analysis_frame)
-        
-        self.setup_analysis_tab(analysis_frame)
-    
-    def add_logo(self, parent):
-        """Add company logo at the top of the GUI"""
-        try:
-            # Download logo symbol from URL
-            logo_url = "https://blog.org.com/hubfs/logo.png"
-            response = requests.get(logo_url, timeout=10)
-            response.raise_for_status()
-            
-            # Load image
-            image_data = BytesIO(response.content)
-            symbol_img = Image.open(image_data)
-            
-            # Resize logo symbol (smaller size)
-            symbol_width = 350
-            ratio = symbol_width / symbol_img.width
-            symbol_height = int(symbol_img.height * ratio)
-            symbol_img = symbol_img.resize((symbol_width, symbol_height), Image.Resampling.LANCZOS)
-            
-            # Crop to show only left half of the logo
-            crop_width = symbol_width // 7
-            symbol_img = symbol_img.crop((0, 0, crop_width, symbol_height))
-            
-            # Convert to PhotoImage
-            self.logo_image = ImageTk.PhotoImage(symbol_img)
-            
-            # Create logo frame with white background - centered with minimal height
-            logo_frame = tk.Frame(parent, bg='white')
-            logo_frame.pack(pady=(0, 5), fill='x')
-            
-            # Container for horizontal layout - centered
-            logo_container = tk.Frame(logo_frame, bg='white')
-            logo_container.pack(anchor='center', pady=(2, 2))
-            
-            # Left side: M symbol with minimal padding
-            logo_label = tk.Label(logo_container, image=self.logo_image, bg='white')
-            logo_label.pack(side='left', padx=(0, 2), pady=(5, 0))
-            
-            # Right side: Text frame (Company_name + tagline)
-            text_frame = tk.Frame(logo_container, bg='white')
-            text_frame.pack(side='left')
-            
-            # "XYZ Organisation" text in larger font
-            company_name = tk.Label(text_frame, text="XYZ Organisation", 
-                                   font=('Arial', 40, 'normal'), 
-                                   fg='black', bg='white')
-            company_name.pack(anchor='w', pady=(0, 0))
-            
-            # Tagline in smaller font below - shifted right and closer to top
-            tagline = tk.Label(text_frame, text="Organisation Tag Line", 
-                             font=('Arial', 10), 
-                             fg='black', bg='white')
-            tagline.pack(anchor='w', padx=(20, 0), pady=(0, 5))
-            
-        except Exception as e:
-            # If logo fails to load, just continue without it
-            print(f"Could not load logo: {e}")
+        # Cancellation state of the analysis running on the current thread
+        self._worker_state = threading.local()
     
-    def setup_analysis_tab(self, parent):
-        """Setup the main analysis tab"""
-        # JIRA Bug ID Input Section
-        input_frame = ttk.LabelFrame(parent, text="JIRA Bug Details", padding=10)
-        input_frame.pack(fill='x', padx=10, pady=10)
-        
-        ttk.Label(input_frame, text="JIRA Bug ID:").grid(row=0, column=0, sticky='w', pady=5)
-        self.bug_id_entry = ttk.Entry(input_frame, width=30, font=('Arial', 11))
-        self.bug_id_entry.grid(row=0, column=1, sticky='ew', padx=10, pady=5)
-        self.bug_id_entry.insert(0, "")  # Placeholder example
-        
-        # View in Browser Button
-        view_button = ttk.Button(input_frame, text="View in Browser", 
-                                 command=self.view_in_browser)
-        view_button.grid(row=0, column=2, padx=5)
-        
-        input_frame.columnconfigure(1, weight=1)
-        
-        # Analyze Button
-        button_frame = ttk.Frame(parent)
-        button_frame.pack(fill='x', padx=10, pady=5)
-        
-        self.analyze_button = ttk.Button(button_frame, text="🤖 Analyse with OpenAI", 
-                                         command=self.analyze_bug,
-                                         style='Accent.TButton')
-        self.analyze_button.pack(pady=10)
+    def set_status(self, text):
+        """Report pipeline progress (shown in the status bar by the GUI)"""
+    
+    def check_cancelled(self):
+        """Raise AnalysisCancelled if the analysis running on this thread was cancelled"""
+        cancel_event = getattr(self._worker_state, 'cancel_event', None)
+        if cancel_event is not None and cancel_event.is_set():
+            raise AnalysisCancelled()
+    
+    def run_cancellable(self, func, *args, **kwargs):
+        """Run a blocking call (e.g. an HTTP request) so that Cancel can abort it
         
-        # Progress Bar
-        self.progress = ttk.Progressbar(button_frame, mode='indeterminate')
-        self.progress.pack(fill='x', pady=5)
+        Outside the analysis worker the call runs directly. Inside it, the call runs
+        on a helper thread while the worker watches the cancel event. On cancel the
+        worker stops waiting immediately and the HTTP requests the call is waiting
+        on are cut off (their sockets shut down), so the server sees the client go
+        away instead of finishing, and billing, the request.
+        """
+        cancel_event = getattr(self._worker_state, 'cancel_event', None)
+        if cancel_event is None:
+            return func(*args, **kwargs)
         
-        # Results Section
-        results_frame = ttk.LabelFrame(parent, text="Analysis Results", padding=10)
-        results_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        self.check_cancelled()
+        outcome = {}
+        done = threading.Event()
+        scope = HttpCallScope()
         
-        # Bug Details Section
-        ttk.Label(results_frame, text="Bug Details:", font=('Arial', 10, 'bold')).pack(anchor='w')
-        self.bug_details_text = scrolledtext.ScrolledText(results_frame, height=8, 
-                                                          wrap=tk.WORD, font=('Courier', 9))
-        self.bug_details_text.pack(fill='both', expand=True, pady=5)
+        def target():
+            _http_call_state.scope = scope
+            try:
+                outcome['result'] = func(*args, **kwargs)
+            except BaseException as e:
+                outcome['error'] = e
+            finally:
+                _http_call_state.scope = None
+                done.set()
         
-        # Bug Fix Suggestions Section
-        ttk.Label(results_frame, text="AI-Powered Bug Fix Suggestions:", 
-                 font=('Arial', 10, 'bold')).pack(anchor='w', pady=(10, 0))
-        self.bug_fix_text = scrolledtext.ScrolledText(results_frame, height=12, 
-                                                      wrap=tk.WORD, font=('Courier', 9))
-        self.bug_fix_text.pack(fill='both', expand=True, pady=5)
+        threading.Thread(target=target, daemon=True).start()
+        while not done.wait(0.1):
+            if cancel_event.is_set():
+                scope.abort()
+                raise AnalysisCancelled()
         
-        # Status Bar
-        self.status_label = ttk.Label(parent, text="Ready", relief=tk.SUNKEN, anchor='w')
-        self.status_label.pack(fill='x', side='bottom', padx=10, pady=5)
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['result']
     
-    def view_in_browser(self):
-        """Open JIRA bug in browser"""
-        bug_id = self.bug_id_entry.get().strip()
-        if bug_id:
-            url = f"{self.config['jira_base_url']}/browse/{bug_id}"
-            webbrowser.open(url)
-        else:
-            messagebox.showwarning("Warning", "Please enter a JIRA Bug ID")
+    def jira_auth(self):
+        """Basic auth (email + API token) for JIRA REST calls"""
+        from requests.auth import HTTPBasicAuth
+        return HTTPBasicAuth(self.config['jira_email'], self.config['jira_api_token'])
     
-    def fetch_jira_bug(self, bug_id):
-        """Fetch bug details from JIRA"""
+    def fetch_jira_bug(self, bug_id, use_cache=True):
+        """Fetch bug details from JIRA
+        
+        Issues are served from the local issue cache inside the freshness window.
+        After that they are revalidated: with If-None-Match when JIRA sent an ETag,
+        otherwise by comparing the issue's `updated` timestamp, and only changed
+        issues are downloaded again.
+        """
         try:
             url = f"{self.config['jira_base_url']}/rest/api/3/issue/{bug_id}"
             
-            auth = HTTPBasicAuth(self.config['jira_email'], self.config['jira_api_token'])
+            auth = self.jira_auth()
             headers = {"Accept": "application/json"}
+            fields = self.issue_fields_param()
+            
+            record = self.issue_cache.get(bug_id, fields) if use_cache else None
+            if record is not None:
+                if self.issue_cache.is_fresh(record):
+                    self.issue_cache.count(hit=True)
+                    return record['payload']
+                
+                if record.get('etag'):
+                    headers["If-None-Match"] = record['etag']
+                elif record.get('updated'):
+                    # No ETag: ask only for the `updated` field to see if anything changed
+                    response = self.run_cancellable(self.http.get, url, 'jira', headers=headers, auth=auth,
+                                                    params={"fields": "updated"})
+                    response.raise_for_status()
+                    if response.json().get('fields', {}).get('updated') == record['updated']:
+                        self.issue_cache.touch(bug_id, record)
+                        self.issue_cache.count(hit=True, revalidated=True)
+                        return record['payload']
             
-            response = requests.get(url, headers=headers, auth=auth, timeout=30)
+            response = self.run_cancellable(self.http.get, url, 'jira', headers=headers, auth=auth,
+                                            params={"fields": fields})
+            if response.status_code == 304 and record is not None:
+                self.issue_cache.touch(bug_id, record)
+                self.issue_cache.count(hit=True, revalidated=True)
+                return record['payload']
             response.raise_for_status()
             
-            return response.json()
+            payload = response.json()
+            self.issue_cache.put(bug_id, payload, response.headers.get('ETag'), fields)
+            self.issue_cache.count(hit=False)
+            return payload
         except requests.exceptions.RequestException as e:
             raise Exception(f"Failed to fetch JIRA bug: {str(e)}")
     
+    def extra_fields_text(self, bug_data):
+        """Text of the JIRA_EXTRA_FIELDS custom fields that are set, one labelled block per field"""
+        fields = bug_data.get('fields', {})
+        blocks = []
+        for field_id, label in self.config['jira_extra_fields'].items():
+            value = fields.get(field_id)
+            if isinstance(value, dict) and value.get('type') == 'doc':
+                text = self.issue_field_text(bug_data, field_id)
+            else:
+                text = jira_value_text(value)
+            if text:
+                blocks.append(f"{label}:\n{text}")
+        return "\n\n".join(blocks)
+    
+    def issue_fields_param(self):
+        """The `fields=` value for issue requests: JIRA_FIELDS plus JIRA_EXTRA_FIELDS"""
+        return ','.join(dict.fromkeys(self.config['jira_fields'] + list(self.config['jira_extra_fields'])))
+    
+    def iter_jira_pages(self, url, items_key, params=None, start_at=0, limit=None):
+        """Yield up to `limit` items of a paginated JIRA list endpoint (startAt/maxResults)
+        
+        Pages are requested only as the caller consumes items, so stopping early
+        saves the remaining requests; the last page asks for no more than `limit`.
+        """
+        auth = self.jira_auth()
+        end_at = start_at + limit if limit is not None else None
+        while end_at is None or start_at < end_at:
+            page_size = self.config['jira_page_size']
+            if end_at is not None:
+                page_size = min(page_size, end_at - start_at)
+            page_params = dict(params or {}, startAt=start_at, maxResults=page_size)
+            response = self.http.get(url, 'jira', headers={"Accept": "application/json"}, auth=auth,
+                                     params=page_params)
+            response.raise_for_status()
+            page = response.json()
+            items = page.get(items_key, [])[:page_size]
+            yield from items
+            start_at += len(items)
+            if not items or page.get('isLast') or start_at >= page.get('total', start_at):
+                return
+    
+    def iter_issue_comments(self, bug_id, limit=None):
+        """Yield an issue's comments, newest first, as {'author', 'created', 'body'}"""
+        url = f"{self.config['jira_base_url']}/rest/api/3/issue/{bug_id}/comment"
+        for comment in self.iter_jira_pages(url, 'comments', {"orderBy": "-created"}, limit=limit):
+            revision = comment.get('updated') or comment.get('created')
+            cache_key = (bug_id, revision, f"comment:{comment.get('id')}") if revision else None
+            yield {
+                'author': comment.get('author', {}).get('displayName', 'Unknown'),
+                'created': comment.get('created', '')[:10],
+                'body': self.adf_to_text(comment.get('body', ''), cache_key)
+            }
+    
+    def fetch_issue_comments(self, bug_id):
+        """Fetch the most recent COMMENT_LIMIT comments of an issue as [{'author', 'created', 'body'}]"""
+        return list(self.iter_issue_comments(bug_id, self.config['comment_limit']))
+    
+    def iter_issue_changelog(self, bug_id, start_at=0, limit=None):
+        """Yield an issue's change history, oldest first, as {'author', 'created', 'changes'}"""
+        url = f"{self.config['jira_base_url']}/rest/api/3/issue/{bug_id}/changelog"
+        for history in self.iter_jira_pages(url, 'values', start_at=start_at, limit=limit):
+            changes = [f"{item.get('field', '?')}: {item.get('fromString') or '-'} → {item.get('toString') or '-'}"
+                       for item in history.get('items', [])]
+            yield {
+                'author': (history.get('author') or {}).get('displayName', 'Unknown'),
+                'created': history.get('created', '')[:10],
+                'changes': '; '.join(changes)
+            }
+    
+    def fetch_issue_changelog(self, bug_id):
+        """Fetch the most recent CHANGELOG_LIMIT changelog entries of an issue, oldest first"""
+        # JIRA lists the changelog oldest first: read the total from a one-entry page,
+        # then request only the pages holding the newest entries
+        limit = self.config['changelog_limit']
+        url = f"{self.config['jira_base_url']}/rest/api/3/issue/{bug_id}/changelog"
+        response = self.http.get(url, 'jira', headers={"Accept": "application/json"}, auth=self.jira_auth(),
+                                 params={"startAt": 0, "maxResults": 1})
+        response.raise_for_status()
+        total = response.json().get('total', 0)
+        if not total:
+            return []
+        return list(self.iter_issue_changelog(bug_id, max(0, total - limit), limit))
+    
+    def fetch_related_issue(self, key):
+        """Fetch the summary, status and description of a linked issue or subtask"""
+        url = f"{self.config['jira_base_url']}/rest/api/3/issue/{key}"
+        auth = self.jira_auth()
+        params = {"fields": "summary,status,description,updated"}
+        
+        response = self.http.get(url, 'jira', headers={"Accept": "application/json"}, auth=auth, params=params)
+        response.raise_for_status()
+        
+        issue = response.json()
+        fields = issue.get('fields', {})
+        return {
+            'key': key,
+            'summary': fields.get('summary', ''),
+            'status': (fields.get('status') or {}).get('name', 'N/A'),
+            'description': self.issue_field_text(dict(issue, key=key), 'description')
+        }
+    
+    def fetch_issue_context(self, bug_id):
+        """Fetch an issue plus its linked issues and subtasks concurrently
+        
+        Returns the issue payload with an extra 'related' key. Falls back to a plain
+        fetch_jira_bug() when FETCH_RELATED_CONTEXT is off. Comments and changelog
+        come later from fetch_issue_discussion(), only for issues that get analyzed.
+        """
+        with self.telemetry.span('fetch') as span:
+            if not self.config['fetch_related_context']:
+                return self.fetch_jira_bug(bug_id)
+            
+            fetcher = IssueContextFetcher(self, self.config['related_fetch_concurrency'],
+                                          self.config['related_fetch_deadline'],
+                                          getattr(self._worker_state, 'cancel_event', None))
+            issue = asyncio.run(fetcher.fetch(bug_id))
+            span.update((kind, len(items)) for kind, items in issue['related'].items() if items)
+            return issue
+    
+    def fetch_issue_discussion(self, bug_data):
+        """Add the issue's comments and changelog to bug_data['related'] (fetched once, on demand)
+        
+        Called by the analysis after the duplicate check, so issues answered from
+        an earlier analysis never page through their comments and history.
+        """
+        related = bug_data.get('related')
+        if related is None or 'comments' in related or not (
+                self.config['comment_limit'] or self.config['changelog_limit']):
+            return bug_data
+        with self.telemetry.span('fetch', step='discussion') as span:
+            fetcher = IssueContextFetcher(self, self.config['related_fetch_concurrency'],
+                                          self.config['related_fetch_deadline'],
+                                          getattr(self._worker_state, 'cancel_event', None))
+            discussion = asyncio.run(fetcher.fetch_discussion(bug_data.get('key')))
+            span.update((kind, len(discussion[kind])) for kind in ('comments', 'changelog') if discussion[kind])
+        related = dict(related, comments=discussion['comments'], changelog=discussion['changelog'],
+                       timed_out=related['timed_out'] + discussion['timed_out'],
+                       errors=related['errors'] + discussion['errors'])
+        return dict(bug_data, related=related)
+    
+    def format_related_context(self, related):
+        """Render linked issues, subtasks, comments and recent changes as prompt text"""
+        if not related:
+            return ''
+        
+        lines = []
+        for item in related.get('links', []):
+            lines.append(f"- Linked issue ({item['relation']}) {item['key']} [{item['status']}]: {item['summary']}")
+            if item['description']:
+                lines.append(f"  {item['description']}")
+        for item in related.get('subtasks', []):
+            lines.append(f"- Subtask {item['key']} [{item['status']}]: {item['summary']}")
+            if item['description']:
+                lines.append(f"  {item['description']}")
+        for comment in related.get('comments') or []:
+            lines.append(f"- Comment by {comment['author']} ({comment['created']}): {comment['body']}")
+        for entry in related.get('changelog') or []:
+            if entry['changes']:
+                lines.append(f"- Change by {entry['author']} ({entry['created']}): {entry['changes']}")
+        return "\n".join(lines)
+    
+    def issue_cache_stats(self):
+        """Report hit/miss counts of the JIRA issue cache"""
+        return self.issue_cache.stats()
+    
     def format_bug_details(self, bug_data):
         """Format bug details for display"""
         try:
             fields = bug_data.get('fields', {})
             
-            # Handle description - it can be a string or a dict (ADF format)
-            description_raw = fields.get('description', 'No description available')
-            if isinstance(description_raw, dict):
-                description = self.extract_text_from_adf(description_raw)
-            else:
-                description = str(description_raw) if description_raw else 'No description available'
-            
-            # Handle environment field
-            environment_raw = fields.get('environment')
-            if isinstance(environment_raw, dict):
-                environment = self.extract_text_from_adf(environment_raw)
-            else:
-                environment = str(environment_raw) if environment_raw else 'Not specified'
+            # Description and environment can be strings or ADF documents
+            description = self.issue_field_text(bug_data, 'description') or 'No description available'
+            environment = self.issue_field_text(bug_data, 'environment') or 'Not specified'
             
             details = f"""
 Bug ID: {bug_data.get('key', 'N/A')}
@@ -238,83 +3213,527 @@ Labels:
 {', '.join(fields.get('labels', [])) or 'None'}
             """.strip()
             
+            extra_fields = self.extra_fields_text(bug_data)
+            if extra_fields:
+                details += "\n\n" + extra_fields
+            
+            related = bug_data.get('related')
+            if related:
+                counts = [f"{len(related['links'])} linked issues", f"{len(related['subtasks'])} subtasks"]
+                if 'comments' in related:
+                    counts[:0] = [f"{len(related['comments'])} comments",
+                                  f"{len(related['changelog'])} changelog entries"]
+                details += "\n\nRelated Context:\n" + ", ".join(counts)
+                if related['timed_out']:
+                    details += f" (timed out: {', '.join(related['timed_out'])})"
+            
             return details
         except Exception as e:
             return f"Error formatting bug details: {str(e)}"
     
-    def generate_copilot_analysis(self, bug_data):
-        """Generate AI-powered bug fix suggestions using OpenAI API with workspace context"""
+    def generate_copilot_analysis(self, bug_data, workspace_context=None, bypass_cache=False, on_token=None):
+        """Generate AI-powered bug fix suggestions using OpenAI API with workspace context
+        
+        Pass a workspace_context from scan_workspace_files() to reuse one scan across
+        several issues; otherwise the workspace is scanned here. bypass_cache forces
+        a fresh OpenAI call even if an identical request was answered before.
+        on_token receives the answer text as it streams in.
+        """
         try:
             fields = bug_data.get('fields', {})
             bug_id = bug_data.get('key', 'Unknown')
             summary = fields.get('summary', '')
             
-            # Handle description - it can be a string or a dict (ADF format)
-            description_raw = fields.get('description', '')
-            if isinstance(description_raw, dict):
-                # JIRA API v3 uses Atlassian Document Format (ADF)
-                description = self.extract_text_from_adf(description_raw)
-            else:
-                description = str(description_raw) if description_raw else ''
+            # JIRA API v3 returns the description in Atlassian Document Format (ADF);
+            # the text rendered for the details pane is reused from the cache
+            description = self.issue_field_text(bug_data, 'description')
+            extra_fields = self.extra_fields_text(bug_data)
+            if extra_fields:
+                description = f"{description}\n\n{extra_fields}"
+            
+            # A re-report of an issue analyzed before gets that analysis without an OpenAI call
+            if self.config['duplicate_detection'] and not bypass_cache:
+                duplicate = self.find_duplicate(bug_id, summary, description)
+                if duplicate:
+                    with self.telemetry.span('render'):
+                        return self.format_duplicate_analysis(bug_id, *duplicate)
+            
+            # Comments and changelog only matter for a real analysis
+            bug_data = self.fetch_issue_discussion(bug_data)
+            self.check_cancelled()
             
             # Scan workspace for relevant code files
-            self.status_label.config(text="Scanning workspace for relevant code files...")
-            self.root.update()
-            workspace_context = self.scan_workspace_files()
+            if workspace_context is None:
+                self.set_status("Scanning workspace for relevant code files...")
+                with self.telemetry.span('scan') as span:
+                    workspace_context = self.scan_workspace_files()
+                    span['files'] = workspace_context.get('total_files', 0)
+                    span['hot'] = workspace_context.get('discovery', {}).get('hot', False)
+                self.check_cancelled()
+            
+            # Put the files most relevant to this bug first
+            components = ' '.join(c.get('name', '') for c in fields.get('components', []))
+            with self.telemetry.span('prompt', step='rank'):
+                workspace_context = self.rank_workspace_files(
+                    workspace_context, f"{summary} {description} {components}")
             
             # Call OpenAI API for real AI analysis
-            self.status_label.config(text="Analyzing with OpenAI GPT-4...")
-            self.root.update()
-            analysis = self.call_openai_api(bug_id, summary, description, workspace_context)
+            self.set_status("Analyzing with OpenAI GPT-4...")
+            analysis = self.call_openai_api(bug_id, summary, description, workspace_context,
+                                            bypass_cache=bypass_cache, on_token=on_token,
+                                            related_context=self.format_related_context(bug_data.get('related')))
             
             return analysis
             
+        except AnalysisCancelled:
+            raise
         except Exception as e:
             return f"Error generating AI analysis: {str(e)}"
     
+    def find_duplicate(self, bug_id, summary, description):
+        """Return (similarity, record) of the most similar earlier analysis above DUPLICATE_THRESHOLD, or None"""
+        with self.telemetry.span('dedupe') as span:
+            matches = self.analysis_history.similar(summary, description, exclude=bug_id, limit=1)
+            if not matches or matches[0][0] < self.config['duplicate_threshold']:
+                return None
+            span.update(duplicate_of=matches[0][1]['key'], similarity=matches[0][0])
+            return matches[0]
+    
+    def format_duplicate_analysis(self, bug_id, similarity, record):
+        """Show the earlier analysis of a near-duplicate issue, with a link to it"""
+        link = f"{self.config['jira_base_url'].rstrip('/')}/browse/{record['key']}"
+        return f"""
+╔══════════════════════════════════════════════════════════════════╗
+║     EARLIER ANALYSIS REUSED FOR {bug_id} (NEAR-DUPLICATE ISSUE)
+╚══════════════════════════════════════════════════════════════════╝
+
+♻️  {bug_id} looks like a re-report of {record['key']} ({similarity:.0%} similar):
+   • Summary: {record['summary']}
+   • Analyzed: {record['analyzed']}
+   • Link: {link}
+
+   No OpenAI call was made. Tick "Bypass AI response cache" (or pass --no-cache)
+   to analyze {bug_id} from scratch.
+
+═══════════════════════════════════════════════════════════════════
+
+{record['analysis']}
+
+═══════════════════════════════════════════════════════════════════
+"""
+    
+    def workspace_roots(self):
+        """[(path prefix, root), ...] for the configured workspace roots
+        
+        With a single root workspace paths are relative to it (empty prefix); with
+        WORKSPACE_PATHS each root's paths start with its directory name, numbered
+        when two roots share a name.
+        """
+        paths = tuple(self.config['workspace_paths'] or [self.config['workspace_path']])
+        cached_paths, labelled = self._workspace_roots_cache
+        if cached_paths == paths:
+            return labelled  # Resolving the paths touches the disk
+        roots = [Path(path).expanduser().resolve() for path in paths]
+        labelled = []
+        used = set()
+        for root in roots:
+            if len(roots) == 1:
+                labelled.append(('', root))
+                break
+            label = root.name or 'root'
+            number = 2
+            while label in used:
+                label = f"{root.name or 'root'}-{number}"
+                number += 1
+            used.add(label)
+            labelled.append((label + os.sep, root))
+        self._workspace_roots_cache = (paths, labelled)
+        return labelled
+    
+    def workspace_label(self):
+        """The workspace roots as shown in prompts and reports"""
+        return ', '.join(str(root) for _, root in self.workspace_roots())
+    
+    def workspace_file(self, path):
+        """Absolute location of a workspace path"""
+        for prefix, root in self.workspace_roots():
+            if path.startswith(prefix):
+                return root / path[len(prefix):]
+        return None
+    
+    def get_workspace_index(self):
+        """Return the sharded persistent index of the workspace roots (loaded on first use)
+        
+        Until a scan lays out the shards, each root is one shard.
+        """
+        if self.workspace_index is None:
+            self.workspace_index = ShardedWorkspaceIndex(self.config['cache_dir'])
+        if not self.workspace_index.shards:
+            self.workspace_index.set_layout({prefix: root for prefix, root in self.workspace_roots()})
+        return self.workspace_index
+    
+    def invalidate_workspace_index(self):
+        """Discard the persistent workspace index so the next scan re-reads every file"""
+        self.get_workspace_index().invalidate()
+    
+    def workspace_index_stats(self):
+        """Report hit/miss counts of the persistent workspace index"""
+        return self.get_workspace_index().stats()
+    
+    def start_workspace_watcher(self):
+        """Start the inotify watcher that keeps the workspace index current (Linux only)
+        
+        Returns False (scans keep checking every file's mtime) where inotify is
+        not available.
+        """
+        self.stop_workspace_watcher()
+        roots = [root for _, root in self.workspace_roots()]
+        watcher = WorkspaceWatcher(roots, self.config['code_extensions'], self.config['ignore_dirs'],
+                                   self.apply_workspace_changes, self.config['watch_debounce'])
+        if not watcher.start():
+            print(f"Workspace watcher not started: {watcher.error}")
+            return False
+        self.workspace_watcher = watcher
+        return True
+    
+    def stop_workspace_watcher(self):
+        """Stop the workspace watcher; later scans list and stat the workspace again"""
+        watcher, self.workspace_watcher = self.workspace_watcher, None
+        if watcher is not None:
+            watcher.stop()
+        with self._workspace_lock:
+            self._workspace_listing = None
+    
+    def watcher_ready(self):
+        """True when the watcher covers the whole workspace, so a listing taken now stays current"""
+        watcher = self.workspace_watcher
+        return (watcher is not None and watcher.running and watcher.ready.is_set()
+                and watcher.roots == [str(root) for _, root in self.workspace_roots()])
+    
+    def change_scoped(self):
+        """True when scans are restricted to changed files (SCAN_CHANGED_SINCE / SCAN_RECENT_COMMITS)"""
+        return bool(self.config['scan_changed_since'] or self.config['scan_recent_commits'])
+    
+    def hot_workspace_listing(self):
+        """The listing kept current by the watcher, or None when the next scan must list the workspace"""
+        if self._workspace_listing is None or self.change_scoped() or not self.watcher_ready():
+            return None
+        return self._workspace_listing
+    
+    def apply_workspace_changes(self, changed, removed, rescan):
+        """Apply file changes reported by the workspace watcher to the index (watcher thread)
+        
+        Modified files that are indexed and new source files are read and
+        tokenized right away, deleted ones are dropped. When files appear or
+        disappear the affected roots are listed again, so the next scan can be
+        answered from memory. The disk work happens outside the lock; scans only
+        wait for the in-memory update. rescan (events were lost) discards the
+        listing: the next scan stats every file again.
+        """
+        if rescan:
+            with self._workspace_lock:
+                self._workspace_listing = None
+            return
+        index = self.get_workspace_index()
+        roots = self.workspace_roots()
+        
+        def workspace_path(file_path):
+            for prefix, root in roots:
+                root_prefix = os.path.join(str(root), '')
+                if file_path.startswith(root_prefix):
+                    return prefix, prefix + file_path[len(root_prefix):]
+            return None, None
+        
+        with self._workspace_lock:
+            listing = self._workspace_listing
+            known = set(index.paths)
+        
+        removed_paths = set()
+        touched_roots = set()
+        top_level = False
+        for file_path in removed:
+            prefix, path = workspace_path(file_path)
+            if path is None:
+                continue
+            if path.endswith(os.sep):
+                removed_paths.update(known_path for known_path in known if known_path.startswith(path))
+            else:
+                removed_paths.add(path)
+            touched_roots.add(prefix)
+            top_level |= os.sep not in path[len(prefix):].rstrip(os.sep)
+        changed_files = []
+        for file_path in changed:
+            prefix, path = workspace_path(file_path)
+            if path is None:
+                continue
+            changed_files.append((file_path, path))
+            if path not in known:
+                touched_roots.add(prefix)
+            top_level |= os.sep not in path[len(prefix):]
+        
+        # New or deleted files: list those roots again (git decides what is ignored)
+        updated = None
+        if listing is not None and touched_roots:
+            updated = dict(listing, roots=[], paths=[])
+            for prefix, root, root_prefix, files_by_ext, scope_changed in listing['roots']:
+                if prefix in touched_roots:
+                    files_by_ext = self.discover_source_files(root)[0]
+                updated['roots'].append((prefix, root, root_prefix, files_by_ext, scope_changed))
+                updated['paths'].extend(prefix + rel_path
+                                        for rel_path in self.listed_paths(root_prefix, files_by_ext))
+            if top_level:
+                updated['structure'] = self.get_workspace_structure()
+        listed = set(updated['paths']) if updated is not None else known
+        
+        misses = []
+        for file_path, path in changed_files:
+            if path in listed and (index.get(path) is not None or path not in known):
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                if S_ISREG(stat.st_mode):
+                    misses.append((file_path, stat, path))
+        if misses:
+            with ThreadPoolExecutor(max_workers=self.config['scan_workers']) as pool:
+                results = self.index_files(misses, pool)
+        
+        with self._workspace_lock:
+            if self._workspace_listing is not listing:
+                self._workspace_listing = None  # A scan listed the workspace meanwhile: list again
+            elif updated is not None:
+                self._workspace_listing = updated
+                index.set_paths(updated['paths'])
+            if misses:
+                self.store_indexed_files(misses, results)
+            index.remove(removed_paths)
+            index.save()
+    
+    def get_search_index(self, workspace_context):
+        """Return a BM25 index over every scanned file, rebuilt only when the workspace index changed"""
+        index = self.get_workspace_index()
+        paths = tuple(workspace_context.get('candidates') or [f['path'] for f in workspace_context.get('files', [])])
+        cache_key = (index.generation, paths)
+        
+        cached_key, search_index = self._search_index_cache
+        if cached_key != cache_key:
+            search_index = SearchIndex()
+            for path in paths:
+                entry = index.get(path) or {}
+                search_index.add_document(path, entry.get('terms', {}))
+            self._search_index_cache = (cache_key, search_index)
+        return search_index
+    
+    def get_source_locator(self):
+        """Return a SourceLocator over every workspace source file, rebuilt only when the file list changed"""
+        index = self.get_workspace_index()
+        cache_key = index.generation
+        cached_key, locator = self._source_locator_cache
+        if cached_key != cache_key:
+            locator = SourceLocator(index.paths)
+            self._source_locator_cache = (cache_key, locator)
+        return locator
+    
+    def read_source_window(self, rel_path, first_line, last_line):
+        """Return [(line_number, text), ...] for a line range of a workspace file"""
+        entry = self.get_workspace_index().get(rel_path)
+        if entry and not entry.get('skipped') and last_line <= entry.get('lines', 0):
+            lines = entry['content'].splitlines()
+        else:
+            file_path = self.workspace_file(rel_path)
+            if file_path is None:
+                return []
+            try:
+                with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                    lines = [line.rstrip('\n') for line in islice(f, last_line)]
+            except OSError:
+                return []
+        return [(number, lines[number - 1]) for number in range(max(first_line, 1), min(last_line, len(lines)) + 1)]
+    
+    def resolve_stack_context(self, text):
+        """Source excerpts around the file:line references found in text
+        
+        Frames are resolved through the workspace's file-name index (no tree walk)
+        and each gets STACK_CONTEXT_LINES lines either side, with overlapping
+        windows of the same file merged and referenced lines marked '>>'.
+        Returns (context_text, resolved_count, frame_count).
+        """
+        frames = parse_stack_frames(text, self.config['max_stack_frames'])
+        if not frames:
+            return '', 0, 0
+        locator = self.get_source_locator()
+        radius = self.config['stack_context_lines']
+        
+        by_file = {}
+        for frame in frames:
+            rel_path = locator.resolve(frame['file'])
+            if rel_path is not None:
+                by_file.setdefault(rel_path, []).append(frame)
+        
+        sections = []
+        for rel_path, file_frames in by_file.items():
+            marked = {frame['line'] for frame in file_frames}
+            symbols = {frame['line']: frame['symbol'] for frame in file_frames if frame['symbol']}
+            ranges = []
+            for line in sorted(marked):
+                if ranges and line - radius <= ranges[-1][1] + 1:
+                    ranges[-1][1] = line + radius
+                else:
+                    ranges.append([line - radius, line + radius])
+            for first_line, last_line in ranges:
+                window = self.read_source_window(rel_path, first_line, last_line)
+                if not window:
+                    continue
+                referenced = [line for line in sorted(marked) if first_line <= line <= last_line]
+                labels = ', '.join(f"{line} in {symbols[line]}" if line in symbols else str(line)
+                                   for line in referenced)
+                body = "\n".join(f"{'>>' if number in marked else '  '}{number:>5} | {source}"
+                                  for number, source in window)
+                sections.append(f"--- {rel_path}:{labels} ---\n{body}\n")
+        
+        resolved = sum(len(file_frames) for file_frames in by_file.values())
+        return "\n".join(sections), resolved, len(frames)
+    
+    def rank_workspace_files(self, workspace_context, query_text):
+        """Pick the workspace files most relevant to the bug text (BM25)
+        
+        Every scanned file is ranked, not just the ones loaded by the scan.
+        Returns a copy of workspace_context whose 'files' list holds the
+        MAX_SCAN_FILES best-matching files, best first, topped up in scan order
+        with files that match no term.
+        """
+        candidates = workspace_context.get('candidates')
+        if candidates is None:
+            candidates = [f['path'] for f in workspace_context.get('files', [])]
+        if not candidates:
+            return workspace_context
+        
+        ranked = self.get_search_index(workspace_context).search(tokenize_identifiers(query_text))
+        scores = dict(ranked)
+        max_files = self.config['max_scan_files']
+        chosen = [path for path, _ in ranked[:max_files]]
+        if len(chosen) < max_files:
+            chosen += islice((path for path in candidates if path not in scores), max_files - len(chosen))
+        
+        loaded = {f['path']: f for f in workspace_context.get('files', [])}
+        ranked_files = [f for f in (loaded.get(path) or self.indexed_file_info(path) for path in chosen)
+                        if f is not None]
+        ranked_context = dict(workspace_context)
+        ranked_context['files'] = ranked_files
+        ranked_context['relevance'] = {f['path']: round(scores.get(f['path'], 0.0), 3) for f in ranked_files}
+        return ranked_context
+    
+    def indexed_file_info(self, path):
+        """{'path', 'content', 'lines', 'symbols'} of a file from the workspace index (None if not loaded)"""
+        entry = self.get_workspace_index().get(path)
+        if entry is None or entry.get('skipped'):
+            return None
+        return {
+            'path': path,
+            'content': entry['content'],
+            'lines': entry['lines'],
+            'symbols': entry.get('symbols', [])
+        }
+    
     def scan_workspace_files(self):
-        """Scan workspace and collect relevant code files"""
-        workspace_path = Path(self.config['workspace_path'])
-        code_extensions = {'.java', '.cpp', '.h', '.py', '.js', '.ts', '.jsx', '.tsx', '.c', '.cc'}
+        """Scan workspace and collect relevant code files
         
-        relevant_files = []
-        file_count = 0
-        max_files = 100  # Limit to avoid token overflow
-        max_lines_per_file = 1000  # Limit lines per file
+        Every configured root is listed: in a git repository from the git index
+        (tracked plus untracked, not ignored), elsewhere by walking the tree. With
+        SCAN_CHANGED_SINCE or SCAN_RECENT_COMMITS only files changed since that
+        ref / in those commits (plus uncommitted and untracked ones) are scanned.
+        Every listed file is indexed so rank_workspace_files() can pick the most
+        relevant ones; 'candidates' holds all their paths and 'files' the first
+        MAX_SCAN_FILES of them in scan order.
+        Files whose mtime and size are unchanged since the previous scan are served
+        from the persistent workspace index instead of being re-read from disk.
+        Changed files are loaded with bounded reads on a thread pool, or on the
+        process pool when there are many (cold index); binary and minified files
+        are skipped. While the workspace watcher runs, the listing and the index
+        are kept current in memory and a scan touches the disk only for files
+        that were never indexed.
+        """
+        index = self.get_workspace_index()
+        
+        candidates = []
+        seen_paths = set()
         
         try:
-            for ext in code_extensions:
-                if file_count >= max_files:
-                    break
-                    
-                for file_path in workspace_path.rglob(f'*{ext}'):
-                    if file_count >= max_files:
-                        break
-                    
-                    # Skip common directories to ignore
-                    if any(skip in file_path.parts for skip in ['node_modules', '.git', 'build', 'dist', 'target', '__pycache__']):
-                        continue
-                    
-                    try:
-                        # Read file content
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            lines = f.readlines()[:max_lines_per_file]
-                            content = ''.join(lines)
-                            
-                        relative_path = file_path.relative_to(workspace_path)
-                        relevant_files.append({
-                            'path': str(relative_path),
-                            'content': content,
-                            'lines': len(lines)
-                        })
-                        file_count += 1
-                    except Exception as e:
+            with self._workspace_lock:
+                listing = self.hot_workspace_listing()
+                hot = listing is not None
+                if not hot:
+                    watched = self.watcher_ready() and not self.change_scoped()
+                    listing = self.list_workspace()
+                    index.set_layout(listing['layout'])
+                    index.set_paths(listing['paths'])  # Every source path, for stack trace resolution
+                    listing['structure'] = self.get_workspace_structure()
+                    if watched:
+                        self._workspace_listing = listing
+                
+                listed = []
+                entries = {}
+                misses = []
+                for file_path, stat, path in (
+                        (file_path, stat, prefix + file_path[len(root_prefix):])
+                        for ext in self.config['code_extensions']
+                        for prefix, root, root_prefix, files_by_ext, changed in listing['roots']
+                        for file_path, stat in files_by_ext.get(ext, [])
+                        if changed is None or file_path in changed):
+                    if hot:
+                        entry = index.lookup(path)  # Files the watcher keeps current need no stat
+                        if entry is not None:
+                            listed.append(path)
+                            entries[path] = entry
+                            continue
+                        stat = None
+                    if stat is None:
+                        # Git-listed files arrive without a stat; skip ones deleted from the working tree
+                        try:
+                            stat = os.stat(file_path)
+                        except OSError:
+                            continue
+                        if not S_ISREG(stat.st_mode):
+                            continue
+                    listed.append(path)
+                    entry = None if hot else index.lookup(path, stat.st_mtime_ns, stat.st_size)
+                    if entry is None:
+                        misses.append((file_path, stat, path))
+                    else:
+                        entries[path] = entry
+                
+                if misses:
+                    with ThreadPoolExecutor(max_workers=self.config['scan_workers']) as pool:
+                        entries.update(self.store_indexed_files(misses, self.index_files(misses, pool)))
+                
+                for path in listed:
+                    entry = entries.get(path)
+                    if entry is None:
                         continue
+                    seen_paths.add(path)
+                    if not entry.get('skipped'):
+                        candidates.append(path)
+                relevant_files = [self.indexed_file_info(path)
+                                  for path in candidates[:self.config['max_scan_files']]]
+                
+                scopes = listing['scopes']
+                scoped = [scope for scope in scopes if 'since' in scope]
+                if not hot:
+                    # A change-scoped scan keeps the cached entries of unchanged files
+                    index.prune(set(index.paths) if scoped else seen_paths)
+                    index.save()
             
+            discovery = {'source': '+'.join(sorted({scope['source'] for scope in scopes})),
+                         'roots': len(scopes), 'shards': len(index.shards), 'hot': hot}
+            if scoped:
+                discovery.update(changed_files=sum(scope['changed_files'] for scope in scoped),
+                                 since=scoped[0]['since'])
             return {
-                'total_files': file_count,
+                'total_files': len(candidates),
                 'files': relevant_files,
-                'workspace_structure': self.get_workspace_structure()
+                'candidates': candidates,
+                'workspace_structure': listing['structure'],
+                'discovery': discovery
             }
         except Exception as e:
             return {
@@ -323,26 +3742,136 @@ Labels:
                 'error': str(e)
             }
     
-    def get_workspace_structure(self):
-        """Get high-level workspace structure"""
-        workspace_path = Path(self.config['workspace_path'])
-        structure = []
+    def list_workspace(self):
+        """List the source files of every workspace root
         
-        try:
-            for item in workspace_path.iterdir():
-                if item.name.startswith('.'):
-                    continue
-                if item.is_dir():
-                    structure.append(f"[DIR] {item.name}/")
-                else:
-                    structure.append(f"[FILE] {item.name}")
-        except Exception:
-            pass
+        Returns {'roots': [(prefix, root, root prefix, files_by_ext, changed), ...],
+        'scopes', 'layout', 'paths'} where changed is the set of absolute paths a
+        change-scoped scan is restricted to (None for a full scan), layout the
+        index shards and paths every source file as a workspace path.
+        """
+        listing = {'roots': [], 'scopes': [], 'layout': {}, 'paths': []}
+        for prefix, root in self.workspace_roots():
+            files_by_ext, scope = self.discover_source_files(root)
+            root_prefix = os.path.join(str(root), '')  # Both listings join onto this root
+            changed = scope.pop('changed')
+            if changed is not None:
+                changed = set(root_prefix + path.replace('/', os.sep) for path in changed)
+            listing['roots'].append((prefix, root, root_prefix, files_by_ext, changed))
+            listing['scopes'].append(scope)
+            
+            rel_paths = self.listed_paths(root_prefix, files_by_ext)
+            listing['layout'].update(self.shard_layout(prefix, root, rel_paths))
+            listing['paths'].extend(prefix + rel_path for rel_path in rel_paths)
+        return listing
+    
+    def listed_paths(self, root_prefix, files_by_ext):
+        """Root-relative paths of a files_by_ext listing, in scan order"""
+        return [file_path[len(root_prefix):] for ext in self.config['code_extensions']
+                for file_path, stat in files_by_ext.get(ext, [])]
+    
+    def store_indexed_files(self, misses, results):
+        """Store index_files() results in the workspace index; returns {path: entry}"""
+        index = self.get_workspace_index()
+        entries = {}
+        for (file_path, stat, path), (loaded, error) in zip(misses, results):
+            if error is not None:
+                continue
+            if loaded is None:
+                entries[path] = index.store(path, stat.st_mtime_ns, stat.st_size, '', 0, skipped=True)
+            else:
+                content, line_count, terms, symbols = loaded
+                entries[path] = index.store(path, stat.st_mtime_ns, stat.st_size, content,
+                                            line_count, terms, symbols=symbols)
+        return entries
+    
+    def index_files(self, misses, thread_pool):
+        """index_source_file results for [(file_path, stat, path), ...], in order
+        
+        Large batches (a cold index) go to the process pool so tokenizing and
+        chunking use every core; small ones stay on the scan's thread pool. If the
+        process pool cannot be used the batch falls back to threads.
+        """
+        tasks = [(file_path, path, self.config['max_lines_per_file'], self.config['max_file_bytes'])
+                 for file_path, stat, path in misses]
+        processes = self.config['index_processes']
+        if processes > 1 and len(tasks) >= self.config['process_pool_min_files']:
+            try:
+                chunksize = max(1, min(64, len(tasks) // (processes * 4)))
+                return list(get_index_pool(processes).map(index_source_file, tasks, chunksize=chunksize))
+            except Exception as e:
+                print(f"Process pool unavailable ({e}); indexing on threads")
+                reset_index_pool()
+        return list(thread_pool.map(index_source_file, tasks))
+    
+    def shard_layout(self, prefix, root, rel_paths):
+        """{path prefix: directory} of the index shards for one root
+        
+        A root with more than SHARD_SPLIT_FILES source files (a monorepo) gets a
+        shard per top-level directory plus one for the files at its top level.
+        """
+        layout = {prefix: root}
+        if len(rel_paths) > self.config['shard_split_files']:
+            for top in {rel_path.split(os.sep, 1)[0] for rel_path in rel_paths if os.sep in rel_path}:
+                layout[prefix + top + os.sep] = root / top
+        return layout
+    
+    def discover_source_files(self, workspace_path):
+        """List a workspace root's source files by extension and work out the change scope
         
+        Returns (files_by_ext, scope). scope['changed'] is the set of changed
+        relative paths to restrict the scan to, or None for a full scan.
+        """
+        extensions = self.config['code_extensions']
+        files_by_ext = None
+        if self.config['use_git_index']:
+            files_by_ext = git_source_files(workspace_path, extensions, self.config['ignore_dirs'],
+                                            self.config['scan_untracked_files'])
+        scope = {'source': 'git', 'changed': None}
+        if files_by_ext is None:
+            # One pruned pass over the tree, files bucketed by extension
+            files_by_ext = walk_workspace(workspace_path, extensions, self.config['ignore_dirs'])
+            scope['source'] = 'walk'
+        
+        since = self.config['scan_changed_since']
+        recent_commits = self.config['scan_recent_commits']
+        if since or recent_commits:
+            changed = git_changed_files(workspace_path, since, recent_commits) if scope['source'] == 'git' else None
+            if changed is None:
+                print(f"Could not list changed files in {workspace_path} (not a git repository or "
+                      f"unknown ref); scanning all files")
+            else:
+                scope.update(changed=changed, changed_files=len(changed),
+                             since=f"last {recent_commits} commits" if recent_commits else since)
+        return files_by_ext, scope
+    
+    def get_workspace_structure(self):
+        """Get high-level workspace structure (top level of every root)"""
+        structure = []
+
+        for prefix, workspace_path in self.workspace_roots():
+            try:
+                for item in workspace_path.iterdir():
+                    if item.name.startswith('.'):
+                        continue
+                    if item.is_dir():
+                        structure.append(f"[DIR] {prefix}{item.name}/")
+                    else:
+                        structure.append(f"[FILE] {prefix}{item.name}")
+            except Exception:
+                pass
+
         return structure[:30]  # Limit to first 30 items
     
-    def call_openai_api(self, bug_id, summary, description, workspace_context):
-        """Call OpenAI API for real AI-powered bug analysis"""
+    def call_openai_api(self, bug_id, summary, description, workspace_context, bypass_cache=False,
+                        on_token=None, related_context=''):
+        """Call OpenAI API for real AI-powered bug analysis
+        
+        Identical requests are answered from the local response cache unless
+        bypass_cache is set or LLM_CACHE_ENABLED is off. With OPENAI_STREAM the
+        answer is streamed and each piece is passed to on_token as it arrives;
+        the returned text has the header and footer added once the stream ends.
+        """
         try:
             openai_api_key = self.config.get('openai_api_key', '').strip()
             
@@ -350,63 +3879,13 @@ Labels:
                 raise Exception("No OpenAI API key available. Please configure OPENAI_API_KEY in the script.")
             
             # OpenAI API endpoint
-            api_url = "https://api.openai.com/v1/chat/completions"
+            api_url = self.config['openai_api_url']
             
             # Construct comprehensive prompt with workspace context
-            workspace_files_summary = "\n".join([
-                f"- {f['path']} ({f['lines']} lines)" 
-                for f in workspace_context.get('files', [])[:15]
-            ])
-            
-            workspace_structure = "\n".join(workspace_context.get('workspace_structure', []))
-            
-            # Include sample code from relevant files
-            code_samples = ""
-            for idx, file_info in enumerate(workspace_context.get('files', [])[:8], 1):
-                code_samples += f"\n--- File {idx}: {file_info['path']} ---\n"
-                code_samples += file_info['content'][:1500]  # First 1500 chars
-                code_samples += "\n"
-            
-            prompt = f"""You are an expert software engineer analyzing a JIRA bug with access to the actual codebase.
-
-**JIRA BUG DETAILS:**
-Bug ID: {bug_id}
-Summary: {summary}
-Description: {description}
-
-**PROJECT CONTEXT:**
-- Project: {self.PROJECT_NAME}
-- Technologies: {', '.join(self.PROJECT_TECHNOLOGIES)}
-- Components: {', '.join(self.PROJECT_COMPONENTS)}
-- Workspace: {self.config['workspace_path']}
-
-**WORKSPACE ANALYSIS:**
-Total Files Scanned: {workspace_context.get('total_files', 0)}
-
-Workspace Structure:
-{workspace_structure}
-
-Relevant Code Files:
-{workspace_files_summary}
-
-**CODE SAMPLES FROM WORKSPACE:**
-{code_samples}
-
-**TASK:**
-Analyze this bug in the context of the actual codebase above. Provide a comprehensive analysis with:
-
-1. **Root Cause Analysis**: Based on the code patterns observed, identify the likely root cause
-2. **Affected Files/Components**: List specific files from the workspace that might be affected
-3. **Detailed Fix Recommendations**: 
-   - Provide step-by-step fix recommendations
-   - Include code examples that match the project's technology stack
-   - Suggest specific changes to the files listed above
-4. **Testing Approach**: Recommend unit tests, integration tests specific to this codebase
-5. **Potential Side Effects**: Warn about potential impacts on related components
-6. **Implementation Steps**: Provide a clear action plan
-
-Focus on providing actionable, code-specific suggestions based on the actual project structure and code samples provided.
-"""
+            with self.telemetry.span('prompt', step='build') as span:
+                prompt, token_report = self.build_prompt(bug_id, summary, description, workspace_context,
+                                                         related_context)
+                span['tokens'] = token_report['total']
 
             # OpenAI API headers
             headers = {
@@ -416,11 +3895,11 @@ Focus on providing actionable, code-specific suggestions based on the actual pro
             
             # Payload for OpenAI
             payload = {
-                "model": "gpt-4o-2024-11-20",  # Using latest GPT-4o model (Nov 2024)
+                "model": self.config['openai_model'],
                 "messages": [
                     {
                         "role": "system",
-                        "content": "You are an expert software engineer specializing in bug analysis and debugging. Provide detailed, actionable suggestions based on the codebase provided. Format your response clearly with sections and bullet points."
+                        "content": SYSTEM_PROMPT
                     },
                     {
                         "role": "user",
@@ -428,45 +3907,62 @@ Focus on providing actionable, code-specific suggestions based on the actual pro
                     }
                 ],
                 "temperature": 0.7,
-                "max_tokens": 3000
+                "max_tokens": self.config['max_completion_tokens']
             }
             
-            response = requests.post(api_url, headers=headers, json=payload, timeout=90)
+            cache_key = self.response_cache.key_for(api_url, payload)
+            if not self.config['llm_cache_enabled']:
+                cache_status = 'off'
+            elif bypass_cache:
+                cache_status = 'bypass'
+            else:
+                lookup_started = time.perf_counter()
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    self.telemetry.add_span('llm', lookup_started, model=payload['model'], cache='hit',
+                                            usage=cached.get('usage') or {})
+                    with self.telemetry.span('render'):
+                        return self.format_ai_analysis(bug_id, cached['content'], workspace_context,
+                                                       token_report, cached=True)
+                cache_status = 'miss'
+            
+            stream = self.config['openai_stream']
+            if stream:
+                payload = dict(payload, stream=True, stream_options={"include_usage": True})
+            
+            # Charge the prompt plus the largest possible answer to the token bucket
+            estimated_tokens = token_report['total'] + self.config['max_completion_tokens']
+            with self.telemetry.span('llm', model=payload['model'], cache=cache_status, stream=stream) as span:
+                requested = time.perf_counter()
+                response = self.run_cancellable(self.http.post, api_url, 'openai', headers=headers, json=payload,
+                                                stream=stream, rate_tokens=estimated_tokens)
+                span['status'] = response.status_code
+                
+                if response.status_code == 200:
+                    if stream:
+                        def first_token(text):
+                            span.setdefault('first_token_seconds', round(time.perf_counter() - requested, 4))
+                            if on_token:
+                                on_token(text)
+                        # Read the stream where Cancel can cut it off, even while it stalls
+                        ai_analysis, usage = self.run_cancellable(self.read_streamed_completion,
+                                                                  response, first_token)
+                    else:
+                        result = response.json()
+                        ai_analysis = result['choices'][0]['message']['content']
+                        usage = result.get('usage')
+                    span['usage'] = usage or {}
             
             if response.status_code == 200:
-                result = response.json()
-                ai_analysis = result['choices'][0]['message']['content']
+                if usage and 'openai' in self.http.limiters:
+                    self.http.limiters['openai'].record_usage(estimated_tokens, usage.get('total_tokens'))
+                if self.config['llm_cache_enabled']:
+                    self.response_cache.put(cache_key, ai_analysis, usage)
+                if self.config['duplicate_detection']:
+                    self.analysis_history.add(bug_id, summary, description, ai_analysis)
                 
-                # Add metadata about workspace analysis
-                full_analysis = f"""
-╔══════════════════════════════════════════════════════════════════╗
-║     AI-POWERED BUG FIX ANALYSIS FOR {bug_id} (GPT-4o-2024-11-20) ║
-╚══════════════════════════════════════════════════════════════════╝
-
-PROJECT: {self.PROJECT_NAME}
-WORKSPACE: {self.config['workspace_path']}
-
-📁 WORKSPACE SCAN RESULTS:
-   • Total files analyzed: {workspace_context.get('total_files', 0)}
-   • File types: {', '.join(self.PROJECT_TECHNOLOGIES)}
-   • Workspace structure: {len(workspace_context.get('workspace_structure', []))} items
-
-═══════════════════════════════════════════════════════════════════
-
-{ai_analysis}
-
-═══════════════════════════════════════════════════════════════════
-
-💡 NOTE: This analysis was generated by OpenAI GPT-4o (Nov 2024) based on:
-   - JIRA bug details (Bug ID, Summary, Description)
-   - Actual workspace code structure
-   - {workspace_context.get('total_files', 0)} source code files scanned
-   - Project technologies: {', '.join(self.PROJECT_TECHNOLOGIES)}
-   - Code samples from key files
-
-═══════════════════════════════════════════════════════════════════
-"""
-                return full_analysis
+                with self.telemetry.span('render'):
+                    return self.format_ai_analysis(bug_id, ai_analysis, workspace_context, token_report)
             else:
                 # Handle API errors
                 error_msg = f"OpenAI API Error: {response.status_code}"
@@ -514,69 +4010,247 @@ WORKSPACE: {self.config['workspace_path']}
 ⚠️  OpenAI API unavailable ({error_msg}{error_detail})
 Providing pattern-based analysis instead:
 
-{fallback}
-"""
-        except Exception as e:
-            # Fallback to pattern-based analysis
-            print(f"❌ Exception calling OpenAI: {str(e)}")
-            fallback = self.generate_intelligent_analysis(bug_id, summary, description)
-            return f"""
-⚠️  OpenAI API Error: {str(e)}
-Providing pattern-based analysis instead:
+{fallback}
+"""
+        except AnalysisCancelled:
+            raise
+        except Exception as e:
+            # Fallback to pattern-based analysis
+            print(f"❌ Exception calling OpenAI: {str(e)}")
+            fallback = self.generate_intelligent_analysis(bug_id, summary, description)
+            return f"""
+⚠️  OpenAI API Error: {str(e)}
+Providing pattern-based analysis instead:
+
+{fallback}
+"""
+    
+    def read_streamed_completion(self, response, on_token=None):
+        """Collect a streamed chat completion, passing each content delta to on_token
+        
+        Returns (text, usage); usage comes from the final chunk when the API sends it.
+        Run under run_cancellable() so Cancel closes the connection mid-stream.
+        """
+        parts = []
+        usage = None
+        try:
+            with HttpCallScope.reading(response):
+                for event in iter_sse_events(response, self.check_cancelled):
+                    if event.get('usage'):
+                        usage = event['usage']
+                    for choice in event.get('choices', []):
+                        delta = choice.get('delta', {}).get('content')
+                        if delta:
+                            parts.append(delta)
+                            if on_token:
+                                on_token(delta)
+        finally:
+            response.close()
+        return ''.join(parts), usage
+    
+    def build_prompt(self, bug_id, summary, description, workspace_context, related_context=''):
+        """Build the analysis prompt inside the prompt token budget
+        
+        The fixed template, file list and workspace structure are always sent. The
+        description gets up to a quarter of the budget, source around stack
+        trace frames found in it another quarter, related JIRA context
+        (comments, links, subtasks) up to a fifth, and the rest is filled with
+        code from the highest-ranked files. A file that does not fit whole
+        contributes its functions/methods that best match the bug text, whole;
+        without a match it falls back to its head, cut at a block boundary.
+        Returns (prompt, token_report) with the tokens used per section.
+        """
+        counter = get_token_counter(self.config['openai_model'])
+        budget = min(self.config['prompt_input_budget'],
+                     self.config['model_context_window'] - self.config['max_completion_tokens'])
+        files = workspace_context.get('files', [])
+        
+        sections = {
+            'bug_id': bug_id,
+            'summary': summary,
+            'description': '',
+            'stack_context': '',
+            'related_context': '',
+            'project_name': self.PROJECT_NAME,
+            'technologies': ', '.join(self.PROJECT_TECHNOLOGIES),
+            'components': ', '.join(self.PROJECT_COMPONENTS),
+            'workspace': self.workspace_label(),
+            'total_files': workspace_context.get('total_files', 0),
+            'workspace_structure': "\n".join(workspace_context.get('workspace_structure', [])),
+            'workspace_files_summary': "\n".join([
+                f"- {f['path']} ({f['lines']} lines)" 
+                for f in files[:15]
+            ]),
+            'code_samples': ''
+        }
+        
+        packer = PromptPacker(counter, budget)
+        packer.reserve('template', SYSTEM_PROMPT)
+        packer.reserve('template', PROMPT_TEMPLATE.format(**sections))
+        sections['description'], _, _ = packer.add('description', description, max_tokens=budget // 4)
+        stack_context, resolved_frames, _ = self.resolve_stack_context(description)
+        if stack_context:
+            heading = "\n**SOURCE AT STACK TRACE / FILE:LINE REFERENCES (>> marks the referenced line):**\n"
+            packer.reserve('stack_context', heading + "\n")
+            packed, _, _ = packer.add('stack_context', stack_context, max_tokens=budget // 4)
+            sections['stack_context'] = f"{heading}{packed}\n"
+            packer.report['stack_frames'] = resolved_frames
+        if related_context:
+            heading = "\n**RELATED JIRA CONTEXT (comments, linked issues, subtasks):**\n"
+            packer.reserve('related_context', heading + "\n")
+            packed, _, _ = packer.add('related_context', related_context, max_tokens=budget // 5)
+            sections['related_context'] = f"{heading}{packed}\n"
+        
+        query_tokens = set(tokenize_identifiers(f"{summary}\n{description}"))
+        search_index = self.get_search_index(workspace_context) if files and query_tokens else None
+        idf = search_index.idf if search_index is not None else None
+        
+        # Include code from the most relevant files until the budget is used up
+        code_samples = ""
+        for idx, file_info in enumerate(files, 1):
+            header = f"\n--- File {idx}: {file_info['path']} ---\n"
+            # Leave room for the longest header variant (with the symbol note) and its blank line
+            header_tokens = counter.count(f"\n--- File {idx}: {file_info['path']} ({len(file_info.get('symbols') or [])} "
+                                          f"relevant symbols of {file_info['lines']} lines) ---\n\n")
+            if packer.remaining <= header_tokens + 20:
+                break
+            file_limit = min(self.config['prompt_max_tokens_per_file'], packer.remaining) - header_tokens
+            
+            chunks = []
+            if file_info.get('symbols') and counter.count(file_info['content']) > file_limit:
+                chunks = select_symbol_chunks(file_info['content'], file_info['symbols'], query_tokens,
+                                              file_limit, counter, idf)
+            if chunks:
+                snippet = ''.join(text for symbol, text in chunks)
+                packer.reserve('code_samples', snippet)
+                header = (f"\n--- File {idx}: {file_info['path']} "
+                          f"({len(chunks)} relevant symbols of {file_info['lines']} lines) ---\n")
+                packer.report['code_symbols'] = packer.report.get('code_symbols', 0) + len(chunks)
+            else:
+                snippet, kept, total = packer.add('code_samples', file_info['content'], file_limit)
+                if not snippet:
+                    continue
+                if kept < total:
+                    header = f"\n--- File {idx}: {file_info['path']} (lines 1-{kept} of {total}) ---\n"
+            packer.reserve('code_samples', header + "\n")
+            code_samples += header + snippet + "\n"
+            packer.report['code_files'] = packer.report.get('code_files', 0) + 1
+        sections['code_samples'] = code_samples
+        
+        prompt = PROMPT_TEMPLATE.format(**sections)
+        token_report = dict(packer.report, budget=budget,
+                            total=counter.count(SYSTEM_PROMPT) + counter.count(prompt))
+        return prompt, token_report
+    
+    def format_ai_analysis(self, bug_id, ai_analysis, workspace_context, token_report=None, cached=False):
+        """Wrap the model's answer with the analysis header and footer"""
+        cache_note = "\n⚡ Served from the local response cache (identical request analyzed before)\n" if cached else ""
+        token_note = ""
+        if token_report:
+            token_note = (f"\n   - Prompt: {token_report['total']} of {token_report['budget']} budgeted tokens "
+                          f"(description {token_report.get('description', 0)}, "
+                          f"code {token_report.get('code_samples', 0)} from {token_report.get('code_files', 0)} files, "
+                          f"{token_report.get('code_symbols', 0)} whole functions/classes, "
+                          f"{token_report.get('stack_frames', 0)} stack frames resolved)")
+        discovery = workspace_context.get('discovery', {})
+        scope_note = ""
+        if discovery.get('since'):
+            scope_note = (f"\n   • Scope: {discovery['changed_files']} files changed "
+                          f"({discovery['since']}, uncommitted and untracked included)")
+        
+        # Add metadata about workspace analysis
+        full_analysis = f"""
+╔══════════════════════════════════════════════════════════════════╗
+║     AI-POWERED BUG FIX ANALYSIS FOR {bug_id} (GPT-4o-2024-11-20) ║
+╚══════════════════════════════════════════════════════════════════╝
+
+PROJECT: {self.PROJECT_NAME}
+WORKSPACE: {self.workspace_label()}
+{cache_note}
+📁 WORKSPACE SCAN RESULTS:
+   • Total files analyzed: {workspace_context.get('total_files', 0)}
+   • File types: {', '.join(self.PROJECT_TECHNOLOGIES)}
+   • Workspace structure: {len(workspace_context.get('workspace_structure', []))} items{scope_note}
 
-{fallback}
+═══════════════════════════════════════════════════════════════════
+
+{ai_analysis}
+
+═══════════════════════════════════════════════════════════════════
+
+💡 NOTE: This analysis was generated by OpenAI GPT-4o (Nov 2024) based on:
+   - JIRA bug details (Bug ID, Summary, Description)
+   - Actual workspace code structure
+   - {workspace_context.get('total_files', 0)} source code files scanned
+   - Project technologies: {', '.join(self.PROJECT_TECHNOLOGIES)}
+   - Code samples from key files{token_note}
+
+═══════════════════════════════════════════════════════════════════
 """
+        return full_analysis
+    
+    def response_cache_stats(self):
+        """Report hit/miss counts of the LLM response cache"""
+        return self.response_cache.stats()
     
     def extract_text_from_adf(self, adf_content):
         """Extract plain text from Atlassian Document Format (ADF)"""
         try:
-            text_parts = []
-            
-            def extract_text(node, depth=0):
-                if isinstance(node, dict):
-                    node_type = node.get('type', '')
-                    
-                    # Handle paragraph breaks
-                    if node_type == 'paragraph' and depth > 0:
-                        text_parts.append('\n')
-                    
-                    # Handle text nodes
-                    if node_type == 'text':
-                        text_parts.append(node.get('text', ''))
-                    
-                    # Handle hard breaks
-                    if node_type == 'hardBreak':
-                        text_parts.append('\n')
-                    
-                    # Handle list items
-                    if node_type in ['bulletList', 'orderedList']:
-                        text_parts.append('\n')
-                    
-                    if node_type == 'listItem':
-                        text_parts.append('\n• ')
-                    
-                    # Recursively process content
-                    if 'content' in node:
-                        for child in node['content']:
-                            extract_text(child, depth + 1)
-                    
-                    # Add paragraph break after paragraph
-                    if node_type == 'paragraph':
-                        text_parts.append('\n')
-                        
-                elif isinstance(node, list):
-                    for item in node:
-                        extract_text(item, depth)
-            
-            extract_text(adf_content)
-            result = ''.join(text_parts).strip()
-            # Clean up multiple consecutive newlines
-            import re
-            result = re.sub(r'\n{3,}', '\n\n', result)
-            return result
+            return render_adf(adf_content)
         except Exception as e:
             return f"[Could not parse description: {str(e)}]"
     
+    def adf_to_text(self, value, cache_key=None):
+        """Plain text of a rich-text value (ADF document or string), memoized under cache_key"""
+        if not isinstance(value, dict):
+            return str(value) if value else ''
+        if cache_key is not None:
+            with self._adf_cache_lock:
+                text = self._adf_cache.get(cache_key)
+                if text is not None:
+                    self._adf_cache.move_to_end(cache_key)
+                    return text
+        
+        with self.telemetry.span('adf', field=cache_key[2] if cache_key else None):
+            text = self.extract_text_from_adf(value)
+        if cache_key is not None:
+            with self._adf_cache_lock:
+                self._adf_cache[cache_key] = text
+                while len(self._adf_cache) > self.config['adf_cache_size']:
+                    self._adf_cache.popitem(last=False)
+        return text
+    
+    def issue_field_text(self, bug_data, field):
+        """Plain text of an issue field, rendered once per issue key, revision ('updated') and field"""
+        fields = bug_data.get('fields', {})
+        revision = fields.get('updated')
+        cache_key = (bug_data.get('key'), revision, field) if revision else None
+        return self.adf_to_text(fields.get(field), cache_key)
+    
+    def get_rule_engine(self):
+        """Return (RuleEngine, {technology: advice}) for the fallback analysis
+        
+        FALLBACK_RULES, the project's component and technology names and the
+        generic issue words are compiled into one matcher, cached until
+        PROJECT_COMPONENTS or PROJECT_TECHNOLOGIES change.
+        """
+        cache_key = (tuple(self.PROJECT_COMPONENTS), tuple(self.PROJECT_TECHNOLOGIES))
+        cached_key, engine, technology_advice = self._rule_engine_cache
+        if cached_key != cache_key:
+            rules = [(rule['id'], rule['keywords']) for rule in FALLBACK_RULES]
+            rules.append(('generic', GENERIC_ISSUE_KEYWORDS))
+            rules.extend((f"component:{component}", (component,)) for component in self.PROJECT_COMPONENTS)
+            rules.extend((f"tech:{tech}", (tech,)) for tech in self.PROJECT_TECHNOLOGIES)
+            engine = RuleEngine(rules)
+            
+            technology_advice = {}
+            for tech in self.PROJECT_TECHNOLOGIES:
+                rows = TECHNOLOGY_ENGINE.match(tech)
+                if rows:
+                    technology_advice[tech] = TECHNOLOGY_ADVICE[min(rows)][1]
+            self._rule_engine_cache = (cache_key, engine, technology_advice)
+        return engine, technology_advice
+    
     def generate_intelligent_analysis_with_context(self, bug_id, summary, description, workspace_context):
         """Generate intelligent bug fix suggestions WITH workspace context"""
         
@@ -605,19 +4279,21 @@ Providing pattern-based analysis instead:
 💡 RECOMMENDED FILES TO CHECK:
    Based on the bug description and workspace scan, start by reviewing:
 """
-            # Match keywords from bug to files
-            text_lower = (summary + " " + description).lower()
-            matched_files = []
-            
-            for file_info in workspace_files:
-                file_path_lower = file_info['path'].lower()
-                # Check if bug keywords match file names
-                if any(keyword in file_path_lower for keyword in ['handler', 'manager', 'service', 'controller', 'processor', 'worker']):
-                    matched_files.append(file_info['path'])
+            # Match the bug text against the files (BM25 over paths and identifiers)
+            relevance = workspace_context.get('relevance')
+            if relevance is None:
+                relevance = self.rank_workspace_files(workspace_context, f"{summary}\n{description}").get('relevance', {})
+            matched_files = [(path, score) for path, score in sorted(relevance.items(), key=lambda item: -item[1])
+                             if score > 0]
+            if not matched_files:
+                # Nothing in the text matched: fall back to files named after typical roles
+                matched_files = [(file_info['path'], None) for file_info in workspace_files
+                                 if ROLE_FILE_PATTERN.search(os.path.basename(file_info['path']))]
             
             if matched_files:
-                for file_path in matched_files[:5]:
-                    workspace_section += f"   • {file_path}\n"
+                for file_path, score in matched_files[:5]:
+                    score_note = f" (relevance {score:g})" if score is not None else ""
+                    workspace_section += f"   • {file_path}{score_note}\n"
             else:
                 workspace_section += f"   • Review the files listed above that match the bug's component/area\n"
         else:
@@ -638,8 +4314,9 @@ Providing pattern-based analysis instead:
         if not isinstance(description, str):
             description = str(description)
         
-        # Analyze keywords in summary and description
-        text = (summary + " " + description).lower()
+        # Match all rules, component and technology names against summary and description
+        engine, technology_advice = self.get_rule_engine()
+        matches = engine.match(summary + " " + description)
         
         analysis = f"""
 ╔══════════════════════════════════════════════════════════════════╗
@@ -647,68 +4324,18 @@ Providing pattern-based analysis instead:
 ╚══════════════════════════════════════════════════════════════════╝
 
 PROJECT: {self.PROJECT_NAME}
-WORKSPACE: {self.config['workspace_path']}
+WORKSPACE: {self.workspace_label()}
 
 📊 ROOT CAUSE ANALYSIS:
 """
         
-        # Generic issue pattern detection
+        # Issue categories ordered by match score (one regex pass over the text)
         issues_found = False
-        
-        if any(keyword in text for keyword in ['memory', 'leak', 'crash', 'segfault', 'null pointer', 'nullptr']):
-            analysis += """
-   • Potential memory management issue detected
-   • May involve improper pointer handling or resource cleanup
-   • Check for null pointer dereferences and memory leaks
-"""
-            issues_found = True
-        
-        if any(keyword in text for keyword in ['performance', 'slow', 'timeout', 'latency', 'hang', 'freeze']):
-            analysis += """
-   • Performance bottleneck identified
-   • May involve database queries, network calls, or inefficient algorithms
-   • Review transaction processing, caching, and optimization
-"""
-            issues_found = True
-        
-        if any(keyword in text for keyword in ['database', 'sql', 'query', 'connection', 'deadlock']):
-            analysis += """
-   • Database connectivity or query issue
-   • May involve connection pool exhaustion or query optimization
-   • Review database transaction handling and indexing
-"""
-            issues_found = True
-        
-        if any(keyword in text for keyword in ['authentication', 'login', 'auth', 'permission', 'access denied']):
-            analysis += """
-   • Authentication/Authorization issue detected
-   • May involve incorrect credentials, tokens, or permissions
-   • Review security configuration and access control logic
-"""
-            issues_found = True
-        
-        if any(keyword in text for keyword in ['api', 'rest', 'endpoint', 'http', '404', '500', 'response']):
-            analysis += """
-   • API/REST endpoint issue detected
-   • May involve incorrect routing, request/response handling
-   • Review API controllers, middleware, and error handling
-"""
-            issues_found = True
-        
-        if any(keyword in text for keyword in ['frontend', 'ui', 'display', 'render', 'css', 'javascript']):
-            analysis += """
-   • Frontend/UI issue detected
-   • May involve rendering problems, styling, or client-side logic
-   • Review component logic, state management, and CSS
-"""
-            issues_found = True
-        
-        if any(keyword in text for keyword in ['error', 'exception', 'stack trace', 'failed']):
-            analysis += """
-   • Exception/Error handling issue detected
-   • May involve unhandled exceptions or improper error propagation
-   • Review try-catch blocks and error handling middleware
-"""
+        for (score, hits), rule in sorted(((matches[rule['id']], rule) for rule in FALLBACK_RULES
+                                           if rule['id'] in matches), key=lambda item: -item[0][0]):
+            first, *rest = rule['findings']
+            analysis += f"\n   • {first} (score {score:g}: {', '.join(hits)})\n"
+            analysis += ''.join(f"   • {line}\n" for line in rest)
             issues_found = True
         
         if not issues_found:
@@ -729,7 +4356,7 @@ Based on your project components: {', '.join(self.PROJECT_COMPONENTS)}
         # Suggest components based on keywords
         component_suggestions = []
         for component in self.PROJECT_COMPONENTS:
-            if component.lower() in text:
+            if f"component:{component}" in matches:
                 component_suggestions.append(f"   • {component} component")
         
         if component_suggestions:
@@ -763,36 +4390,12 @@ Based on your project components: {', '.join(self.PROJECT_COMPONENTS)}
 """
         
         # Add technology-specific recommendations
+        mentions_issue = 'generic' in matches
         for tech in self.PROJECT_TECHNOLOGIES:
-            tech_lower = tech.lower()
-            if tech_lower in text or any(t.lower() in text for t in ['bug', 'error', 'issue']):
-                if 'python' in tech_lower:
-                    analysis += """
-   • Python: Check for proper exception handling, use type hints
-"""
-                elif 'java' in tech_lower:
-                    analysis += """
-   • Java: Review try-catch blocks, check for resource leaks
-"""
-                elif 'c++' in tech_lower or 'cpp' in tech_lower:
-                    analysis += """
-   • C++: Verify memory management, use smart pointers
-"""
-                elif 'javascript' in tech_lower or 'js' in tech_lower or 'node' in tech_lower:
-                    analysis += """
-   • JavaScript/Node.js: Check async/await usage, handle promises
-"""
-                elif 'react' in tech_lower:
-                    analysis += """
-   • React: Review component lifecycle, state management
-"""
-                elif 'database' in tech_lower or 'sql' in tech_lower:
-                    analysis += """
-   • Database: Optimize queries, check indexes, review transactions
-"""
-                elif 'docker' in tech_lower or 'kubernetes' in tech_lower:
-                    analysis += """
-   • Container/Orchestration: Review configurations, resource limits
+            advice = technology_advice.get(tech)
+            if advice and (f"tech:{tech}" in matches or mentions_issue):
+                analysis += f"""
+   • {advice}
 """
 
         analysis += """
@@ -894,6 +4497,357 @@ Based on your project components: {', '.join(self.PROJECT_COMPONENTS)}
         
         return analysis
     
+    def search_jira_issues(self, jql, max_results=None):
+        """Return the issue keys matching a JQL query (paginated)"""
+        url = f"{self.config['jira_base_url']}/rest/api/3/search/jql"
+        auth = self.jira_auth()
+        headers = {"Accept": "application/json"}
+        
+        keys = []
+        next_page_token = None
+        try:
+            while max_results is None or len(keys) < max_results:
+                params = {"jql": jql, "fields": "key", "maxResults": 100}
+                if next_page_token:
+                    params["nextPageToken"] = next_page_token
+                
+                response = self.http.get(url, 'jira', headers=headers, auth=auth, params=params)
+                response.raise_for_status()
+                data = response.json()
+                
+                keys.extend(issue['key'] for issue in data.get('issues', []))
+                next_page_token = data.get('nextPageToken')
+                if not next_page_token or data.get('isLast', False):
+                    break
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Failed to search JIRA issues: {str(e)}")
+        
+        return keys[:max_results] if max_results is not None else keys
+    
+    def analyze_issue(self, bug_id, workspace_context=None, bypass_cache=False):
+        """Run the full analysis for one issue and return a result dict"""
+        started = time.perf_counter()
+        trace = self.telemetry.start(bug_id)
+        try:
+            bug_data = self.fetch_issue_context(bug_id)
+            with self.telemetry.span('render'):
+                details = self.format_bug_details(bug_data)
+            result = {
+                'key': bug_id,
+                'summary': bug_data.get('fields', {}).get('summary', ''),
+                'details': details,
+                'analysis': self.generate_copilot_analysis(bug_data, workspace_context, bypass_cache),
+                'elapsed_seconds': round(time.perf_counter() - started, 3)
+            }
+            self.telemetry.finish(trace)
+            return result
+        except Exception as e:
+            self.telemetry.finish(trace, 'error')
+            return {
+                'key': bug_id,
+                'error': str(e),
+                'elapsed_seconds': round(time.perf_counter() - started, 3)
+            }
+    
+    def run_batch(self, issue_keys, workers=None, output_dir=None, jsonl_path=None):
+        """Analyze many issues headlessly with bounded concurrency
+        
+        The workspace is scanned once and shared by every issue. With
+        WATCH_WORKSPACE the workspace watcher runs for the whole batch instead and
+        every issue gets its own scan, answered from memory, so edits made while
+        a long batch runs are picked up. Each result is written to
+        <output_dir>/<KEY>.txt and/or appended to a JSONL stream (jsonl_path,
+        '-' for stdout) as soon as it completes.
+        """
+        workers = workers or self.config['batch_workers']
+        
+        started_watcher = (self.config['watch_workspace'] and self.workspace_watcher is None
+                           and self.start_workspace_watcher())
+        jsonl_file = None
+        results = []
+        try:
+            if started_watcher:
+                self.workspace_watcher.wait_ready(30)  # So the first scan's listing is kept current
+            workspace_context = self.scan_workspace_files()
+            print(f"Workspace scanned: {workspace_context.get('total_files', 0)} files", file=sys.stderr)
+            if self.workspace_watcher is not None:
+                workspace_context = None  # Every issue scans the watched index itself
+            
+            if output_dir:
+                Path(output_dir).mkdir(parents=True, exist_ok=True)
+            if jsonl_path == '-':
+                jsonl_file = sys.stdout
+            elif jsonl_path:
+                jsonl_file = open(jsonl_path, 'a', encoding='utf-8')
+            
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(self.analyze_issue, key, workspace_context) for key in issue_keys]
+                for future in as_completed(futures):
+                    result = future.result()
+                    results.append(result)
+                    
+                    if output_dir:
+                        output_file = Path(output_dir) / f"{result['key']}.txt"
+                        with open(output_file, 'w', encoding='utf-8') as f:
+                            if 'error' in result:
+                                f.write(f"Error: {result['error']}\n")
+                            else:
+                                f.write(result['details'] + "\n\n" + result['analysis'])
+                    if jsonl_file:
+                        jsonl_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+                        jsonl_file.flush()
+                    
+                    status = f"error: {result['error']}" if 'error' in result else "ok"
+                    print(f"[{len(results)}/{len(issue_keys)}] {result['key']}: {status} "
+                          f"({result['elapsed_seconds']}s)", file=sys.stderr)
+        finally:
+            if jsonl_file and jsonl_file is not sys.stdout:
+                jsonl_file.close()
+            if started_watcher:
+                self.stop_workspace_watcher()
+        
+        return results
+
+
+class JiraAnalyzerGUI(JiraAnalyzer):
+    """Tk front end for JiraAnalyzer"""
+
+    def __init__(self, root):
+        self.root = root
+        self.root.title("JIRA Bug Analyzer with Copilot")
+        self.root.geometry("900x700")
+        
+        super().__init__()
+        self.startup_timings = {'module_import_ms': round((_MODULE_LOADED - _STARTUP_STARTED) * 1000, 1)}
+        
+        # Background analysis state: the worker reports to the UI through ui_queue
+        self.ui_queue = queue.Queue()
+        self.current_job = 0
+        self.cancel_event = None
+        
+        self.setup_ui()
+        self.mark_startup('ui_built_ms')
+        self.root.after_idle(lambda: self.mark_startup('first_frame_ms'))
+        if self.config['watch_workspace']:
+            self.root.after_idle(self.start_workspace_watcher)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+    
+    def on_close(self):
+        """Window closed: cancel the running analysis, stop the workspace watcher and quit"""
+        self.cancel_analysis()
+        self.stop_workspace_watcher()
+        self.root.destroy()
+    
+    def mark_startup(self, name):
+        """Record the time since interpreter start-up of a startup milestone"""
+        self.startup_timings[name] = round((time.perf_counter() - _STARTUP_STARTED) * 1000, 1)
+    
+    def startup_report(self):
+        """Startup milestones in ms plus whether time-to-window met STARTUP_TARGET_MS"""
+        report = dict(self.startup_timings, target_ms=self.STARTUP_TARGET_MS)
+        if 'first_frame_ms' in report:
+            report['within_target'] = report['first_frame_ms'] <= self.STARTUP_TARGET_MS
+        return report
+    
+    def setup_ui(self):
+        """Setup the GUI components"""
+        # Main Analysis Frame (no tabs needed)
+        analysis_frame = ttk.Frame(self.root)
+        analysis_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        # Add logo at the top
+        self.add_logo(analysis_frame)
+        
+        self.setup_analysis_tab(analysis_frame)
+    
+    def add_logo(self, parent):
+        """Add company logo at the top of the GUI
+        
+        The header is built immediately with an empty placeholder; the logo image is
+        filled in once the window is up, from a processed local copy in CACHE_DIR
+        (downloaded and resized on a background thread the first time).
+        """
+        # Create logo frame with white background - centered with minimal height
+        logo_frame = tk.Frame(parent, bg='white')
+        logo_frame.pack(pady=(0, 5), fill='x')
+        
+        # Container for horizontal layout - centered
+        logo_container = tk.Frame(logo_frame, bg='white')
+        logo_container.pack(anchor='center', pady=(2, 2))
+        
+        # Left side: M symbol with minimal padding (placeholder until the image is ready)
+        self.logo_label = tk.Label(logo_container, bg='white')
+        self.logo_label.pack(side='left', padx=(0, 2), pady=(5, 0))
+        
+        # Right side: Text frame (Company_name + tagline)
+        text_frame = tk.Frame(logo_container, bg='white')
+        text_frame.pack(side='left')
+        
+        # "XYZ Organisation" text in larger font
+        company_name = tk.Label(text_frame, text="XYZ Organisation", 
+                               font=('Arial', 40, 'normal'), 
+                               fg='black', bg='white')
+        company_name.pack(anchor='w', pady=(0, 0))
+        
+        # Tagline in smaller font below - shifted right and closer to top
+        tagline = tk.Label(text_frame, text="Organisation Tag Line", 
+                         font=('Arial', 10), 
+                         fg='black', bg='white')
+        tagline.pack(anchor='w', padx=(20, 0), pady=(0, 5))
+        
+        self.root.after_idle(self._load_logo)
+    
+    def logo_cache_file(self):
+        """Path of the processed (resized and cropped) logo PNG"""
+        digest = hashlib.sha1(self.LOGO_URL.encode('utf-8')).hexdigest()[:12]
+        return Path(self.config['cache_dir']) / f"logo_{digest}.png"
+    
+    def _load_logo(self):
+        """Show the cached logo, or prepare it on a background thread first"""
+        logo_file = self.logo_cache_file()
+        if logo_file.exists():
+            self._show_logo(logo_file)
+            return
+        
+        outcome = {}
+        thread = threading.Thread(target=lambda: outcome.update(result=self._prepare_logo(logo_file)),
+                                  daemon=True)
+        thread.start()
+        
+        def poll():
+            if thread.is_alive():
+                self.root.after(100, poll)
+            elif outcome.get('result'):
+                self._show_logo(logo_file)
+        self.root.after(100, poll)
+    
+    def _prepare_logo(self, logo_file):
+        """Download, resize and crop the logo into logo_file (runs off the Tk thread)"""
+        try:
+            from PIL import Image
+            
+            # Download logo symbol from URL
+            response = self.http.get(self.LOGO_URL, 'logo')
+            response.raise_for_status()
+            
+            # Load image
+            image_data = BytesIO(response.content)
+            symbol_img = Image.open(image_data)
+            
+            # Resize logo symbol (smaller size)
+            symbol_width = 350
+            ratio = symbol_width / symbol_img.width
+            symbol_height = int(symbol_img.height * ratio)
+            symbol_img = symbol_img.resize((symbol_width, symbol_height), Image.Resampling.LANCZOS)
+            
+            # Crop to show only left half of the logo
+            crop_width = symbol_width // 7
+            symbol_img = symbol_img.crop((0, 0, crop_width, symbol_height))
+            
+            logo_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = logo_file.with_suffix('.tmp')
+            symbol_img.save(tmp_file, format='PNG')
+            os.replace(tmp_file, logo_file)
+            return True
+        except Exception as e:
+            # If logo fails to load, just continue without it
+            print(f"Could not load logo: {e}")
+            return False
+    
+    def _show_logo(self, logo_file):
+        """Put the processed logo into the header placeholder (Tk thread)"""
+        try:
+            # Tk reads PNG natively, so the cached logo needs no PIL
+            self.logo_image = tk.PhotoImage(file=str(logo_file))
+            self.logo_label.config(image=self.logo_image)
+            self.mark_startup('logo_ms')
+        except tk.TclError as e:
+            print(f"Could not load logo: {e}")
+    
+    def setup_analysis_tab(self, parent):
+        """Setup the main analysis tab"""
+        # JIRA Bug ID Input Section
+        input_frame = ttk.LabelFrame(parent, text="JIRA Bug Details", padding=10)
+        input_frame.pack(fill='x', padx=10, pady=10)
+        
+        ttk.Label(input_frame, text="JIRA Bug ID:").grid(row=0, column=0, sticky='w', pady=5)
+        self.bug_id_entry = ttk.Entry(input_frame, width=30, font=('Arial', 11))
+        self.bug_id_entry.grid(row=0, column=1, sticky='ew', padx=10, pady=5)
+        self.bug_id_entry.insert(0, "")  # Placeholder example
+        
+        # View in Browser Button
+        view_button = ttk.Button(input_frame, text="View in Browser", 
+                                 command=self.view_in_browser)
+        view_button.grid(row=0, column=2, padx=5)
+        
+        input_frame.columnconfigure(1, weight=1)
+        
+        # Analyze Button
+        button_frame = ttk.Frame(parent)
+        button_frame.pack(fill='x', padx=10, pady=5)
+        
+        action_frame = ttk.Frame(button_frame)
+        action_frame.pack(pady=10)
+        
+        self.analyze_button = ttk.Button(action_frame, text="🤖 Analyse with OpenAI", 
+                                         command=self.analyze_bug,
+                                         style='Accent.TButton')
+        self.analyze_button.pack(side='left', padx=5)
+        
+        # Cancel Button (enabled only while an analysis is running)
+        self.cancel_button = ttk.Button(action_frame, text="Cancel", 
+                                        command=self.cancel_analysis,
+                                        state='disabled')
+        self.cancel_button.pack(side='left', padx=5)
+        
+        # Bypass switch for the AI response cache (and near-duplicate reuse)
+        self.bypass_cache_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(action_frame, text="Bypass AI response cache",
+                        variable=self.bypass_cache_var).pack(side='left', padx=5)
+        
+        # Progress Bar
+        self.progress = ttk.Progressbar(button_frame, mode='indeterminate')
+        self.progress.pack(fill='x', pady=5)
+        
+        # Results Section
+        results_frame = ttk.LabelFrame(parent, text="Analysis Results", padding=10)
+        results_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        # Bug Details Section
+        ttk.Label(results_frame, text="Bug Details:", font=('Arial', 10, 'bold')).pack(anchor='w')
+        self.bug_details_text = scrolledtext.ScrolledText(results_frame, height=8, 
+                                                          wrap=tk.WORD, font=('Courier', 9))
+        self.bug_details_text.pack(fill='both', expand=True, pady=5)
+        
+        # Bug Fix Suggestions Section
+        ttk.Label(results_frame, text="AI-Powered Bug Fix Suggestions:", 
+                 font=('Arial', 10, 'bold')).pack(anchor='w', pady=(10, 0))
+        self.bug_fix_text = scrolledtext.ScrolledText(results_frame, height=12, 
+                                                      wrap=tk.WORD, font=('Courier', 9))
+        self.bug_fix_text.pack(fill='both', expand=True, pady=5)
+        
+        # Status Bar
+        self.status_label = ttk.Label(parent, text="Ready", relief=tk.SUNKEN, anchor='w')
+        self.status_label.pack(fill='x', side='bottom', padx=10, pady=5)
+    
+    def set_status(self, text):
+        """Update the status bar (safe to call from the analysis worker thread)"""
+        job_id = getattr(self._worker_state, 'job_id', None)
+        if job_id is None:
+            self.status_label.config(text=text)
+        else:
+            self.ui_queue.put((job_id, 'status', text))
+    
+    def view_in_browser(self):
+        """Open JIRA bug in browser"""
+        bug_id = self.bug_id_entry.get().strip()
+        if bug_id:
+            url = f"{self.config['jira_base_url']}/browse/{bug_id}"
+            import webbrowser
+            webbrowser.open(url)
+        else:
+            messagebox.showwarning("Warning", "Please enter a JIRA Bug ID")
+    
     def analyze_bug(self):
         """Main analysis function"""
         bug_id = self.bug_id_entry.get().strip()
@@ -914,47 +4868,198 @@ Based on your project components: {', '.join(self.PROJECT_COMPONENTS)}
         
         # Disable button and show progress
         self.analyze_button.config(state='disabled')
+        self.cancel_button.config(state='normal')
         self.progress.start()
         self.status_label.config(text=f"Fetching JIRA bug {bug_id}...")
-        self.root.update()
         
+        # Run the whole pipeline on a background worker so the window stays responsive
+        self.current_job += 1
+        self.cancel_event = threading.Event()
+        worker = threading.Thread(target=self._analysis_worker,
+                                  args=(self.current_job, self.cancel_event, bug_id,
+                                        self.bypass_cache_var.get()),
+                                  daemon=True)
+        worker.start()
+        self.root.after(100, self._poll_ui_queue)
+    
+    def cancel_analysis(self):
+        """Cancel the running analysis; its late results are ignored"""
+        if self.cancel_event is None:
+            return
+        self.cancel_event.set()
+        self.cancel_event = None
+        self.current_job += 1
+        self._finish_analysis("Analysis cancelled")
+    
+    def _analysis_worker(self, job_id, cancel_event, bug_id, bypass_cache=False):
+        """Fetch, scan and analyze on a background thread, reporting through ui_queue"""
+        self._worker_state.job_id = job_id
+        self._worker_state.cancel_event = cancel_event
+        trace = self.telemetry.start(bug_id)
         try:
             # Fetch JIRA bug
-            self.status_label.config(text=f"Analyzing {bug_id} with JIRA API...")
-            self.root.update()
-            bug_data = self.fetch_jira_bug(bug_id)
+            self.set_status(f"Analyzing {bug_id} with JIRA API...")
+            bug_data = self.fetch_issue_context(bug_id)
+            self.check_cancelled()
             
             # Format and display bug details
-            bug_details = self.format_bug_details(bug_data)
-            self.bug_details_text.insert(1.0, bug_details)
+            with self.telemetry.span('render'):
+                bug_details = self.format_bug_details(bug_data)
+            self.ui_queue.put((job_id, 'details', bug_details))
             
             # Generate AI analysis
-            self.status_label.config(text="Generating AI-powered bug fix suggestions...")
-            self.root.update()
-            analysis = self.generate_copilot_analysis(bug_data)
-            self.bug_fix_text.insert(1.0, analysis)
-            
-            self.status_label.config(text=f"✓ Analysis completed for {bug_id}")
-            messagebox.showinfo("Success", f"Bug {bug_id} analyzed successfully!")
+            self.set_status("Generating AI-powered bug fix suggestions...")
+            analysis = self.generate_copilot_analysis(
+                bug_data, bypass_cache=bypass_cache,
+                on_token=lambda text: self.ui_queue.put((job_id, 'token', text)))
+            self.check_cancelled()
+            # The trace is finished on the Tk thread once the answer is shown
+            self.ui_queue.put((job_id, 'done', (bug_id, analysis, trace)))
             
+        except AnalysisCancelled:
+            self.telemetry.finish(trace, 'cancelled')
+            self.ui_queue.put((job_id, 'cancelled', bug_id))
         except Exception as e:
-            error_msg = f"Error: {str(e)}"
-            self.status_label.config(text="Error occurred during analysis")
-            self.bug_fix_text.insert(1.0, error_msg)
-            messagebox.showerror("Error", error_msg)
-        
+            self.telemetry.finish(trace, 'error')
+            self.ui_queue.put((job_id, 'error', str(e)))
         finally:
-            # Re-enable button and stop progress
-            self.analyze_button.config(state='normal')
-            self.progress.stop()
+            self._worker_state.job_id = None
+            self._worker_state.cancel_event = None
+    
+    def _poll_ui_queue(self):
+        """Apply progress and results posted by the analysis worker (runs on the Tk thread)"""
+        finished = False
+        try:
+            while True:
+                job_id, kind, payload = self.ui_queue.get_nowait()
+                if job_id != self.current_job:
+                    if kind == 'done':
+                        self.telemetry.finish(payload[2], 'cancelled')
+                    continue  # Left over from a cancelled analysis
+                
+                if kind == 'status':
+                    self.status_label.config(text=payload)
+                elif kind == 'details':
+                    self.bug_details_text.insert(1.0, payload)
+                elif kind == 'token':
+                    # Streamed answer: append as it arrives
+                    self.bug_fix_text.insert(tk.END, payload)
+                    self.bug_fix_text.see(tk.END)
+                    self.status_label.config(text="Receiving AI analysis...")
+                elif kind == 'done':
+                    bug_id, analysis, trace = payload
+                    # Replace the streamed text with the full analysis (header and footer added)
+                    with self.telemetry.span('render', trace=trace):
+                        self.bug_fix_text.delete(1.0, tk.END)
+                        self.bug_fix_text.insert(1.0, analysis)
+                    self.telemetry.finish(trace)
+                    self._finish_analysis(f"✓ Analysis completed for {bug_id}")
+                    messagebox.showinfo("Success", f"Bug {bug_id} analyzed successfully!")
+                    finished = True
+                elif kind == 'cancelled':
+                    self._finish_analysis("Analysis cancelled")
+                    finished = True
+                elif kind == 'error':
+                    error_msg = f"Error: {payload}"
+                    self.bug_fix_text.insert(1.0, error_msg)
+                    self._finish_analysis("Error occurred during analysis")
+                    messagebox.showerror("Error", error_msg)
+                    finished = True
+        except queue.Empty:
+            pass
+        
+        if not finished and self.cancel_event is not None:
+            self.root.after(100, self._poll_ui_queue)
+    
+    def _finish_analysis(self, status_text):
+        """Re-enable the controls once an analysis ends"""
+        self.cancel_event = None
+        self.analyze_button.config(state='normal')
+        self.cancel_button.config(state='disabled')
+        self.progress.stop()
+        self.status_label.config(text=status_text)
+
+
+_MODULE_LOADED = time.perf_counter()
 
 
 def main():
-    """Main entry point"""
-    root = tk.Tk()
-    app = JiraAnalyzerGUI(root)
-    root.mainloop()
+    """Main entry point: starts the GUI, or runs a headless batch when issues/JQL are given"""
+    parser = argparse.ArgumentParser(description="JIRA Bug Analyzer with OpenAI")
+    parser.add_argument('issues', nargs='*', help="issue keys to analyze headlessly (omit to start the GUI)")
+    parser.add_argument('--jql', help="analyze every issue matching this JQL query")
+    parser.add_argument('--max-issues', type=int, help="stop after this many issues from --jql")
+    parser.add_argument('--workers', type=int, default=JiraAnalyzer.BATCH_WORKERS,
+                        help="issues analyzed concurrently (default: %(default)s)")
+    parser.add_argument('--output-dir', help="write one <KEY>.txt result file per issue here")
+    parser.add_argument('--jsonl', help="append one JSON result per line to this file ('-' for stdout)")
+    parser.add_argument('--workspace', action='append', metavar='PATH',
+                        help="workspace root to scan; repeat for several repos (default: current directory)")
+    parser.add_argument('--changed-since', metavar='REF',
+                        help="only scan files changed since this git ref (e.g. origin/main)")
+    parser.add_argument('--recent-commits', type=int, metavar='N',
+                        help="only scan files changed in the last N commits")
+    parser.add_argument('--max-files', type=int, default=JiraAnalyzer.MAX_SCAN_FILES,
+                        help="most relevant source files used per analysis (default: %(default)s)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="bypass the AI response cache and duplicate detection")
+    parser.add_argument('--watch', action='store_true',
+                        help="keep the workspace index current with an inotify watcher while the batch runs")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="print GUI startup timings as JSON once the window is shown, then exit")
+    parser.add_argument('--telemetry-report', action='store_true',
+                        help="print p50/p95 per stage and LLM token usage of recent analyses as JSON, then exit")
+    args = parser.parse_args()
+    
+    if args.telemetry_report:
+        print(json.dumps(JiraAnalyzer().telemetry.summary(), indent=2))
+        return 0
+    
+    if not args.issues and not args.jql:
+        root = tk.Tk()
+        app = JiraAnalyzerGUI(root)
+        if args.startup_report:
+            outcome = {}
+            
+            def report():
+                outcome.update(app.startup_report())
+                print(json.dumps(outcome))
+                root.destroy()
+            root.after(200, report)
+        root.mainloop()
+        if args.startup_report and not outcome.get('within_target', False):
+            return 1
+        return 0
+    
+    config = {}
+    if args.workspace:
+        config['workspace_path'] = args.workspace[0]
+        config['workspace_paths'] = args.workspace if len(args.workspace) > 1 else []
+    if args.changed_since:
+        config['scan_changed_since'] = args.changed_since
+    if args.recent_commits:
+        config['scan_recent_commits'] = args.recent_commits
+    config['max_scan_files'] = args.max_files
+    if args.no_cache:
+        config['llm_cache_enabled'] = False
+        config['duplicate_detection'] = False
+    if args.watch:
+        config['watch_workspace'] = True
+    analyzer = JiraAnalyzer(config)
+    
+    issue_keys = list(args.issues)
+    if args.jql:
+        issue_keys += analyzer.search_jira_issues(args.jql, args.max_issues)
+    if not issue_keys:
+        print("No issues to analyze", file=sys.stderr)
+        return 0
+    
+    jsonl_path = args.jsonl
+    if not args.output_dir and not jsonl_path:
+        jsonl_path = '-'
+    results = analyzer.run_batch(issue_keys, args.workers, args.output_dir, jsonl_path)
+    return 1 if any('error' in result for result in results) else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
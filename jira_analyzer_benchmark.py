@@ -0,0 +1,620 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the JIRA Bug Analyzer
+
+Micro-benchmark of the ADF (Atlassian Document Format) renderer on large
+generated documents:
+
+    python3 jira_analyzer_benchmark.py adf --blocks 1000 10000 50000 --output adf.json
+
+End-to-end benchmark on generated workspaces against local JIRA/OpenAI
+stand-in servers (workspace scan, prompt building, ADF rendering and the full
+analysis pipeline), compared with an earlier run:
+
+    python3 jira_analyzer_benchmark.py e2e --files 1000 10000 200000 --output e2e.json
+    python3 jira_analyzer_benchmark.py e2e --files 1000 10000 --compare e2e.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import jira_analyzer_OPENAI as analyzer_module
+
+
+WORDS = """
+    checkout order payment session cache timeout retry request response user account
+    invoice service handler queue worker database connection pool thread lock update
+    render button screen crash exception null pointer failed error memory leak slow
+""".split()
+
+
+def _text(rng, words=8, marks=True):
+    node = {'type': 'text', 'text': ' '.join(rng.choice(WORDS) for _ in range(words)) + ' '}
+    if marks and rng.random() < 0.2:
+        node['marks'] = [rng.choice([{'type': 'strong'}, {'type': 'code'},
+                                     {'type': 'link', 'attrs': {'href': 'https://example.com/doc'}}])]
+    return node
+
+
+def _paragraph(rng):
+    content = [_text(rng) for _ in range(rng.randint(1, 4))]
+    if rng.random() < 0.1:
+        content.append({'type': 'mention', 'attrs': {'id': '42', 'text': '@Dev'}})
+    if rng.random() < 0.05:
+        content.append({'type': 'inlineCard', 'attrs': {'url': 'https://jira.example.com/browse/PROJ-1'}})
+    if rng.random() < 0.1:
+        content.append({'type': 'hardBreak'})
+        content.append(_text(rng))
+    return {'type': 'paragraph', 'content': content}
+
+
+def _list(rng, depth=0):
+    items = []
+    for _ in range(rng.randint(2, 5)):
+        item = [_paragraph(rng)]
+        if depth < 3 and rng.random() < 0.3:
+            item.append(_list(rng, depth + 1))
+        items.append({'type': 'listItem', 'content': item})
+    return {'type': rng.choice(['bulletList', 'orderedList']), 'content': items}
+
+
+def _block(rng):
+    roll = rng.random()
+    if roll < 0.6:
+        return _paragraph(rng)
+    if roll < 0.75:
+        return _list(rng)
+    if roll < 0.85:
+        code = '\n'.join(f"    at com.example.Service{i}.call(Service{i}.java:{rng.randint(1, 500)})"
+                         for i in range(rng.randint(3, 12)))
+        return {'type': 'codeBlock', 'attrs': {'language': 'java'}, 'content': [{'type': 'text', 'text': code}]}
+    if roll < 0.92:
+        rows = [{'type': 'tableRow', 'content': [
+            {'type': 'tableCell', 'content': [_paragraph(rng)]} for _ in range(3)]} for _ in range(rng.randint(2, 6))]
+        return {'type': 'table', 'content': rows}
+    if roll < 0.97:
+        return {'type': 'blockquote', 'content': [_paragraph(rng) for _ in range(2)]}
+    return {'type': 'panel', 'attrs': {'panelType': 'warning'}, 'content': [_paragraph(rng)]}
+
+
+def generate_adf(blocks, seed=0):
+    """Synthetic ADF document with `blocks` top-level blocks of the usual node mix"""
+    rng = random.Random(seed)
+    return {'type': 'doc', 'version': 1, 'content': [_block(rng) for _ in range(blocks)]}
+
+
+def nested_adf(depth):
+    """ADF document nested `depth` levels deep (alternating lists and quotes)"""
+    node = {'type': 'paragraph', 'content': [{'type': 'text', 'text': 'innermost'}]}
+    for level in range(depth):
+        if level % 2:
+            node = {'type': 'blockquote', 'content': [node]}
+        else:
+            node = {'type': 'bulletList', 'content': [{'type': 'listItem', 'content': [node]}]}
+    return {'type': 'doc', 'version': 1, 'content': [node]}
+
+
+def count_nodes(document):
+    """Number of ADF nodes in a document"""
+    count = 0
+    stack = [document]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            count += 1
+            stack.extend(node.get('content') or [])
+    return count
+
+
+def time_call(function, repeat):
+    """Run function `repeat` times; returns (median seconds, last result)
+    
+    Like timeit, the garbage collector is paused while timing so large documents
+    kept alive by earlier measurements do not add collection pauses.
+    """
+    timings = []
+    result = None
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = function()
+            timings.append(time.perf_counter() - started)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return statistics.median(timings), result
+
+
+def bench_adf(sizes, repeat, depth):
+    """Render throughput for generated documents, memoized re-renders and deep nesting"""
+    analyzer = analyzer_module.JiraAnalyzer()
+    results = []
+    for blocks in sizes:
+        document = generate_adf(blocks, seed=blocks)
+        nodes = count_nodes(document)
+        size_bytes = len(json.dumps(document))
+        seconds, text = time_call(lambda: analyzer_module.render_adf(document), repeat)
+
+        bug_data = {'key': 'BENCH-1', 'fields': {'updated': str(blocks), 'description': document}}
+        analyzer.issue_field_text(bug_data, 'description')
+        cached_seconds, _ = time_call(lambda: analyzer.issue_field_text(bug_data, 'description'), repeat)
+
+        results.append({
+            'name': f"adf_render_{blocks}",
+            'blocks': blocks,
+            'nodes': nodes,
+            'input_bytes': size_bytes,
+            'output_chars': len(text),
+            'seconds': round(seconds, 6),
+            'nodes_per_second': round(nodes / seconds) if seconds else None,
+            'mb_per_second': round(size_bytes / seconds / 1e6, 2) if seconds else None,
+            'memoized_seconds': round(cached_seconds, 6)
+        })
+
+    document = nested_adf(depth)
+    seconds, text = time_call(lambda: analyzer_module.render_adf(document), repeat)
+    results.append({
+        'name': f"adf_render_nested_{depth}",
+        'depth': depth,
+        'nodes': count_nodes(document),
+        'output_chars': len(text),
+        'seconds': round(seconds, 6)
+    })
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Synthetic workspaces
+# ---------------------------------------------------------------------------
+
+LANGUAGE_MIX = (
+    ('.java', 0.30), ('.py', 0.20), ('.ts', 0.15), ('.js', 0.10),
+    ('.cpp', 0.10), ('.h', 0.08), ('.md', 0.04), ('.json', 0.03)
+)  # Share of each file type in a generated workspace
+VENDORED_SHARE = 0.2  # Files placed in node_modules/, build/, target/, .git/ (pruned by the scan)
+FILES_PER_DIRECTORY = 40
+
+FUNCTION_TEMPLATES = {
+    '.java': ("    public {type} {name}({type} {arg}) {{\n{body}        return {arg};\n    }}\n",
+              "        if ({arg} == null) {{ throw new IllegalStateException(\"{word} missing\"); }}\n"),
+    '.py': ("    def {name}(self, {arg}):\n        \"\"\"{word} {word2}\"\"\"\n{body}        return {arg}\n",
+            "        if {arg} is None:\n            raise ValueError('{word} missing')\n"),
+    '.ts': ("  {name}({arg}: {type}): {type} {{\n{body}    return {arg};\n  }}\n",
+            "    if (!{arg}) {{ throw new Error('{word} missing'); }}\n"),
+    '.js': ("  {name}({arg}) {{\n{body}    return {arg};\n  }}\n",
+            "    if (!{arg}) {{ throw new Error('{word} missing'); }}\n"),
+    '.cpp': ("{type} {cls}::{name}({type} {arg}) {{\n{body}    return {arg};\n}}\n",
+             "    if (!{arg}) {{ throw std::runtime_error(\"{word} missing\"); }}\n"),
+}
+FILE_TEMPLATES = {
+    '.java': "package com.example.{module};\n\nimport java.util.*;\n\npublic class {cls} {{\n{functions}}}\n",
+    '.py': "import os\nimport sys\n\n\nclass {cls}:\n{functions}",
+    '.ts': "import {{ Service }} from './service';\n\nexport class {cls} {{\n{functions}}}\n",
+    '.js': "'use strict';\n\nclass {cls} {{\n{functions}}}\n\nmodule.exports = {cls};\n",
+    '.cpp': "#include \"{cls}.h\"\n\n{functions}",
+    '.h': "#pragma once\n\nclass {cls} {{\npublic:\n{functions}}};\n",
+    '.md': "# {cls}\n\n{word} {word2} notes.\n",
+    '.json': "{{\"name\": \"{cls}\", \"{word}\": \"{word2}\"}}\n",
+}
+
+
+def _source_file(rng, ext, cls, module):
+    """Source text for one generated file: a class with a few methods"""
+    word, word2 = rng.choice(WORDS), rng.choice(WORDS)
+    if ext not in FUNCTION_TEMPLATES:
+        functions = ''.join(f"    int {rng.choice(WORDS)}{index}(int value);\n" for index in range(rng.randint(2, 8))) \
+            if ext == '.h' else ''
+        return FILE_TEMPLATES[ext].format(cls=cls, module=module, functions=functions, word=word, word2=word2)
+    
+    template, statement = FUNCTION_TEMPLATES[ext]
+    functions = []
+    for index in range(rng.randint(3, 15)):
+        arg = rng.choice(WORDS)
+        body = ''.join(statement.format(arg=arg, word=rng.choice(WORDS)) for _ in range(rng.randint(1, 8)))
+        functions.append(template.format(name=f"{rng.choice(WORDS)}{word2.title()}{index}", arg=arg, cls=cls,
+                                         type=rng.choice(['int', 'long', 'Object']) if ext != '.py' else '',
+                                         body=body, word=word, word2=word2))
+    return FILE_TEMPLATES[ext].format(cls=cls, module=module, functions='\n'.join(functions), word=word, word2=word2)
+
+
+def generate_workspace(root, files, seed=0):
+    """Create a synthetic workspace of `files` files under root (reused when already generated)
+    
+    Files are spread over modules and packages in the LANGUAGE_MIX proportions;
+    VENDORED_SHARE of them go to directories the scan prunes, a few are minified
+    bundles or binary blobs the scan must skip. Returns the list of relative
+    source paths (useful for stack traces that should resolve).
+    """
+    root = Path(root)
+    marker = root / '.bench_workspace.json'
+    try:
+        manifest = json.loads(marker.read_text())
+        if manifest.get('files') == files and manifest.get('seed') == seed:
+            return manifest['sources']
+    except (OSError, ValueError):
+        pass
+    if root.exists():
+        shutil.rmtree(root)
+    
+    rng = random.Random(seed)
+    extensions = [ext for ext, share in LANGUAGE_MIX]
+    weights = [share for ext, share in LANGUAGE_MIX]
+    vendored_roots = ['node_modules/lib{}', 'build/generated{}', 'target/classes{}', '.git/objects/{:02x}']
+    sources = []
+    created_dirs = set()
+    
+    for number in range(files):
+        ext = rng.choices(extensions, weights)[0]
+        directory_number = number // FILES_PER_DIRECTORY
+        cls = f"{rng.choice(WORDS).title()}{rng.choice(WORDS).title()}{number}"
+        if rng.random() < VENDORED_SHARE:
+            directory = rng.choice(vendored_roots).format(directory_number % 256)
+        else:
+            module = f"module{directory_number % 50}"
+            directory = f"{module}/src/{rng.choice(WORDS)}{directory_number}"
+        if directory not in created_dirs:
+            (root / directory).mkdir(parents=True, exist_ok=True)
+            created_dirs.add(directory)
+        rel_path = f"{directory}/{cls}{ext}"
+        
+        roll = rng.random()
+        if ext == '.js' and roll < 0.05:
+            content = 'var a=1;' * 2000  # Minified bundle: one very long line
+        elif ext == '.h' and roll < 0.02:
+            (root / rel_path).write_bytes(bytes(rng.getrandbits(8) for _ in range(2048)))
+            continue
+        else:
+            content = _source_file(rng, ext, cls, directory.split('/')[0])
+        (root / rel_path).write_text(content, encoding='utf-8')
+        if not directory.startswith(('node_modules', 'build', 'target', '.git')) and ext not in ('.md', '.json'):
+            sources.append(rel_path)
+    
+    marker.write_text(json.dumps({'files': files, 'seed': seed, 'sources': sources}))
+    return sources
+
+
+# ---------------------------------------------------------------------------
+# Local JIRA / OpenAI stand-ins
+# ---------------------------------------------------------------------------
+
+class StandInServer:
+    """Local HTTP server answering the JIRA REST and OpenAI chat completion calls the analyzer makes
+    
+    jira_latency delays every JIRA response, openai_latency the first byte of a
+    completion, and streamed completions send answer_tokens pieces token_interval
+    seconds apart. Issue requests honor `fields=`; comments and the changelog
+    are paginated with startAt/maxResults like JIRA's.
+    """
+
+    COMMENTS = 30
+    CHANGELOG_ENTRIES = 120
+    RELATED_FIELDS = 'summary,status,description,updated'  # What the analyzer asks for linked issues
+
+    def __init__(self, issue_fields, jira_latency=0.05, openai_latency=0.5, token_interval=0.01,
+                 answer_tokens=200):
+        self.issue_fields = issue_fields
+        self.jira_latency = jira_latency
+        self.openai_latency = openai_latency
+        self.token_interval = token_interval
+        self.answer_tokens = answer_tokens
+        self.requests = 0
+        self.jira_bytes = 0
+        self.server = None
+
+    def start(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, payload):
+                body = json.dumps(payload).encode('utf-8')
+                stand_in.jira_bytes += len(body)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                stand_in.requests += 1
+                time.sleep(stand_in.jira_latency)
+                url = urlsplit(self.path)
+                path = url.path.rstrip('/')
+                query = {name: values[0] for name, values in parse_qs(url.query).items()}
+                start_at = int(query.get('startAt', 0))
+                page_end = start_at + int(query.get('maxResults', 50))
+                if path.endswith('/comment'):
+                    indexes = range(start_at, min(page_end, stand_in.COMMENTS))
+                    self.send_json({'startAt': start_at, 'total': stand_in.COMMENTS, 'comments': [{
+                        'id': str(index), 'author': {'displayName': 'QA'}, 'created': '2026-01-02T10:00:00.000+0000',
+                        'body': generate_adf(3, seed=index)} for index in indexes]})
+                elif path.endswith('/changelog'):
+                    indexes = range(start_at, min(page_end, stand_in.CHANGELOG_ENTRIES))
+                    self.send_json({'startAt': start_at, 'total': stand_in.CHANGELOG_ENTRIES,
+                                    'isLast': page_end >= stand_in.CHANGELOG_ENTRIES, 'values': [{
+                                        'id': str(index), 'author': {'displayName': 'Dev'},
+                                        'created': '2026-01-02T10:00:00.000+0000',
+                                        'items': [{'field': 'status', 'fromString': 'Open',
+                                                   'toString': f"Step {index}"}]} for index in indexes]})
+                elif '/search/jql' in path:
+                    self.send_json({'issues': [{'key': f"BENCH-{index}"} for index in range(1, 11)], 'isLast': True})
+                else:
+                    key = path.split('/')[-1]
+                    fields = stand_in.issue_fields
+                    if query.get('fields') == stand_in.RELATED_FIELDS:
+                        fields = {'summary': f"Related {key}", 'status': {'name': 'Open'},
+                                  'updated': fields['updated'], 'description': generate_adf(5, seed=1)}
+                    elif 'fields' in query:
+                        fields = {name: fields[name] for name in query['fields'].split(',') if name in fields}
+                    self.send_json({'key': key, 'fields': fields})
+
+            def do_POST(self):
+                stand_in.requests += 1
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                time.sleep(stand_in.openai_latency)
+                words = [rng_word + ' ' for rng_word in (WORDS * (stand_in.answer_tokens // len(WORDS) + 1))]
+                words = words[:stand_in.answer_tokens]
+                usage = {'prompt_tokens': len(json.dumps(request)) // 4, 'completion_tokens': len(words)}
+                usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+                if not request.get('stream'):
+                    self.send_json({'choices': [{'message': {'content': ''.join(words)}}], 'usage': usage})
+                    return
+                
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+
+                def send_event(payload):
+                    data = f"data: {payload}\n\n".encode('utf-8')
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+                    self.wfile.flush()
+                for word in words:
+                    send_event(json.dumps({'choices': [{'delta': {'content': word}}]}))
+                    if stand_in.token_interval:
+                        time.sleep(stand_in.token_interval)
+                send_event(json.dumps({'choices': [], 'usage': usage}))
+                send_event('[DONE]')
+                self.wfile.write(b'0\r\n\r\n')
+                self.wfile.flush()
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def benchmark_issue_fields(sources, description_blocks, seed=0, custom_fields=150):
+    """Issue fields for the stand-in: an ADF description with a stack trace into the workspace
+    
+    custom_fields unused custom fields (rich-text, options and numbers) pad the
+    full payload the way a real JIRA instance does.
+    """
+    rng = random.Random(seed)
+    description = generate_adf(description_blocks, seed=seed)
+    frames = [f"    at com.example.{Path(path).stem}.run({Path(path).name}:{rng.randint(5, 40)})"
+              for path in rng.sample(sources, min(5, len(sources))) if path.endswith('.java')]
+    frames += [f"{path}:{rng.randint(5, 40)}" for path in rng.sample(sources, min(3, len(sources)))]
+    description['content'].insert(0, {'type': 'codeBlock', 'attrs': {'language': 'text'}, 'content': [
+        {'type': 'text', 'text': "java.lang.NullPointerException: session missing\n" + "\n".join(frames)}]})
+    padding = {}
+    for index in range(custom_fields):
+        kind = index % 3
+        padding[f"customfield_{10000 + index}"] = (generate_adf(4, seed=seed + index) if kind == 0 else
+                                                    {'value': f"Option {index}", 'id': str(index)} if kind == 1 else
+                                                    index * 1.5)
+    return {
+        **padding,
+        'summary': 'Checkout crashes with NullPointerException when the session cache times out',
+        'description': description,
+        'status': {'name': 'Open'}, 'priority': {'name': 'High'},
+        'reporter': {'displayName': 'QA'}, 'assignee': {'displayName': 'Dev'},
+        'created': '2026-01-01T09:00:00.000+0000', 'updated': '2026-01-02T09:00:00.000+0000',
+        'components': [{'name': 'Backend'}], 'labels': ['checkout'],
+        'issuelinks': [{'type': {'outward': 'blocks', 'inward': 'is blocked by'}, 'outwardIssue': {'key': 'BENCH-2'}}],
+        'subtasks': [{'key': 'BENCH-3'}]
+    }
+
+
+# ---------------------------------------------------------------------------
+# End-to-end benchmark
+# ---------------------------------------------------------------------------
+
+def bench_e2e(sizes, repeat, workspace_dir, description_blocks, jira_latency, openai_latency, token_interval):
+    """Time scan (cold/warm), cold full index, prompt building, ADF rendering and the full pipeline per workspace size"""
+    results = []
+    for files in sizes:
+        workspace = Path(workspace_dir) / f"workspace_{files}"
+        started = time.perf_counter()
+        sources = generate_workspace(workspace, files)
+        print(f"workspace of {files} files ready in {time.perf_counter() - started:.1f}s ({workspace})",
+              file=sys.stderr)
+        
+        fields = benchmark_issue_fields(sources, description_blocks)
+        stand_in = StandInServer(fields, jira_latency, openai_latency, token_interval)
+        base_url = stand_in.start()
+        cache_root = Path(tempfile.mkdtemp(prefix='jira_bench_cache_'))
+        try:
+            config = {
+                'workspace_path': str(workspace),
+                'jira_base_url': base_url,
+                'jira_email': 'bench@example.com',
+                'jira_api_token': 'bench',
+                'openai_api_key': 'bench',
+                'openai_api_url': f"{base_url}/v1/chat/completions",
+                'llm_cache_enabled': False,
+                'rate_limits': {'openai': {'requests_per_minute': 100000, 'tokens_per_minute': 10 ** 9},
+                                'jira': {'requests_per_minute': 100000}}
+            }
+            
+            def fresh_analyzer(name):
+                return analyzer_module.JiraAnalyzer(dict(config, cache_dir=str(cache_root / name)))
+            
+            # Cold scan: empty index every run
+            cold = []
+            for run in range(repeat):
+                analyzer = fresh_analyzer(f"cold{run}")
+                cold.append(time_call(analyzer.scan_workspace_files, 1)[0])
+            
+            # Cold full index (first use of a workspace): thread pool only vs process pool
+            processes = os.cpu_count() or 1
+            index_seconds = {}
+            for workers in {1, processes}:
+                analyzer = analyzer_module.JiraAnalyzer(dict(
+                    config, cache_dir=str(cache_root / f"index{workers}"), index_processes=workers))
+                index_seconds[workers], indexed = time_call(analyzer.scan_workspace_files, 1)
+            warm_analyzer = fresh_analyzer('warm')
+            warm_analyzer.scan_workspace_files()
+            warm_seconds, context = time_call(warm_analyzer.scan_workspace_files, repeat)
+            disk_seconds, _ = time_call(lambda: fresh_analyzer('warm').scan_workspace_files(), repeat)
+            
+            description = warm_analyzer.extract_text_from_adf(fields['description'])
+            adf_seconds, _ = time_call(lambda: analyzer_module.render_adf(fields['description']), repeat)
+            
+            def build():
+                ranked = warm_analyzer.rank_workspace_files(context, f"{fields['summary']} {description}")
+                return warm_analyzer.build_prompt('BENCH-1', fields['summary'], description, ranked)
+            prompt_seconds, (prompt, token_report) = time_call(build, repeat)
+            
+            pipeline = fresh_analyzer('pipeline')
+            pipeline_cold, outcome = time_call(lambda: pipeline.analyze_issue('BENCH-1', bypass_cache=True), 1)
+            pipeline_warm, outcome = time_call(lambda: pipeline.analyze_issue('BENCH-1', bypass_cache=True), repeat)
+            
+            common = {'files': files, 'scanned_files': context.get('total_files', 0)}
+            results += [
+                dict(common, name=f"scan_cold_{files}", seconds=round(statistics.median(cold), 6)),
+                dict(common, name=f"scan_warm_{files}", seconds=round(warm_seconds, 6)),
+                dict(common, name=f"index_cold_threads_{files}", seconds=round(index_seconds[1], 6),
+                     indexed_files=indexed.get('total_files', 0)),
+                dict(common, name=f"index_cold_processes_{files}", seconds=round(index_seconds[processes], 6),
+                     indexed_files=indexed.get('total_files', 0), processes=processes,
+                     speedup=round(index_seconds[1] / index_seconds[processes], 2)),
+                dict(common, name=f"scan_warm_from_disk_{files}", seconds=round(disk_seconds, 6)),
+                dict(common, name=f"build_prompt_{files}", seconds=round(prompt_seconds, 6),
+                     prompt_tokens=token_report['total'], stack_frames=token_report.get('stack_frames', 0)),
+                dict(common, name=f"extract_text_from_adf_{files}", seconds=round(adf_seconds, 6),
+                     description_chars=len(description)),
+                dict(common, name=f"pipeline_cold_{files}", seconds=round(pipeline_cold, 6),
+                     error=outcome.get('error')),
+                dict(common, name=f"pipeline_warm_{files}", seconds=round(pipeline_warm, 6),
+                     error=outcome.get('error'), http_requests=stand_in.requests, jira_bytes=stand_in.jira_bytes),
+            ]
+            pipeline.http.close()
+        finally:
+            stand_in.stop()
+            shutil.rmtree(cache_root, ignore_errors=True)
+    return results
+
+
+def compare_results(baseline_path, results, threshold):
+    """Print the change against a previous results file; returns the names that got slower than threshold"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {result['name']: result for result in json.load(f).get('results', [])}
+    regressions = []
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        before = baseline.get(result['name'])
+        if not before or not before.get('seconds'):
+            print(f"{result['name']:<32} {'new':>10}")
+            continue
+        change = (result['seconds'] - before['seconds']) / before['seconds']
+        flag = ''
+        if change > threshold:
+            flag = '  << slower'
+            regressions.append(result['name'])
+        print(f"{result['name']:<32} {before['seconds'] * 1000:>10.2f} ms -> {result['seconds'] * 1000:>10.2f} ms "
+              f"({change:+.1%}){flag}")
+    return regressions
+
+
+def print_results(results):
+    for result in results:
+        details = ', '.join(f"{key}={value}" for key, value in result.items()
+                            if key not in ('name', 'seconds') and value is not None)
+        print(f"{result['name']:<32} {result['seconds'] * 1000:>10.2f} ms   {details}")
+
+
+def write_results(path, benchmark, results, parameters=None):
+    """Write results as JSON together with the parameters and environment they were measured in"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'benchmark': benchmark,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parameters': parameters or {},
+            'results': results
+        }, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JIRA Bug Analyzer benchmarks")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--repeat', type=int, default=5, help="runs per measurement (median is reported)")
+    common.add_argument('--output', help="write the results as JSON to this file")
+    common.add_argument('--compare', help="results JSON of an earlier run to compare with")
+    common.add_argument('--threshold', type=float, default=0.10,
+                        help="fail (exit 1) when a measurement is this much slower than --compare "
+                             "(default: %(default)s)")
+
+    adf = subparsers.add_parser('adf', parents=[common], help="ADF renderer throughput on generated documents")
+    adf.add_argument('--blocks', type=int, nargs='+', default=[100, 1000, 10000],
+                     help="top-level blocks per generated document (default: %(default)s)")
+    adf.add_argument('--depth', type=int, default=10000, help="nesting depth of the deep document")
+    
+    e2e = subparsers.add_parser('e2e', parents=[common],
+                                help="scan, prompt, ADF and full pipeline timings against local stand-ins")
+    e2e.add_argument('--files', type=int, nargs='+', default=[1000, 10000],
+                     help="files per generated workspace (default: %(default)s)")
+    e2e.add_argument('--workspace-dir', default=str(Path(tempfile.gettempdir()) / 'jira_analyzer_bench'),
+                     help="where generated workspaces are kept between runs (default: %(default)s)")
+    e2e.add_argument('--description-blocks', type=int, default=50,
+                     help="top-level ADF blocks in the issue description (default: %(default)s)")
+    e2e.add_argument('--jira-latency', type=float, default=0.05, help="seconds per JIRA response")
+    e2e.add_argument('--openai-latency', type=float, default=0.5, help="seconds to the first completion byte")
+    e2e.add_argument('--token-interval', type=float, default=0.005, help="seconds between streamed tokens")
+    args = parser.parse_args()
+    
+    if args.benchmark == 'adf':
+        results = bench_adf(args.blocks, args.repeat, args.depth)
+    else:
+        results = bench_e2e(args.files, args.repeat, args.workspace_dir, args.description_blocks,
+                            args.jira_latency, args.openai_latency, args.token_interval)
+    print_results(results)
+    if args.output:
+        parameters = {key: value for key, value in vars(args).items()
+                      if key not in ('benchmark', 'output', 'compare', 'threshold')}
+        write_results(args.output, args.benchmark, results, parameters)
+    if args.compare and compare_results(args.compare, results, args.threshold):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+# The analyzer is a single script at the repository root, not an installed package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+STALL = object()  # Route result: never answer, wait for the client to go away
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Local stand-in for the JIRA or OpenAI REST API
+
+    `routes` maps a path to handler(request) returning (status, headers, body),
+    where a dict body is sent as JSON, or STALL. Every request is recorded in
+    `requests` ({'method', 'path', 'params', 'headers', 'json'}); `connections`
+    counts the TCP connections accepted and `disconnected` holds when the
+    client of a stalled path went away.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.routes = {}
+        self.requests = []
+        self.connections = 0
+        self.disconnected = {}
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def hits(self, path):
+        return [request for request in self.requests if request['path'] == path]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        request = {'method': self.command, 'path': url.path, 'params': dict(parse_qsl(url.query)),
+                   'headers': self.headers, 'json': json.loads(self.rfile.read(length)) if length else None}
+        self.server.requests.append(request)
+        route = self.server.routes.get(url.path)
+        outcome = route(request) if route else (404, {}, {'errorMessages': ['Issue does not exist']})
+        if outcome is STALL:
+            self.connection.settimeout(10)
+            try:
+                self.rfile.read(1)  # Returns at once when the client shuts its socket down
+            except OSError:
+                pass
+            self.server.disconnected[url.path] = time.monotonic()
+            self.close_connection = True
+            return
+        status, headers, body = outcome
+        if isinstance(body, dict):
+            body = json.dumps(body).encode()
+            headers = dict({'Content-Type': 'application/json'}, **headers)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_POST = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+def stand_in_server():
+    server = StandInServer()
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def jira():
+    server = stand_in_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def openai():
+    server = stand_in_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def completion(content, prompt_tokens=100, completion_tokens=20):
+    """Route result: a non-streamed chat completion"""
+    return 200, {}, {'choices': [{'message': {'role': 'assistant', 'content': content}}],
+                     'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                               'total_tokens': prompt_tokens + completion_tokens}}
@@ -0,0 +1,81 @@
+"""render_adf: Atlassian Document Format to plain text"""
+
+import sys
+
+import pytest
+
+from jira_analyzer_OPENAI import JiraAnalyzer, render_adf
+
+
+def _doc(*content):
+    return {'type': 'doc', 'version': 1, 'content': list(content)}
+
+
+def _paragraph(*content):
+    return {'type': 'paragraph', 'content': list(content)}
+
+
+def _text(text, **extra):
+    return dict({'type': 'text', 'text': text}, **extra)
+
+
+def _item(*content):
+    return {'type': 'listItem', 'content': list(content)}
+
+
+def _row(cell_type, *values):
+    return {'type': 'tableRow', 'content': [{'type': cell_type, 'content': [_paragraph(_text(value))]}
+                                            for value in values]}
+
+
+ADF_CASES = [
+    ('marks dropped', _doc(_paragraph(_text('Hello '), _text('world', marks=[{'type': 'strong'}]))),
+     'Hello world'),
+    ('heading and ordered list',
+     _doc({'type': 'heading', 'attrs': {'level': 2}, 'content': [_text('Steps')]},
+          {'type': 'orderedList', 'content': [_item(_paragraph(_text('open'))),
+                                              _item(_paragraph(_text('click')))]}),
+     '## Steps\n\n1. open\n2. click'),
+    ('nested bullet list',
+     _doc({'type': 'bulletList', 'content': [
+         _item(_paragraph(_text('a')), {'type': 'bulletList', 'content': [_item(_paragraph(_text('b')))]})]}),
+     '• a\n  • b'),
+    ('code block', _doc({'type': 'codeBlock', 'attrs': {'language': 'java'},
+                         'content': [_text('int x = 1;\nx++;')]}),
+     '```java\nint x = 1;\nx++;\n```'),
+    ('mention, smart link and hard break',
+     _doc(_paragraph({'type': 'mention', 'attrs': {'id': '1', 'text': '@Ann'}}, _text(' see '),
+                     {'type': 'inlineCard', 'attrs': {'url': 'https://x.y/z'}}, {'type': 'hardBreak'},
+                     _text('next'))),
+     '@Ann see https://x.y/z\nnext'),
+    ('table', _doc({'type': 'table', 'content': [_row('tableHeader', 'k', 'v'), _row('tableCell', 'a', '1')]}),
+     '| k | v |\n| a | 1 |'),
+    ('panel and quote', _doc({'type': 'panel', 'attrs': {'panelType': 'warning'}, 'content': [_paragraph(_text('careful'))]},
+                             {'type': 'blockquote', 'content': [_paragraph(_text('quoted'))]}),
+     '[WARNING] careful\n\n> quoted'),
+    ('empty document', _doc(), ''),
+    ('missing description', None, ''),
+]
+
+
+@pytest.mark.parametrize('document, expected', [case[1:] for case in ADF_CASES],
+                         ids=[case[0] for case in ADF_CASES])
+def test_render_adf(document, expected):
+    assert render_adf(document) == expected
+
+
+def test_render_adf_deep_nesting():
+    node = _paragraph(_text('deep'))
+    for _ in range(sys.getrecursionlimit() * 2):
+        node = {'type': 'unknownContainer', 'content': [node]}
+    assert render_adf(_doc(node)) == 'deep'
+
+
+def test_adf_to_text_is_memoized_per_revision(tmp_path):
+    analyzer = JiraAnalyzer({'cache_dir': str(tmp_path), 'workspace_path': str(tmp_path),
+                             'telemetry_enabled': False})
+    key = ('BUG-1', '2024-01-01T00:00:00.000+0000', 'description')
+    assert analyzer.adf_to_text(_doc(_paragraph(_text('first'))), key) == 'first'
+    assert analyzer.adf_to_text(_doc(_paragraph(_text('edited'))), key) == 'first'
+    assert analyzer.adf_to_text(_doc(_paragraph(_text('edited'))), key[:1] + ('later',) + key[2:]) == 'edited'
+    assert analyzer.adf_to_text('plain text') == 'plain text'
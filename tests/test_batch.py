@@ -0,0 +1,40 @@
+"""run_batch: headless analysis of many issues with bounded concurrency"""
+
+import json
+
+from conftest import completion
+from jira_analyzer_OPENAI import JiraAnalyzer
+
+COMPLETIONS = '/v1/chat/completions'
+
+
+def test_batch_writes_a_result_per_issue(jira, openai, tmp_path):
+    for key, summary in (('BUG-1', 'Refund fails'), ('BUG-2', 'Login button misaligned')):
+        jira.routes[f"/rest/api/3/issue/{key}"] = (
+            lambda request, key=key, summary=summary: (200, {}, {'key': key, 'fields': {'summary': summary}}))
+    openai.routes[COMPLETIONS] = lambda request: completion('Suggested fix: check the input')
+    workspace = tmp_path / 'ws'
+    workspace.mkdir()
+    (workspace / 'refunds.py').write_text('def refund(order):\n    return order\n')
+    analyzer = JiraAnalyzer({
+        'cache_dir': str(tmp_path / 'cache'), 'workspace_path': str(workspace),
+        'jira_base_url': jira.base_url, 'jira_email': 'dev@example.com', 'jira_api_token': 'token',
+        'openai_api_url': openai.base_url + COMPLETIONS, 'openai_api_key': 'test-key', 'openai_stream': False,
+        'comment_limit': 0, 'changelog_limit': 0, 'duplicate_detection': False, 'telemetry_enabled': False,
+    })
+    output_dir = tmp_path / 'out'
+    jsonl_path = tmp_path / 'results.jsonl'
+
+    results = analyzer.run_batch(['BUG-1', 'BUG-2', 'BUG-404'], workers=2, output_dir=str(output_dir),
+                                 jsonl_path=str(jsonl_path))
+
+    by_key = {result['key']: result for result in results}
+    assert sorted(by_key) == ['BUG-1', 'BUG-2', 'BUG-404']
+    assert 'Suggested fix: check the input' in by_key['BUG-1']['analysis']
+    assert by_key['BUG-2']['summary'] == 'Login button misaligned'
+    assert '404' in by_key['BUG-404']['error']
+    assert len(openai.hits(COMPLETIONS)) == 2
+
+    assert (output_dir / 'BUG-404.txt').read_text().startswith('Error: ')
+    assert 'Suggested fix' in (output_dir / 'BUG-1.txt').read_text()
+    assert sorted(json.loads(line)['key'] for line in jsonl_path.read_text().splitlines()) == sorted(by_key)
@@ -0,0 +1,93 @@
+"""Cancel cuts off in-flight OpenAI requests, also while a streamed answer is downloading"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from jira_analyzer_OPENAI import AnalysisCancelled, JiraAnalyzer
+
+STALL_SECONDS = 10
+
+
+class StallingOpenAI(BaseHTTPRequestHandler):
+    """Stand-in chat completions endpoint that stops sending halfway
+
+    A streamed request gets its headers and one token, then nothing; any other
+    request never gets its headers. The handler records when the client went away.
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if payload.get('stream'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            event = b'data: ' + json.dumps({'choices': [{'delta': {'content': 'Hello'}}]}).encode() + b'\n\n'
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(event), event))
+            self.wfile.flush()
+        self.connection.settimeout(STALL_SECONDS)
+        try:
+            self.rfile.read(1)  # Returns at once when the client shuts its socket down
+        except OSError:
+            pass
+        self.server.disconnected_at = time.monotonic()
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StallingOpenAI)
+    httpd.disconnected_at = None
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def cancelled_analysis(server, tmp_path, stream):
+    """Run call_openai_api as the analysis worker does and press Cancel after 0.5 s"""
+    analyzer = JiraAnalyzer({
+        'cache_dir': str(tmp_path / 'cache'), 'workspace_path': str(tmp_path),
+        'openai_api_url': f"http://127.0.0.1:{server.server_port}/v1/chat/completions",
+        'openai_api_key': 'test-key', 'openai_stream': stream,
+        'llm_cache_enabled': False, 'duplicate_detection': False, 'telemetry_enabled': False,
+    })
+    cancel_event = threading.Event()
+    analyzer._worker_state.cancel_event = cancel_event
+    tokens = []
+    timer = threading.Timer(0.5, cancel_event.set)
+    timer.start()
+    started = time.monotonic()
+    try:
+        with pytest.raises(AnalysisCancelled):
+            analyzer.call_openai_api('BUG-1', 'Crash', 'It crashes', {'files': []}, on_token=tokens.append)
+    finally:
+        timer.cancel()
+    cancelled_at = time.monotonic()
+    deadline = cancelled_at + 2
+    while server.disconnected_at is None and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return cancelled_at - started, server.disconnected_at, cancelled_at, tokens
+
+
+def test_cancel_cuts_off_stalled_stream(server, tmp_path):
+    elapsed, disconnected_at, cancelled_at, tokens = cancelled_analysis(server, tmp_path, stream=True)
+    assert tokens == ['Hello']
+    assert elapsed < 1.5
+    assert disconnected_at is not None and disconnected_at - cancelled_at < 1
+
+
+def test_cancel_cuts_off_request_waiting_for_response(server, tmp_path):
+    elapsed, disconnected_at, cancelled_at, tokens = cancelled_analysis(server, tmp_path, stream=False)
+    assert tokens == []
+    assert elapsed < 1.5
+    assert disconnected_at is not None and disconnected_at - cancelled_at < 1
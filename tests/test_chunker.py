@@ -0,0 +1,63 @@
+"""chunk_source and select_symbol_chunks: symbol-level chunks of source files"""
+
+import pytest
+
+from jira_analyzer_OPENAI import chunk_source, get_token_counter, select_symbol_chunks
+
+
+# chunk_source: (path, source) -> [(name, kind, start, end), ...]
+CHUNK_CASES = [
+    ('python', 'd.py',
+     'class Order:\n    def total(self):\n        return 1\n\n\ndef helper():\n    pass\n',
+     [('Order', 'class', 1, 3), ('Order.total', 'function', 2, 3), ('helper', 'function', 6, 7)]),
+    ('java nested blocks', 'e.java',
+     'public class Svc {\n  public void run() {\n    if (x) {\n      y();\n    }\n  }\n}\n',
+     [('Svc', 'class', 1, 7), ('Svc.run', 'function', 2, 6)]),
+    ('typed async arrow function', 'a.ts',
+     'export const handler = async (req: Request): Promise<Response> => {\n  return x;\n}\n',
+     [('handler', 'function', 1, 3)]),
+    ('constructor initializer braces', 'b.cpp',
+     'Parser::Parser(int a) : a_(a), b_{0} {\n  init();\n  run();\n}\n',
+     [('Parser::Parser', 'function', 1, 4)]),
+    ('same-line nesting', 'c.js',
+     'class A { m(x) { return x; } n() { return 1; } }\n',
+     [('A', 'class', 1, 1), ('A.m', 'function', 1, 1), ('A.n', 'function', 1, 1)]),
+    ('unsupported language', 'notes.md', '# Title\n', []),
+]
+
+
+@pytest.mark.parametrize('rel_path, content, expected', [case[1:] for case in CHUNK_CASES],
+                         ids=[case[0] for case in CHUNK_CASES])
+def test_chunk_source(rel_path, content, expected):
+    symbols = chunk_source(rel_path, content)
+    assert [(s['name'], s['kind'], s['start'], s['end']) for s in symbols] == expected
+
+
+PAYMENTS = (
+    'def charge(order):\n    return gateway.charge(order.total)\n\n\n'
+    'def refund(order):\n    amount = order.total\n    return gateway.refund(order, amount)\n\n\n'
+    'def receipt(order):\n    return render(order)\n'
+)
+
+
+def test_select_symbol_chunks_sends_matching_functions_whole():
+    counter = get_token_counter('gpt-4o')
+    chunks = select_symbol_chunks(PAYMENTS, chunk_source('pay.py', PAYMENTS), ['refund'], 1000, counter)
+    assert [(symbol['name'], text) for symbol, text in chunks] == [
+        ('refund', '@@ lines 5-7: function refund @@\n'
+                   'def refund(order):\n    amount = order.total\n    return gateway.refund(order, amount)\n')]
+
+
+def test_select_symbol_chunks_keeps_source_order_within_budget():
+    counter = get_token_counter('gpt-4o')
+    symbols = chunk_source('pay.py', PAYMENTS)
+    chunks = select_symbol_chunks(PAYMENTS, symbols, ['gateway', 'refund'], 1000, counter)
+    assert [symbol['name'] for symbol, text in chunks] == ['charge', 'refund']
+    # Only the best match fits a small budget
+    chunks = select_symbol_chunks(PAYMENTS, symbols, ['gateway', 'refund'], 30, counter)
+    assert [symbol['name'] for symbol, text in chunks] == ['refund']
+
+
+def test_select_symbol_chunks_without_match():
+    counter = get_token_counter('gpt-4o')
+    assert select_symbol_chunks(PAYMENTS, chunk_source('pay.py', PAYMENTS), ['checkout'], 1000, counter) == []
@@ -0,0 +1,71 @@
+"""AnalysisHistory and find_duplicate: reusing the analysis of a re-reported issue"""
+
+from conftest import completion
+from jira_analyzer_OPENAI import AnalysisHistory, JiraAnalyzer
+
+COMPLETIONS = '/v1/chat/completions'
+
+CHECKOUT = ('Checkout crashes with NullPointerException',
+            'Clicking Pay on the checkout page throws NullPointerException in PaymentService.charge')
+CHECKOUT_AGAIN = ('Checkout page crashes: NullPointerException',
+                  'Pressing Pay on checkout throws a NullPointerException in PaymentService.charge')
+LOGIN = ('Login button misaligned on mobile', 'The login button overlaps the footer on small screens')
+
+
+def history_with(tmp_path, max_issues=100):
+    history = AnalysisHistory(tmp_path, max_issues)
+    history.add('BUG-1', *CHECKOUT, 'analysis 1')
+    history.add('BUG-2', *LOGIN, 'analysis 2')
+    return history
+
+
+def test_similar_ranks_the_re_report_first(tmp_path):
+    matches = history_with(tmp_path).similar(*CHECKOUT_AGAIN)
+    assert [record['key'] for _, record in matches] == ['BUG-1']
+    assert matches[0][0] > 0.6
+
+
+def test_similar_excludes_the_issue_itself(tmp_path):
+    history = history_with(tmp_path)
+    assert history.similar(*CHECKOUT)[0][0] == 1.0
+    assert history.similar(*CHECKOUT, exclude='BUG-1') == []
+    assert history.similar('', '') == []
+
+
+def test_history_persists_and_replaces_records(tmp_path):
+    history = history_with(tmp_path)
+    history.add('BUG-1', *LOGIN, 'analysis 1, second run')
+    reloaded = AnalysisHistory(tmp_path, 100)
+    matches = reloaded.similar(*LOGIN)
+    assert sorted((record['key'], record['analysis']) for _, record in matches) == [
+        ('BUG-1', 'analysis 1, second run'), ('BUG-2', 'analysis 2')]
+    assert reloaded.similar(*CHECKOUT_AGAIN) == []
+
+
+def test_oldest_issues_are_dropped(tmp_path):
+    history = history_with(tmp_path, max_issues=1)
+    assert history.similar(*CHECKOUT_AGAIN) == []
+    assert [record['key'] for _, record in AnalysisHistory(tmp_path, 1).similar(*LOGIN)] == ['BUG-2']
+
+
+def test_duplicate_is_answered_without_openai(openai, tmp_path):
+    openai.routes[COMPLETIONS] = lambda request: completion('Guard against a missing payment method')
+    analyzer = JiraAnalyzer({
+        'cache_dir': str(tmp_path / 'cache'), 'workspace_path': str(tmp_path),
+        'openai_api_url': openai.base_url + COMPLETIONS, 'openai_api_key': 'test-key', 'openai_stream': False,
+        'jira_base_url': 'https://jira.example.com', 'telemetry_enabled': False,
+    })
+
+    def issue(key, summary, description):
+        return {'key': key, 'fields': {'summary': summary, 'description': description}}
+
+    analyzer.generate_copilot_analysis(issue('BUG-1', *CHECKOUT))
+    analysis = analyzer.generate_copilot_analysis(issue('BUG-7', *CHECKOUT_AGAIN))
+    assert 'BUG-7 looks like a re-report of BUG-1' in analysis
+    assert 'https://jira.example.com/browse/BUG-1' in analysis
+    assert 'Guard against a missing payment method' in analysis
+    assert len(openai.hits(COMPLETIONS)) == 1
+
+    analyzer.generate_copilot_analysis(issue('BUG-7', *CHECKOUT_AGAIN), bypass_cache=True)
+    analyzer.generate_copilot_analysis(issue('BUG-8', *LOGIN))
+    assert len(openai.hits(COMPLETIONS)) == 3
@@ -0,0 +1,84 @@
+"""git_source_files and git_changed_files: workspace discovery from the git index"""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from jira_analyzer_OPENAI import JiraAnalyzer, git_changed_files, git_source_files
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason='needs git')
+
+EXTENSIONS = ['.py', '.js']
+
+
+def git(root, *args):
+    subprocess.run(['git', '-C', str(root), '-c', 'user.name=Dev', '-c', 'user.email=dev@example.com',
+                    '-c', 'commit.gpgsign=false', *args], check=True, capture_output=True)
+
+
+def write(root, path, text='x = 1\n'):
+    target = root / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(text)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / 'repo'
+    root.mkdir()
+    git(root, 'init', '-q')
+    write(root, 'a.py')
+    write(root, 'src/b.js')
+    write(root, 'node_modules/vendored.js')
+    write(root, 'README.md', '# readme\n')
+    write(root, '.gitignore', 'generated/\n')
+    git(root, 'add', '-A')
+    git(root, 'commit', '-q', '-m', 'first')
+    write(root, 'src/c.py')
+    git(root, 'add', '-A')
+    git(root, 'commit', '-q', '-m', 'second')
+    write(root, 'generated/out.py')
+    write(root, 'new.py')
+    return root
+
+
+def listed(root, files_by_ext):
+    prefix = os.path.join(str(root), '')
+    return {ext: [path[len(prefix):].replace(os.sep, '/') for path, stat in files]
+            for ext, files in files_by_ext.items()}
+
+
+def test_source_files_come_from_the_index(repo):
+    files_by_ext = git_source_files(repo, EXTENSIONS, ['node_modules'])
+    assert listed(repo, files_by_ext) == {'.py': ['a.py', 'new.py', 'src/c.py'], '.js': ['src/b.js']}
+    assert all(stat is None for files in files_by_ext.values() for path, stat in files)
+
+
+def test_untracked_files_can_be_left_out(repo):
+    files_by_ext = git_source_files(repo, EXTENSIONS, ['node_modules'], untracked=False)
+    assert listed(repo, files_by_ext)['.py'] == ['a.py', 'src/c.py']
+
+
+def test_outside_a_repository(tmp_path):
+    assert git_source_files(tmp_path, EXTENSIONS, []) is None
+    assert git_changed_files(tmp_path, 'HEAD') is None
+
+
+def test_changed_files(repo):
+    write(repo, 'a.py', 'x = 2\n')  # Uncommitted edit
+    assert git_changed_files(repo, recent_commits=1) == {'a.py', 'src/c.py', 'new.py'}
+    assert git_changed_files(repo, 'HEAD') == {'a.py', 'new.py'}
+    # More commits than the history holds: everything counts as changed
+    assert git_changed_files(repo, recent_commits=5) >= {'a.py', 'src/b.js', 'src/c.py', 'new.py'}
+    assert git_changed_files(repo, 'no-such-ref') is None
+
+
+def test_change_scoped_scan(repo, tmp_path):
+    analyzer = JiraAnalyzer({'cache_dir': str(tmp_path / 'cache'), 'workspace_path': str(repo),
+                             'scan_recent_commits': 1, 'telemetry_enabled': False})
+    context = analyzer.scan_workspace_files()
+    assert sorted(context['candidates']) == ['new.py', 'src/c.py']
+    assert context['discovery'] == {'source': 'git', 'roots': 1, 'shards': 1, 'hot': False,
+                                    'changed_files': 2, 'since': 'last 1 commits'}
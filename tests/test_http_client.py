@@ -0,0 +1,95 @@
+"""HttpClient: pooled session, retries with backoff, Retry-After and rate limiting"""
+
+import socket
+import time
+
+import pytest
+import requests
+
+from jira_analyzer_OPENAI import HttpClient, RateLimiter
+
+
+def client(**kwargs):
+    kwargs.setdefault('backoff_base', 0.01)
+    return HttpClient({'default': 5}, **kwargs)
+
+
+def responses(*outcomes):
+    """Route answering the given (status, headers) pairs in turn, then 200"""
+    queue = list(outcomes)
+
+    def route(request):
+        status, headers = queue.pop(0) if queue else (200, {})
+        return status, headers, {'status': status}
+    return route
+
+
+def test_transient_errors_are_retried(jira):
+    jira.routes['/x'] = responses((503, {}), (502, {}))
+    response = client().get(jira.base_url + '/x')
+    assert response.status_code == 200
+    assert len(jira.hits('/x')) == 3
+
+
+def test_client_errors_are_not_retried(jira):
+    jira.routes['/x'] = responses((404, {}))
+    assert client().get(jira.base_url + '/x').status_code == 404
+    assert len(jira.hits('/x')) == 1
+
+
+def test_last_attempt_returns_the_failure(jira):
+    jira.routes['/x'] = responses(*[(503, {})] * 5)
+    assert client(max_retries=2).get(jira.base_url + '/x').status_code == 503
+    assert len(jira.hits('/x')) == 3
+
+
+def test_429_waits_for_retry_after_and_slows_the_limiter(jira):
+    jira.routes['/x'] = responses((429, {'Retry-After': '0.3'}))
+    limiter = RateLimiter(600000)
+    started = time.monotonic()
+    assert client(limiters={'jira': limiter}).get(jira.base_url + '/x', 'jira').status_code == 200
+    assert time.monotonic() - started >= 0.3
+    assert len(jira.hits('/x')) == 2
+    assert limiter.blocked_until >= started + 0.3  # Other callers of the API paused too
+
+
+def test_too_long_retry_after_is_not_waited_for(jira):
+    jira.routes['/x'] = responses((429, {'Retry-After': '120'}))
+    started = time.monotonic()
+    assert client(retry_after_max=60).get(jira.base_url + '/x').status_code == 429
+    assert time.monotonic() - started < 1
+
+
+def test_exhausted_openai_quota_is_not_retried(jira):
+    jira.routes['/x'] = lambda request: (429, {}, {'error': {'code': 'insufficient_quota'}})
+    assert client().post(jira.base_url + '/x', json={}).status_code == 429
+    assert len(jira.hits('/x')) == 1
+
+
+def test_connection_errors_are_retried_then_raised():
+    with socket.socket() as listener:
+        listener.bind(('127.0.0.1', 0))
+        port = listener.getsockname()[1]  # Nothing listens once the socket is closed
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client(max_retries=1).get(f"http://127.0.0.1:{port}/x")
+
+
+def test_connections_are_reused(jira):
+    jira.routes['/x'] = responses()
+    http = client()
+    for _ in range(3):
+        http.get(jira.base_url + '/x')
+    assert jira.connections == 1
+
+
+@pytest.mark.parametrize('value, expected', [('3', 3.0), ('0.5', 0.5), ('-1', 0.0), ('soon', None), (None, None)])
+def test_retry_after(value, expected):
+    response = requests.Response()
+    if value is not None:
+        response.headers['Retry-After'] = value
+    assert HttpClient.retry_after(response) == expected
+
+
+def test_backoff_is_capped_full_jitter():
+    http = client(backoff_base=1, backoff_max=4)
+    assert all(0 <= http.backoff_delay(attempt) <= min(4, 2 ** attempt) for attempt in range(6) for _ in range(20))
@@ -0,0 +1,72 @@
+"""fetch_jira_bug and IssueCache: local issue cache revalidated by ETag or `updated`"""
+
+from jira_analyzer_OPENAI import JiraAnalyzer
+
+ISSUE = '/rest/api/3/issue/BUG-1'
+
+
+def analyzer_for(jira, tmp_path, ttl):
+    return JiraAnalyzer({
+        'cache_dir': str(tmp_path / 'cache'), 'workspace_path': str(tmp_path),
+        'jira_base_url': jira.base_url, 'jira_email': 'dev@example.com', 'jira_api_token': 'token',
+        'jira_cache_ttl': ttl, 'telemetry_enabled': False,
+    })
+
+
+def serve_issue(jira, summary, updated, etag=None):
+    def route(request):
+        if request['params'].get('fields') == 'updated':
+            return 200, {}, {'key': 'BUG-1', 'fields': {'updated': updated}}
+        if etag and request['headers'].get('If-None-Match') == etag:
+            return 304, {'ETag': etag}, b''
+        return 200, {'ETag': etag} if etag else {}, {'key': 'BUG-1', 'fields': {'summary': summary,
+                                                                              'updated': updated}}
+    jira.routes[ISSUE] = route
+
+
+def summary(analyzer):
+    return analyzer.fetch_jira_bug('BUG-1')['fields']['summary']
+
+
+def test_fresh_issue_is_served_without_a_request(jira, tmp_path):
+    serve_issue(jira, 'Crash', '2024-01-01', etag='"v1"')
+    assert summary(analyzer_for(jira, tmp_path, 300)) == 'Crash'
+    analyzer = analyzer_for(jira, tmp_path, 300)  # Records persist across sessions
+    assert summary(analyzer) == 'Crash'
+    assert len(jira.hits(ISSUE)) == 1
+    assert analyzer.issue_cache.stats()['hits'] == 1
+
+
+def test_stale_issue_is_revalidated_with_etag(jira, tmp_path):
+    serve_issue(jira, 'Crash', '2024-01-01', etag='"v1"')
+    analyzer = analyzer_for(jira, tmp_path, 0)
+    assert summary(analyzer) == 'Crash'
+    assert summary(analyzer) == 'Crash'
+    first, second = jira.hits(ISSUE)
+    assert first['headers'].get('If-None-Match') is None
+    assert second['headers'].get('If-None-Match') == '"v1"'
+    assert analyzer.issue_cache.stats()['revalidations'] == 1
+
+    serve_issue(jira, 'Crash on save', '2024-01-02', etag='"v2"')
+    assert summary(analyzer) == 'Crash on save'
+    assert analyzer.issue_cache.stats()['misses'] == 2
+
+
+def test_without_etag_only_the_updated_field_is_compared(jira, tmp_path):
+    serve_issue(jira, 'Crash', '2024-01-01')
+    analyzer = analyzer_for(jira, tmp_path, 0)
+    assert summary(analyzer) == 'Crash'
+    assert summary(analyzer) == 'Crash'
+    assert [hit['params']['fields'] == 'updated' for hit in jira.hits(ISSUE)] == [False, True]
+
+    serve_issue(jira, 'Crash on save', '2024-01-02')
+    assert summary(analyzer) == 'Crash on save'
+    assert [hit['params']['fields'] == 'updated' for hit in jira.hits(ISSUE)] == [False, True, True, False]
+
+
+def test_use_cache_false_always_downloads(jira, tmp_path):
+    serve_issue(jira, 'Crash', '2024-01-01', etag='"v1"')
+    analyzer = analyzer_for(jira, tmp_path, 300)
+    analyzer.fetch_jira_bug('BUG-1')
+    analyzer.fetch_jira_bug('BUG-1', use_cache=False)
+    assert [hit['headers'].get('If-None-Match') for hit in jira.hits(ISSUE)] == [None, None]
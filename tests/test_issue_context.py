@@ -0,0 +1,76 @@
+"""IssueContextFetcher: concurrent related-issue fetches under one deadline, cut off on cancel"""
+
+import threading
+import time
+
+import pytest
+
+from conftest import STALL
+from jira_analyzer_OPENAI import AnalysisCancelled, JiraAnalyzer
+
+ISSUE = '/rest/api/3/issue/BUG-1'
+LINKED = '/rest/api/3/issue/BUG-2'
+SUBTASK = '/rest/api/3/issue/BUG-3'
+
+
+def issue(key, **fields):
+    return 200, {}, {'key': key, 'fields': dict({'summary': f"{key} summary", 'status': {'name': 'Open'}}, **fields)}
+
+
+def analyzer_for(jira, tmp_path, **config):
+    return JiraAnalyzer(dict({
+        'cache_dir': str(tmp_path / 'cache'), 'workspace_path': str(tmp_path),
+        'jira_base_url': jira.base_url, 'jira_email': 'dev@example.com', 'jira_api_token': 'token',
+        'related_fetch_deadline': 1, 'duplicate_detection': False, 'telemetry_enabled': False,
+    }, **config))
+
+
+@pytest.fixture
+def linked_jira(jira):
+    jira.routes[ISSUE] = lambda request: issue(
+        'BUG-1', issuelinks=[{'type': {'outward': 'blocks'}, 'outwardIssue': {'key': 'BUG-2'}}],
+        subtasks=[{'key': 'BUG-3'}])
+    jira.routes[LINKED] = lambda request: issue('BUG-2')
+    return jira
+
+
+def test_related_issues_are_fetched(linked_jira, tmp_path):
+    linked_jira.routes[SUBTASK] = lambda request: issue('BUG-3')
+    related = analyzer_for(linked_jira, tmp_path).fetch_issue_context('BUG-1')['related']
+    assert [(item['key'], item['relation']) for item in related['links']] == [('BUG-2', 'blocks')]
+    assert [item['key'] for item in related['subtasks']] == ['BUG-3']
+    assert related['timed_out'] == [] and related['errors'] == []
+
+
+def test_deadline_cuts_off_stalled_request(linked_jira, tmp_path):
+    linked_jira.routes[SUBTASK] = lambda request: STALL
+    started = time.monotonic()
+    related = analyzer_for(linked_jira, tmp_path).fetch_issue_context('BUG-1')['related']
+    returned_at = time.monotonic()
+    assert returned_at - started < 1.5
+    assert [item['key'] for item in related['links']] == ['BUG-2']
+    assert related['timed_out'] == ['BUG-3']
+    # The stalled call is cut off, not left running into its read timeout and retries
+    time.sleep(0.3)
+    assert linked_jira.disconnected.get(SUBTASK, float('inf')) - returned_at < 0.3
+    assert len(linked_jira.hits(SUBTASK)) == 1
+
+
+def test_cancel_cuts_off_stalled_request(linked_jira, tmp_path):
+    linked_jira.routes[SUBTASK] = lambda request: STALL
+    analyzer = analyzer_for(linked_jira, tmp_path, related_fetch_deadline=20)
+    cancel_event = threading.Event()
+    analyzer._worker_state.cancel_event = cancel_event
+    timer = threading.Timer(0.5, cancel_event.set)
+    timer.start()
+    started = time.monotonic()
+    try:
+        with pytest.raises(AnalysisCancelled):
+            analyzer.fetch_issue_context('BUG-1')
+    finally:
+        timer.cancel()
+    cancelled_at = time.monotonic()
+    assert cancelled_at - started < 1.5
+    time.sleep(0.3)
+    assert linked_jira.disconnected.get(SUBTASK, float('inf')) - cancelled_at < 0.3
+    assert len(linked_jira.hits(SUBTASK)) == 1
@@ -0,0 +1,91 @@
+"""iter_jira_pages and issue_fields_param: lazily paginated, field-filtered JIRA requests"""
+
+from itertools import islice
+
+from jira_analyzer_OPENAI import JiraAnalyzer
+
+COMMENTS = '/rest/api/3/issue/BUG-1/comment'
+CHANGELOG = '/rest/api/3/issue/BUG-1/changelog'
+
+
+def analyzer_for(jira, tmp_path, **config):
+    return JiraAnalyzer(dict({
+        'cache_dir': str(tmp_path / 'cache'), 'workspace_path': str(tmp_path),
+        'jira_base_url': jira.base_url, 'jira_email': 'dev@example.com', 'jira_api_token': 'token',
+        'jira_page_size': 50, 'telemetry_enabled': False,
+    }, **config))
+
+
+def paginated(items_key, items):
+    """Route serving items with startAt/maxResults like JIRA (pages capped at 100)"""
+    def route(request):
+        start = int(request['params'].get('startAt', 0))
+        size = min(int(request['params'].get('maxResults', 50)), 100)
+        page = items[start:start + size]
+        return 200, {}, {items_key: page, 'startAt': start, 'maxResults': size, 'total': len(items),
+                         'isLast': start + len(page) >= len(items)}
+    return route
+
+
+def pages(jira, path):
+    return [(int(hit['params']['startAt']), int(hit['params']['maxResults'])) for hit in jira.hits(path)]
+
+
+def comment(i):
+    return {'id': str(i), 'author': {'displayName': f"User {i}"}, 'created': f"2024-01-{i % 28 + 1:02d}T10:00",
+            'body': f"comment {i}"}
+
+
+def history(i):
+    return {'author': {'displayName': 'Dev'}, 'created': '2024-02-01T10:00',
+            'items': [{'field': 'status', 'fromString': f"s{i}", 'toString': f"s{i + 1}"}]}
+
+
+def test_pages_are_requested_up_to_the_limit(jira, tmp_path):
+    jira.routes[COMMENTS] = paginated('comments', [comment(i) for i in range(120)])
+    analyzer = analyzer_for(jira, tmp_path)
+    items = list(analyzer.iter_jira_pages(jira.base_url + COMMENTS, 'comments', limit=70))
+    assert [item['id'] for item in items] == [str(i) for i in range(70)]
+    assert pages(jira, COMMENTS) == [(0, 50), (50, 20)]
+
+
+def test_pages_are_requested_only_as_items_are_consumed(jira, tmp_path):
+    jira.routes[COMMENTS] = paginated('comments', [comment(i) for i in range(120)])
+    analyzer = analyzer_for(jira, tmp_path)
+    assert len(list(islice(analyzer.iter_jira_pages(jira.base_url + COMMENTS, 'comments'), 10))) == 10
+    assert pages(jira, COMMENTS) == [(0, 50)]
+    assert len(list(analyzer.iter_jira_pages(jira.base_url + COMMENTS, 'comments'))) == 120
+    assert pages(jira, COMMENTS)[1:] == [(0, 50), (50, 50), (100, 50)]
+
+
+def test_newest_comments_are_requested(jira, tmp_path):
+    jira.routes[COMMENTS] = paginated('comments', [comment(i) for i in range(30)])
+    comments = analyzer_for(jira, tmp_path, comment_limit=5).fetch_issue_comments('BUG-1')
+    assert [c['body'] for c in comments] == [f"comment {i}" for i in range(5)]
+    assert comments[0] == {'author': 'User 0', 'created': '2024-01-01', 'body': 'comment 0'}
+    [hit] = jira.hits(COMMENTS)
+    assert (hit['params']['orderBy'], hit['params']['maxResults']) == ('-created', '5')
+
+
+def test_only_the_newest_changelog_pages_are_requested(jira, tmp_path):
+    jira.routes[CHANGELOG] = paginated('values', [history(i) for i in range(130)])
+    changelog = analyzer_for(jira, tmp_path, changelog_limit=20).fetch_issue_changelog('BUG-1')
+    assert [entry['changes'] for entry in changelog] == [f"status: s{i} → s{i + 1}" for i in range(110, 130)]
+    assert pages(jira, CHANGELOG) == [(0, 1), (110, 20)]
+
+
+def test_issue_requests_ask_for_the_configured_fields(jira, tmp_path):
+    jira.routes['/rest/api/3/issue/BUG-1'] = lambda request: (200, {}, {'key': 'BUG-1', 'fields': {}})
+    analyzer = analyzer_for(jira, tmp_path, jira_fields=['summary', 'description', 'updated'],
+                            jira_extra_fields={'customfield_10010': 'Steps', 'summary': 'Summary'})
+    assert analyzer.issue_fields_param() == 'summary,description,updated,customfield_10010'
+    analyzer.fetch_jira_bug('BUG-1')
+    assert jira.hits('/rest/api/3/issue/BUG-1')[0]['params']['fields'] == analyzer.issue_fields_param()
+
+
+def test_cached_issue_with_other_fields_is_downloaded_again(jira, tmp_path):
+    jira.routes['/rest/api/3/issue/BUG-1'] = lambda request: (200, {}, {'key': 'BUG-1', 'fields': {}})
+    analyzer_for(jira, tmp_path, jira_cache_ttl=300).fetch_jira_bug('BUG-1')
+    analyzer = analyzer_for(jira, tmp_path, jira_cache_ttl=300, jira_extra_fields={'customfield_1': 'Team'})
+    analyzer.fetch_jira_bug('BUG-1')
+    assert len(jira.hits('/rest/api/3/issue/BUG-1')) == 2
@@ -0,0 +1,89 @@
+"""truncate_to_tokens, PromptPacker and build_prompt: packing the prompt into a token budget"""
+
+import pytest
+
+from jira_analyzer_OPENAI import JiraAnalyzer, PromptPacker, truncate_to_tokens
+
+
+class WordCounter:
+    """One token per whitespace-separated word, so budgets are easy to reason about"""
+
+    def count(self, text):
+        return len(text.split())
+
+
+BLOCKS = 'a = 1\nb = 2\n\nc = 3\nd = 4\ne = 5\n'
+LINES = 'a = 1\nb = 2\nc = 3\nd = 4\n'
+
+# (text, max_tokens) -> (kept text, kept lines of all lines)
+TRUNCATE_CASES = [
+    ('fits whole', BLOCKS, 100, BLOCKS, 6),
+    ('cut back to the blank line', BLOCKS, 13, 'a = 1\nb = 2\n\n', 3),
+    ('cut at the last whole line without a boundary', LINES, 10, 'a = 1\nb = 2\nc = 3\n', 3),
+    ('nothing fits', BLOCKS, 2, '', 0),
+]
+
+
+@pytest.mark.parametrize('source, max_tokens, expected_text, expected_kept', [case[1:] for case in TRUNCATE_CASES],
+                         ids=[case[0] for case in TRUNCATE_CASES])
+def test_truncate_to_tokens(source, max_tokens, expected_text, expected_kept):
+    text, tokens, kept, total = truncate_to_tokens(source, max_tokens, WordCounter())
+    assert (text, kept, total) == (expected_text, expected_kept, len(source.splitlines()))
+    assert tokens == WordCounter().count(text) <= max_tokens
+
+
+def test_truncate_to_tokens_prefers_closing_brace():
+    source = 'void a() {\n  x();\n}\nvoid b() {\n  y();\n  z();\n}\n'
+    text, tokens, kept, total = truncate_to_tokens(source, 8, WordCounter())
+    assert text == 'void a() {\n  x();\n}\n'
+
+
+def test_prompt_packer_accounts_every_section():
+    packer = PromptPacker(WordCounter(), 10)
+    assert packer.reserve('template', 'one two three') == 3
+    assert packer.add('description', 'a b\nc d\ne f\n', max_tokens=4) == ('a b\nc d\n', 2, 3)
+    assert packer.add('code', 'w x\ny z\n') == ('w x\n', 1, 2)
+    assert packer.report == {'template': 3, 'description': 4, 'code': 2}
+    assert packer.remaining == 1
+    packer.reserve('template', 'too much text')
+    assert packer.remaining == 0
+
+
+def function(name, body_lines):
+    return f"def {name}(order):\n" + ''.join(f"    step_{i} = compute_{name}(order, {i})\n"
+                                              for i in range(body_lines)) + "\n\n"
+
+
+@pytest.fixture
+def large_workspace(tmp_path):
+    workspace = tmp_path / 'ws'
+    workspace.mkdir()
+    for i in range(8):
+        (workspace / f"module_{i}.py").write_text(''.join(function(f"task_{i}_{j}", 60) for j in range(5)))
+    (workspace / 'refunds.py').write_text(function('refund_payment', 10) + function('unrelated', 400))
+    return workspace
+
+
+def test_build_prompt_stays_within_budget(large_workspace, tmp_path):
+    analyzer = JiraAnalyzer({'cache_dir': str(tmp_path / 'cache'), 'workspace_path': str(large_workspace),
+                             'prompt_input_budget': 4000, 'prompt_max_tokens_per_file': 1200,
+                             'telemetry_enabled': False})
+    context = analyzer.rank_workspace_files(analyzer.scan_workspace_files(), 'refund_payment fails')
+    description = 'The refund_payment step fails for partial refunds. ' * 400
+    prompt, report = analyzer.build_prompt('BUG-1', 'Refund fails', description, context)
+
+    assert report['budget'] == 4000
+    assert report['total'] <= 4000
+    assert report['description'] <= 4000 // 4
+    assert report['code_files'] >= 2
+    # The best match is too big to send whole: only its matching function goes in
+    assert '--- File 1: refunds.py (1 relevant symbols of' in prompt
+    assert 'def refund_payment(order)' in prompt and 'def unrelated(order)' not in prompt
+
+
+def test_build_prompt_budget_leaves_room_for_the_answer(tmp_path):
+    analyzer = JiraAnalyzer({'cache_dir': str(tmp_path / 'cache'), 'workspace_path': str(tmp_path),
+                             'prompt_input_budget': 100000, 'model_context_window': 8000,
+                             'max_completion_tokens': 3000, 'telemetry_enabled': False})
+    prompt, report = analyzer.build_prompt('BUG-1', 'Crash', 'It crashes', {'files': []})
+    assert report['budget'] == 5000
@@ -0,0 +1,78 @@
+"""RateLimiter: request and token buckets, usage correction and server feedback"""
+
+import pytest
+
+from jira_analyzer_OPENAI import RateLimiter
+
+
+def waited(seconds, expected):
+    """The limiter waited about `expected` seconds (scheduling can only make it later)"""
+    return expected - 0.02 <= seconds < expected + 0.25
+
+
+def fast_limiter(tokens_per_minute=600000):
+    # 10000 tokens per second and a tiny burst, so waits are short but measurable
+    return RateLimiter(600000, tokens_per_minute, burst_seconds=0.01)
+
+
+def test_oversized_requests_are_charged_in_full():
+    limiter = fast_limiter()
+    waits = []
+    for _ in range(3):
+        waits.append(limiter.acquire(1500))
+        limiter.record_usage(1500, 900)
+    # The first request fits the (grown) bucket; each later one waits for the 900 tokens really used
+    assert waits[0] < 0.05
+    for wait in waits[1:]:
+        assert waited(wait, 0.09)
+
+
+def test_default_openai_quota_paces_large_requests():
+    limiter = RateLimiter(500, 30000)
+    limiter.acquire(15000)
+    limiter.record_usage(15000, 9000)
+    # 9000 tokens still missing at 500 tokens/s
+    assert limiter.stats()['token_level'] == 6000
+    assert limiter.token_capacity == 15000
+
+
+def test_usage_above_the_estimate_leaves_a_debt():
+    limiter = fast_limiter()
+    limiter.acquire(100)
+    limiter.record_usage(100, 1100)
+    assert limiter.stats()['token_level'] < 0
+    assert waited(limiter.acquire(100), 0.11)
+
+
+def test_without_token_limit_only_requests_are_counted():
+    limiter = RateLimiter(600000)
+    assert limiter.acquire(10 ** 9) < 0.05
+    assert limiter.stats()['token_level'] is None
+
+
+def test_requests_per_minute():
+    limiter = RateLimiter(600, burst_seconds=0.01)  # 10 requests per second, bucket of one
+    limiter.acquire()
+    assert waited(limiter.acquire(), 0.1)
+
+
+def test_penalize_blocks_sending():
+    limiter = fast_limiter()
+    limiter.penalize(0.1)
+    assert waited(limiter.acquire(), 0.1)
+
+
+def test_openai_headers_exhausted_quota_waits_for_reset():
+    limiter = fast_limiter()
+    limiter.update_from_headers({'x-ratelimit-limit-tokens': '600000', 'x-ratelimit-remaining-tokens': '0',
+                                 'x-ratelimit-reset-tokens': '100ms'})
+    assert waited(limiter.acquire(10), 0.1)
+
+
+def test_jira_headers_set_the_request_rate():
+    limiter = RateLimiter(60)
+    limiter.update_from_headers({'X-RateLimit-FillRate': '10', 'X-RateLimit-Interval-Seconds': '1',
+                                 'X-RateLimit-Remaining': '3'})
+    stats = limiter.stats()
+    assert stats['requests_per_minute'] == 600
+    assert stats['request_level'] == pytest.approx(3, abs=0.1)
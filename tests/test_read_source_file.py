@@ -0,0 +1,39 @@
+"""read_source_file: bounded reads that skip binary and minified files"""
+
+import pytest
+
+from jira_analyzer_OPENAI import JiraAnalyzer, read_source_file
+
+# (name, file name, bytes, max_lines, max_bytes) -> (content, line_count) or None
+READ_CASES = [
+    ('whole file', 'a.py', b'a = 1\nb = 2\n', 10, 1000, ('a = 1\nb = 2\n', 2)),
+    ('line limit', 'a.py', b'a\nb\nc\n', 2, 1000, ('a\nb\n', 2)),
+    ('byte limit cuts at a line end', 'a.py', b'first\nsecond\nthird\n', 10, 16, ('first\nsecond\n', 2)),
+    ('no trailing newline', 'a.py', b'a\nb', 10, 1000, ('a\nb', 2)),
+    ('invalid utf-8 dropped', 'a.py', b'caf\xe9 = 1\n', 10, 1000, ('caf = 1\n', 1)),
+    ('binary', 'a.py', b'\x89PNG\r\n\x1a\n\0\0\0', 10, 1000, None),
+    ('minified by name', 'app.min.js', b'var a=1;\n', 10, 1000, None),
+    ('minified by line length', 'app.js', b'var a=1;' * 1000 + b'\n', 10, 100000, None),
+]
+
+
+@pytest.mark.parametrize('file_name, data, max_lines, max_bytes, expected', [case[1:] for case in READ_CASES],
+                         ids=[case[0] for case in READ_CASES])
+def test_read_source_file(tmp_path, file_name, data, max_lines, max_bytes, expected):
+    path = tmp_path / file_name
+    path.write_bytes(data)
+    assert read_source_file(str(path), max_lines, max_bytes) == expected
+
+
+def test_skipped_files_are_indexed_but_not_candidates(tmp_path):
+    workspace = tmp_path / 'ws'
+    workspace.mkdir()
+    (workspace / 'a.py').write_text('a = 1\n')
+    (workspace / 'blob.py').write_bytes(b'\0' * 64)
+    config = {'cache_dir': str(tmp_path / 'cache'), 'workspace_path': str(workspace), 'telemetry_enabled': False}
+    assert JiraAnalyzer(config).scan_workspace_files()['candidates'] == ['a.py']
+
+    analyzer = JiraAnalyzer(config)
+    assert analyzer.scan_workspace_files()['candidates'] == ['a.py']
+    # The binary file is remembered as skipped, not read again
+    assert analyzer.get_workspace_index().stats()['misses'] == 0
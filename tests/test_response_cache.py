@@ -0,0 +1,61 @@
+"""ResponseCache: content-addressed LLM responses with LRU eviction"""
+
+import os
+import time
+
+from conftest import completion
+from jira_analyzer_OPENAI import JiraAnalyzer, ResponseCache
+
+COMPLETIONS = '/v1/chat/completions'
+
+
+def test_key_is_the_canonical_request():
+    payload = {'model': 'gpt-4o', 'messages': [{'role': 'user', 'content': 'hi'}], 'temperature': 0.7}
+    reordered = dict(reversed(list(payload.items())))
+    assert ResponseCache.key_for('u', payload) == ResponseCache.key_for('u', reordered)
+    assert ResponseCache.key_for('u', payload) != ResponseCache.key_for('v', payload)
+    assert ResponseCache.key_for('u', payload) != ResponseCache.key_for('u', dict(payload, temperature=0.2))
+
+
+def test_round_trip_and_counters(tmp_path):
+    cache = ResponseCache(tmp_path, 10 ** 6, 3600)
+    assert cache.get('a') is None
+    cache.put('a', 'answer', {'total_tokens': 5})
+    entry = cache.get('a')
+    assert (entry['content'], entry['usage']) == ('answer', {'total_tokens': 5})
+    assert cache.stats() == {'hits': 1, 'misses': 1}
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(tmp_path, 10 ** 6, 3600)
+    for key, seconds_ago in (('a', 30), ('b', 20), ('c', 10)):
+        cache.put(key, 'x' * 100)
+        then = time.time() - seconds_ago
+        os.utime(cache.cache_dir / f"{key}.json", (then, then))
+    assert cache.get('a') is not None  # Oldest write, but just used
+    cache.max_bytes = int(3.5 * (cache.cache_dir / 'a.json').stat().st_size)  # Room for three entries
+    cache.put('d', 'x' * 100)
+    assert sorted(path.stem for path in cache.cache_dir.glob('*.json')) == ['a', 'c', 'd']
+
+
+def test_expired_entries_miss(tmp_path):
+    cache = ResponseCache(tmp_path, 10 ** 6, 0)
+    cache.put('a', 'answer')
+    assert cache.get('a') is None
+    assert not (cache.cache_dir / 'a.json').exists()
+
+
+def test_identical_analysis_is_answered_from_the_cache(openai, tmp_path):
+    openai.routes[COMPLETIONS] = lambda request: completion('Root cause: the refund path')
+    analyzer = JiraAnalyzer({
+        'cache_dir': str(tmp_path / 'cache'), 'workspace_path': str(tmp_path),
+        'openai_api_url': openai.base_url + COMPLETIONS, 'openai_api_key': 'test-key', 'openai_stream': False,
+        'duplicate_detection': False, 'telemetry_enabled': False,
+    })
+    context = {'files': []}
+    for _ in range(2):
+        assert 'Root cause: the refund path' in analyzer.call_openai_api('BUG-1', 'Refund fails', 'Boom', context)
+    assert len(openai.hits(COMPLETIONS)) == 1
+    analyzer.call_openai_api('BUG-1', 'Refund fails', 'Boom', context, bypass_cache=True)
+    analyzer.call_openai_api('BUG-1', 'Refund fails', 'Boom, edited', context)
+    assert len(openai.hits(COMPLETIONS)) == 3
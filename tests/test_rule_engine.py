@@ -0,0 +1,46 @@
+"""RuleEngine and keyword_trie_pattern: single-pass keyword rules of the fallback analysis"""
+
+import re
+
+import pytest
+
+from jira_analyzer_OPENAI import RuleEngine, keyword_trie_pattern
+
+
+RULES = [('mem', ('memory', 'crash*', 'null pointer*')), ('perf', ('slow*', 'timed out'))]
+
+RULE_CASES = [
+    ('stem and phrase', 'App crashed with null pointer exception', {'mem': (3.0, ['crashed', 'null pointer'])}),
+    ('case-insensitive, counts repeats', 'Crashes, crash and CRASHING; memory',
+     {'mem': (4.0, ['crashes', 'crash', 'crashing', 'memory'])}),
+    ('exact phrase', 'the request timed out, slowly', {'perf': (3.0, ['timed out', 'slowly'])}),
+    ('exact keyword needs the whole word', 'memorylane', {}),
+    ('no hits', 'button colour is off', {}),
+    ('empty text', '', {}),
+]
+
+
+@pytest.mark.parametrize('text, expected', [case[1:] for case in RULE_CASES],
+                         ids=[case[0] for case in RULE_CASES])
+def test_rule_engine(text, expected):
+    assert RuleEngine(RULES).match(text) == expected
+
+
+def test_rule_engine_without_rules():
+    assert RuleEngine([]).match('crash') == {}
+
+
+TRIE_CASES = [
+    ('shared prefix', ['time', 'timeout'], 'time(?:out)?'),
+    ('branches', ['crash', 'cpu'], 'c(?:pu|rash)'),
+    ('escaped', ['c++', 'c#'], 'c(?:\\#|\\+\\+)'),
+    ('phrase', ['null pointer'], 'null\\ pointer'),
+]
+
+
+@pytest.mark.parametrize('keywords, expected', [case[1:] for case in TRIE_CASES],
+                         ids=[case[0] for case in TRIE_CASES])
+def test_keyword_trie_pattern(keywords, expected):
+    pattern = keyword_trie_pattern(keywords)
+    assert pattern == expected
+    assert all(re.fullmatch(pattern, keyword) for keyword in keywords)
@@ -0,0 +1,72 @@
+"""SearchIndex, tokenize_identifiers and rank_workspace_files: BM25 ranking of workspace files"""
+
+import pytest
+
+from jira_analyzer_OPENAI import JiraAnalyzer, SearchIndex, file_terms, tokenize_identifiers
+
+
+def _search_index():
+    index = SearchIndex()
+    index.add_document('pay', {'payment': 3, 'timeout': 1})
+    index.add_document('ui', {'button': 2, 'render': 2})
+    index.add_document('db', {'timeout': 2, 'connection': 2})
+    return index
+
+
+SEARCH_CASES = [
+    ('higher term frequency ranks first', ['timeout'], None, ['db', 'pay']),
+    ('rarer term outweighs common one', ['payment', 'timeout'], None, ['pay', 'db']),
+    ('limit', ['payment', 'timeout'], 1, ['pay']),
+    ('repeated query terms count once', ['timeout', 'timeout'], None, ['db', 'pay']),
+    ('unknown term', ['nothing'], None, []),
+]
+
+
+@pytest.mark.parametrize('query, limit, expected', [case[1:] for case in SEARCH_CASES],
+                         ids=[case[0] for case in SEARCH_CASES])
+def test_search_index(query, limit, expected):
+    assert [doc_id for doc_id, score in _search_index().search(query, limit)] == expected
+
+
+def test_search_index_idf():
+    index = _search_index()
+    assert index.idf('nothing') == 0.0
+    assert index.idf('payment') > index.idf('timeout') > 0.0
+    assert SearchIndex().search(['timeout']) == []
+
+
+TOKENIZE_CASES = [
+    ('camelCase parts', 'getUserName', ['getusername', 'get', 'user', 'name']),
+    ('snake_case parts', 'max_retry_count', ['max_retry_count', 'max', 'retry', 'count']),
+    ('stop words dropped', 'return self.total', ['total']),
+    ('acronyms', 'parseHTTPResponse', ['parsehttpresponse', 'parse', 'http', 'response']),
+]
+
+
+@pytest.mark.parametrize('text, expected', [case[1:] for case in TOKENIZE_CASES],
+                         ids=[case[0] for case in TOKENIZE_CASES])
+def test_tokenize_identifiers(text, expected):
+    assert tokenize_identifiers(text) == expected
+
+
+def test_file_terms_weights_path_tokens():
+    terms = file_terms('billing/refund.py', 'refund = 1')
+    assert terms['refund'] == 4
+    assert terms['billing'] == 3
+
+
+def test_rank_workspace_files_ranks_every_scanned_file(tmp_path):
+    for name in ('a_cart.py', 'b_login.py', 'c_search.py', 'd_profile.py'):
+        (tmp_path / name).write_text(f"def {name[2:-3]}():\n    return None\n")
+    (tmp_path / 'z_billing.py').write_text('def issue_refund(order):\n    return gateway.refund(order)\n')
+    analyzer = JiraAnalyzer({'cache_dir': str(tmp_path / '.cache'), 'workspace_path': str(tmp_path),
+                             'max_scan_files': 2, 'telemetry_enabled': False})
+    context = analyzer.scan_workspace_files()
+    assert context['total_files'] == 5
+    assert 'z_billing.py' not in [f['path'] for f in context['files']]
+    ranked = analyzer.rank_workspace_files(context, 'Refund fails for cancelled orders')
+    # The matching file is loaded from the index although the scan did not keep it
+    assert [f['path'] for f in ranked['files']][0] == 'z_billing.py'
+    assert 'issue_refund' in ranked['files'][0]['content']
+    assert len(ranked['files']) == 2
+    assert ranked['relevance']['z_billing.py'] > 0
@@ -0,0 +1,84 @@
+"""ShardedWorkspaceIndex and index_files: workspace roots as index shards, cold scans on a process pool"""
+
+import os
+
+import pytest
+
+import jira_analyzer_OPENAI
+from jira_analyzer_OPENAI import JiraAnalyzer, ShardedWorkspaceIndex
+
+
+def write(root, path, text):
+    target = root / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(text)
+
+
+def test_paths_are_routed_to_the_longest_matching_shard(tmp_path):
+    index = ShardedWorkspaceIndex(tmp_path / 'cache')
+    index.set_layout({'': tmp_path, f"svc{os.sep}": tmp_path / 'svc'})
+    index.store(os.path.join('svc', 'a.py'), 1, 1, 'a', 1)
+    index.store('b.py', 1, 1, 'b', 1)
+    index.store(os.path.join('web', 'c.py'), 1, 1, 'c', 1)
+    root, svc = index.shards[''], index.shards[f"svc{os.sep}"]
+    assert sorted(root.entries) == ['b.py', os.path.join('web', 'c.py')]
+    assert list(svc.entries) == ['a.py']
+    assert index.get(os.path.join('svc', 'a.py'))['content'] == 'a'
+
+    index.save()
+    assert root.index_file != svc.index_file and svc.index_file.exists()
+    saved = svc.index_file.stat().st_mtime_ns
+    index.store('b.py', 2, 1, 'b2', 1)
+    index.save()
+    assert svc.index_file.stat().st_mtime_ns == saved  # Only the changed shard is rewritten
+
+
+def test_several_roots_get_prefixed_paths(tmp_path):
+    for name in ('one', 'two'):
+        write(tmp_path / 'a' / 'app', f"{name}.py", f"{name} = 1\n")
+    write(tmp_path / 'b' / 'app', 'three.py', 'three = 1\n')
+    analyzer = JiraAnalyzer({'cache_dir': str(tmp_path / 'cache'), 'telemetry_enabled': False,
+                             'workspace_paths': [str(tmp_path / 'a' / 'app'), str(tmp_path / 'b' / 'app')]})
+    context = analyzer.scan_workspace_files()
+    assert set(context['candidates']) == {os.path.join('app', 'one.py'), os.path.join('app', 'two.py'),
+                                          os.path.join('app-2', 'three.py')}
+    assert context['discovery']['roots'] == 2 and context['discovery']['shards'] == 2
+
+
+def test_large_root_is_split_per_top_level_directory(tmp_path):
+    for path in ('main.py', 'billing/a.py', 'billing/b.py', 'search/c.py'):
+        write(tmp_path / 'ws', path, 'x = 1\n')
+    analyzer = JiraAnalyzer({'cache_dir': str(tmp_path / 'cache'), 'workspace_path': str(tmp_path / 'ws'),
+                             'shard_split_files': 2, 'telemetry_enabled': False})
+    context = analyzer.scan_workspace_files()
+    assert context['total_files'] == 4
+    assert context['discovery']['shards'] == 3
+    assert len(analyzer.get_workspace_index().stats()['index_files']) == 3
+
+
+@pytest.fixture
+def process_pool():
+    yield
+    jira_analyzer_OPENAI.reset_index_pool()
+
+
+def test_process_pool_indexes_like_threads(tmp_path, process_pool, capsys):
+    for i in range(6):
+        write(tmp_path / 'ws', f"pkg/module_{i}.py",
+              f"class Service{i}:\n    def handle_{i}(self, request):\n        return request\n")
+    write(tmp_path / 'ws', 'blob.py', '\0' * 16)
+
+    def scan(cache, **config):
+        analyzer = JiraAnalyzer(dict({'cache_dir': str(tmp_path / cache), 'workspace_path': str(tmp_path / 'ws'),
+                                      'telemetry_enabled': False}, **config))
+        analyzer.scan_workspace_files()
+        return {path: entry for shard in analyzer.get_workspace_index().shards.values()
+                for path, entry in shard.entries.items()}
+
+    threaded = scan('threads', index_processes=1)
+    pooled = scan('processes', index_processes=2, process_pool_min_files=1)
+    assert jira_analyzer_OPENAI._index_pool is not None
+    assert 'Process pool unavailable' not in capsys.readouterr().out
+    assert pooled == threaded
+    assert pooled['blob.py']['skipped']
+    assert pooled[os.path.join('pkg', 'module_0.py')]['symbols'][1]['name'] == 'Service0.handle_0'
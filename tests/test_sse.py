@@ -0,0 +1,65 @@
+"""iter_sse_events: server-sent event parsing for streamed chat completions"""
+
+import pytest
+
+from jira_analyzer_OPENAI import JiraAnalyzer, iter_sse_events
+
+
+class _StreamedResponse:
+    def __init__(self, lines):
+        self.lines = lines
+        self.closed = False
+
+    def iter_lines(self, chunk_size=None, decode_unicode=True):
+        return iter(self.lines)
+
+    def close(self):
+        self.closed = True
+
+
+SSE_CASES = [
+    ('data events', ['data: {"a": 1}', '', 'data:{"b":2}'], [{'a': 1}, {'b': 2}]),
+    ('comments, other fields and bad json skipped',
+     [': keep-alive', 'event: delta', 'data: {"a": 1}', 'data: not json'], [{'a': 1}]),
+    ('stops at DONE', ['data: {"a": 1}', 'data: [DONE]', 'data: {"b": 2}'], [{'a': 1}]),
+    ('empty stream', [], []),
+]
+
+
+@pytest.mark.parametrize('lines, expected', [case[1:] for case in SSE_CASES],
+                         ids=[case[0] for case in SSE_CASES])
+def test_iter_sse_events(lines, expected):
+    assert list(iter_sse_events(_StreamedResponse(lines))) == expected
+
+
+def test_iter_sse_events_cancel_check():
+    class Cancelled(Exception):
+        pass
+
+    seen = []
+
+    def cancel_check():
+        if seen:
+            raise Cancelled()
+
+    with pytest.raises(Cancelled):
+        for event in iter_sse_events(_StreamedResponse(['data: {"a": 1}', 'data: {"b": 2}']), cancel_check):
+            seen.append(event)
+    assert seen == [{'a': 1}]
+
+
+def test_read_streamed_completion(tmp_path):
+    analyzer = JiraAnalyzer({'cache_dir': str(tmp_path), 'workspace_path': str(tmp_path),
+                             'telemetry_enabled': False})
+    response = _StreamedResponse([
+        'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+        'data: {"choices": [{"delta": {"content": "Hello"}}]}',
+        'data: {"choices": [{"delta": {"content": " world"}}]}',
+        'data: {"choices": [], "usage": {"prompt_tokens": 5, "completion_tokens": 2}}',
+        'data: [DONE]',
+    ])
+    tokens = []
+    text, usage = analyzer.read_streamed_completion(response, tokens.append)
+    assert (text, usage) == ('Hello world', {'prompt_tokens': 5, 'completion_tokens': 2})
+    assert tokens == ['Hello', ' world']
+    assert response.closed
@@ -0,0 +1,57 @@
+"""parse_stack_frames and SourceLocator: file references in bug descriptions and stack traces"""
+
+import pytest
+
+from jira_analyzer_OPENAI import SourceLocator, parse_stack_frames
+
+
+# parse_stack_frames: text -> [(file, line, symbol), ...]
+STACK_FRAME_CASES = [
+    ('java', 'java.lang.NullPointerException\n'
+             '\tat com.example.OrderService.process(OrderService.java:42)\n'
+             '\tat com.example.Main.main(Main.java:7)',
+     [('com/example/OrderService.java', 42, 'com.example.OrderService.process'),
+      ('com/example/Main.java', 7, 'com.example.Main.main')]),
+    ('python', 'Traceback (most recent call last):\n'
+               '  File "/app/src/payments/charge.py", line 88, in charge\n'
+               '    gateway.send()',
+     [('/app/src/payments/charge.py', 88, 'charge')]),
+    ('windows drive letters', r'crash at C:\src\parser.cpp:12 and (D:/w/a.ts:3)',
+     [('C:/src/parser.cpp', 12, None), ('D:/w/a.ts', 3, None)]),
+    ('line and column', 'at /app/src/x.js:10:5', [('/app/src/x.js', 10, None)]),
+    ('relative path', 'see src/a.py:5', [('src/a.py', 5, None)]),
+    ('url is not a frame', 'see http://host:8080/static/a.js:10 for details', []),
+    ('no references', 'The checkout page is slow', []),
+]
+
+
+@pytest.mark.parametrize('text, expected', [case[1:] for case in STACK_FRAME_CASES],
+                         ids=[case[0] for case in STACK_FRAME_CASES])
+def test_parse_stack_frames(text, expected):
+    frames = parse_stack_frames(text)
+    assert [(frame['file'], frame['line'], frame['symbol']) for frame in frames] == expected
+
+
+def test_parse_stack_frames_limit():
+    assert len(parse_stack_frames('a.py:1 b.py:2 c.py:3', limit=2)) == 2
+
+
+WORKSPACE = ['src/main/java/com/example/OrderService.java', 'legacy/com/example/OrderService.java',
+             'app/payments/charge.py', 'tests/payments/charge.py', 'web/Parser.cpp']
+
+# SourceLocator.resolve: hint -> workspace path
+RESOLVE_CASES = [
+    ('package path', 'com/example/OrderService.java', 'legacy/com/example/OrderService.java'),
+    ('longest shared directory suffix', '/home/ci/src/main/java/com/example/OrderService.java',
+     'src/main/java/com/example/OrderService.java'),
+    ('absolute path from another machine', '/app/src/payments/charge.py', 'app/payments/charge.py'),
+    ('windows separators, case-insensitive name', r'C:\build\web\parser.cpp', 'web/Parser.cpp'),
+    ('unknown file', 'src/missing.py', None),
+    ('empty hint', './', None),
+]
+
+
+@pytest.mark.parametrize('hint, expected', [case[1:] for case in RESOLVE_CASES],
+                         ids=[case[0] for case in RESOLVE_CASES])
+def test_source_locator_resolve(hint, expected):
+    assert SourceLocator(WORKSPACE).resolve(hint) == expected
@@ -0,0 +1,75 @@
+"""Telemetry: per-analysis timing spans, JSONL log and Prometheus summary"""
+
+import json
+
+import pytest
+
+from jira_analyzer_OPENAI import Telemetry
+
+
+def record_analysis(telemetry, key, spans, status='ok'):
+    trace = telemetry.start(key)
+    for stage, attrs in spans:
+        with telemetry.span(stage, **attrs):
+            pass
+    return telemetry.finish(trace, status)
+
+
+def test_spans_are_logged_per_analysis(tmp_path):
+    telemetry = Telemetry(tmp_path)
+    trace = telemetry.start('BUG-1')
+    with telemetry.span('fetch') as span:
+        with telemetry.span('adf', field='description'):
+            pass
+        span['links'] = 2
+    with pytest.raises(ValueError):
+        with telemetry.span('llm'):
+            raise ValueError('boom')
+    record = telemetry.finish(trace)
+    assert telemetry.current() is None
+
+    [logged] = [json.loads(line) for line in telemetry.spans_file.read_text().splitlines()]
+    assert logged == record
+    assert (logged['issue'], logged['status']) == ('BUG-1', 'ok')
+    spans = [(span['stage'], span.get('field'), span.get('links'), span.get('error')) for span in logged['spans']]
+    assert spans == [('adf', 'description', None, None), ('fetch', None, 2, None), ('llm', None, None, 'ValueError')]
+
+
+def test_summary_and_metrics(tmp_path):
+    telemetry = Telemetry(tmp_path)
+    usage = {'prompt_tokens': 100, 'completion_tokens': 20}
+    record_analysis(telemetry, 'BUG-1', [('llm', {'cache': 'miss', 'usage': usage})])
+    record_analysis(telemetry, 'BUG-2', [('llm', {'cache': 'hit', 'usage': usage})])
+    record_analysis(telemetry, 'BUG-3', [], status='error')
+
+    summary = Telemetry(tmp_path).summary()  # Seeded from the log after a restart
+    assert summary['analyses'] == {'ok': 2, 'error': 1}
+    assert summary['llm_calls'] == {'miss': 1, 'hit': 1}
+    assert summary['llm_tokens'] == {'prompt': 100, 'completion': 20}
+    assert summary['stages']['llm']['count'] == 2 and summary['stages']['total']['count'] == 3
+
+    metrics = telemetry.metrics_file.read_text()
+    assert 'jira_analyzer_stage_seconds_count{stage="llm"} 2' in metrics
+    assert 'jira_analyzer_llm_tokens{type="prompt"} 100' in metrics
+    assert 'jira_analyzer_analyses{status="error"} 1' in metrics
+
+
+def test_window_keeps_the_latest_analyses(tmp_path):
+    telemetry = Telemetry(tmp_path, window=2)
+    for key in ('BUG-1', 'BUG-2', 'BUG-3'):
+        record_analysis(telemetry, key, [], status='error' if key == 'BUG-1' else 'ok')
+    assert telemetry.summary()['analyses'] == {'ok': 2}
+
+
+def test_disabled_telemetry_writes_nothing(tmp_path):
+    telemetry = Telemetry(tmp_path, enabled=False)
+    assert telemetry.start('BUG-1') is None
+    with telemetry.span('fetch'):
+        pass
+    assert telemetry.finish(None) is None
+    assert not telemetry.directory.exists()
+
+
+@pytest.mark.parametrize('values, q, expected', [([3, 1, 2], 0.5, 2), ([1, 2, 3, 4], 0.95, 4), ([7], 0.5, 7)])
+def test_quantile(values, q, expected):
+    assert Telemetry.quantile(values, q) == expected
@@ -0,0 +1,52 @@
+"""walk_workspace: one pruned directory walk grouping source files by extension"""
+
+import os
+
+import pytest
+
+from jira_analyzer_OPENAI import walk_workspace
+
+
+def touch(root, *paths):
+    for path in paths:
+        target = root / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text('x = 1\n')
+
+
+def relative(root, files_by_ext):
+    return {ext: [os.path.relpath(path, root).replace(os.sep, '/') for path, stat in files]
+            for ext, files in files_by_ext.items()}
+
+
+def test_groups_by_extension_in_sorted_order(tmp_path):
+    touch(tmp_path, 'b.py', 'a.py', 'src/z/c.py', 'src/main.js', 'src/b/d.py', 'README.md')
+    files = relative(tmp_path, walk_workspace(tmp_path, ['.py', '.js'], []))
+    assert files == {'.py': ['a.py', 'b.py', 'src/b/d.py', 'src/z/c.py'], '.js': ['src/main.js']}
+
+
+def test_ignored_directories_are_pruned_at_any_depth(tmp_path):
+    touch(tmp_path, 'app.js', 'node_modules/lib/index.js', 'web/node_modules/x.js', 'build/out.js',
+          'web/ui.js')
+    files = relative(tmp_path, walk_workspace(tmp_path, ['.js'], ['node_modules', 'build']))
+    assert files == {'.js': ['app.js', 'web/ui.js']}
+
+
+def test_stat_is_returned_with_each_file(tmp_path):
+    touch(tmp_path, 'a.py')
+    [(path, stat)] = walk_workspace(tmp_path, ['.py'], [])['.py']
+    assert stat.st_size == os.path.getsize(path)
+
+
+@pytest.mark.skipif(not hasattr(os, 'symlink'), reason='needs symlinks')
+def test_directory_symlinks_are_not_followed(tmp_path):
+    touch(tmp_path, 'real/a.py')
+    try:
+        os.symlink(tmp_path / 'real', tmp_path / 'link', target_is_directory=True)
+    except OSError:
+        pytest.skip('cannot create symlinks here')
+    assert relative(tmp_path, walk_workspace(tmp_path, ['.py'], [])) == {'.py': ['real/a.py']}
+
+
+def test_missing_root(tmp_path):
+    assert walk_workspace(tmp_path / 'missing', ['.py'], []) == {'.py': []}
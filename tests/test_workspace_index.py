@@ -0,0 +1,71 @@
+"""WorkspaceIndex: persistent index of scanned files, invalidated by mtime and size"""
+
+import json
+
+from jira_analyzer_OPENAI import JiraAnalyzer, WorkspaceIndex
+
+
+def test_entries_survive_a_restart(tmp_path):
+    index = WorkspaceIndex(tmp_path, tmp_path / 'cache')
+    index.store('a.py', 100, 12, 'print("a")\n', 1, {'print': 1})
+    index.set_paths(['a.py'])
+    index.save()
+    assert not index.dirty
+
+    reloaded = WorkspaceIndex(tmp_path, tmp_path / 'cache')
+    assert reloaded.lookup('a.py', 100, 12)['content'] == 'print("a")\n'
+    assert reloaded.paths == ['a.py']
+    assert reloaded.stats()['hits'] == 1
+
+
+def test_changed_mtime_or_size_misses(tmp_path):
+    index = WorkspaceIndex(tmp_path, tmp_path / 'cache')
+    index.store('a.py', 100, 12, 'x', 1)
+    assert index.lookup('a.py', 101, 12) is None
+    assert index.lookup('a.py', 100, 13) is None
+    assert index.lookup('b.py', 100, 12) is None
+    assert index.lookup('a.py') is not None  # Without a stat the caller vouches for the entry
+    assert (index.hits, index.misses) == (1, 3)
+
+
+def test_other_version_or_workspace_starts_empty(tmp_path):
+    index = WorkspaceIndex(tmp_path, tmp_path / 'cache')
+    index.store('a.py', 100, 12, 'x', 1)
+    index.save()
+    data = json.loads(index.index_file.read_text())
+    index.index_file.write_text(json.dumps(dict(data, version=WorkspaceIndex.INDEX_VERSION - 1)))
+    assert WorkspaceIndex(tmp_path, tmp_path / 'cache').entries == {}
+    index.index_file.write_text('{not json')
+    assert WorkspaceIndex(tmp_path, tmp_path / 'cache').entries == {}
+
+
+def test_prune_and_invalidate(tmp_path):
+    index = WorkspaceIndex(tmp_path, tmp_path / 'cache')
+    index.store('a.py', 1, 1, 'a', 1)
+    index.store('b.py', 1, 1, 'b', 1)
+    index.save()
+    generation = index.generation
+    index.prune({'a.py'})
+    assert list(index.entries) == ['a.py']
+    assert index.dirty and index.generation > generation
+
+    index.invalidate()
+    assert index.entries == {} and not index.index_file.exists()
+
+
+def test_rescan_reads_only_changed_files(tmp_path):
+    workspace = tmp_path / 'ws'
+    workspace.mkdir()
+    for name in ('a.py', 'b.py', 'c.py'):
+        (workspace / name).write_text(f"{name[0]} = 1\n")
+    config = {'cache_dir': str(tmp_path / 'cache'), 'workspace_path': str(workspace), 'telemetry_enabled': False}
+    assert JiraAnalyzer(config).scan_workspace_files()['total_files'] == 3
+
+    (workspace / 'b.py').write_text('b = 2  # edited\n')
+    (workspace / 'c.py').unlink()
+    analyzer = JiraAnalyzer(config)  # A new session loads the saved index
+    context = analyzer.scan_workspace_files()
+    assert context['candidates'] == ['a.py', 'b.py']
+    assert {f['path']: f['content'] for f in context['files']}['b.py'] == 'b = 2  # edited\n'
+    stats = analyzer.get_workspace_index().stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 2)
@@ -0,0 +1,95 @@
+"""WorkspaceWatcher: inotify keeps the workspace index and listing current between scans"""
+
+import os
+import sys
+import time
+
+import pytest
+
+from jira_analyzer_OPENAI import JiraAnalyzer, WorkspaceWatcher
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'), reason='inotify is Linux only')
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    root = tmp_path / 'ws'
+    (root / 'src').mkdir(parents=True)
+    (root / 'node_modules').mkdir()
+    (root / 'src' / 'app.py').write_text('app = 1\n')
+    return root
+
+
+@pytest.fixture
+def batches(workspace):
+    """The (changed, removed, rescan) batches reported by a watcher on the workspace"""
+    reported_batches = []
+
+    def on_changes(changed, removed, rescan):
+        reported_batches.append((changed, removed, rescan))
+
+    watcher = WorkspaceWatcher([workspace], ['.py'], ['node_modules'], on_changes, debounce=0.05)
+    if not watcher.start():
+        pytest.skip(watcher.error)
+    assert watcher.wait_ready(5)
+    yield reported_batches
+    watcher.stop()
+
+
+def reported(batches, position):
+    return set().union(*(batch[position] for batch in batches))
+
+
+def test_changes_are_reported_in_debounced_batches(workspace, batches):
+    (workspace / 'src' / 'app.py').write_text('app = 2\n')
+    (workspace / 'src' / 'new.py').write_text('new = 1\n')
+    (workspace / 'src' / 'notes.txt').write_text('not source\n')
+    (workspace / 'node_modules' / 'lib.py').write_text('ignored = 1\n')
+    expected = {str(workspace / 'src' / 'app.py'), str(workspace / 'src' / 'new.py')}
+    assert wait_for(lambda: reported(batches, 0) >= expected)
+    time.sleep(0.2)  # Anything else would be reported by now
+    assert reported(batches, 0) == expected
+    assert reported(batches, 1) == set() and not any(rescan for _, _, rescan in batches)
+
+
+def test_deletions_and_new_directories(workspace, batches):
+    (workspace / 'src' / 'app.py').unlink()
+    assert wait_for(lambda: str(workspace / 'src' / 'app.py') in reported(batches, 1))
+    (workspace / 'pkg').mkdir()
+    time.sleep(0.2)  # The new directory gets its own watch
+    (workspace / 'pkg' / 'mod.py').write_text('mod = 1\n')
+    assert wait_for(lambda: str(workspace / 'pkg' / 'mod.py') in reported(batches, 0))
+
+
+def test_scans_are_answered_from_the_watched_index(workspace, tmp_path):
+    analyzer = JiraAnalyzer({'cache_dir': str(tmp_path / 'cache'), 'workspace_path': str(workspace),
+                             'watch_debounce': 0.05, 'telemetry_enabled': False})
+    if not analyzer.start_workspace_watcher():
+        pytest.skip('inotify unavailable')
+    try:
+        assert analyzer.workspace_watcher.wait_ready(5)
+        assert not analyzer.scan_workspace_files()['discovery']['hot']
+
+        (workspace / 'src' / 'app.py').write_text('app = 2  # edited\n')
+        (workspace / 'src' / 'billing.py').write_text('def refund():\n    pass\n')
+        index = analyzer.get_workspace_index()
+        billing = os.path.join('src', 'billing.py')
+        assert wait_for(lambda: index.get(billing) is not None
+                        and index.get(os.path.join('src', 'app.py'))['content'].endswith('# edited\n'))
+
+        context = analyzer.scan_workspace_files()
+        assert context['discovery']['hot']
+        assert sorted(context['candidates']) == [os.path.join('src', 'app.py'), billing]
+        assert analyzer.rank_workspace_files(context, 'refund')['files'][0]['path'] == billing
+    finally:
+        analyzer.stop_workspace_watcher()
+    assert not analyzer.scan_workspace_files()['discovery']['hot']